@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+字节源模块 - 串口接收线程的可插拔数据源
+
+端口名按前缀选择后端：
+    - "emu://..."    进程内虚拟设备，按设定帧率产生 AA 55 03 99 + 1024字节帧
+    - "pty://..."    同上，但通过伪终端(pty)输出，由pyserial打开从端，走完整的串口读取路径
+    - "replay://路径" 回放 tmp/<日期>/detection_data 下记录的CSV检测数据
+    - 其他           真实串口（pyserial）
+
+虚拟端口参数以查询串给出，例如:
+    emu://?fps=100&jitter_ms=0.5&corrupt=0.01&drop=0.001&seed=1
+    emu://walkway?segment=1&segments=3
+    emu://walkway?segment=all&segments=3&fps=300   （单端口依次发送3段）
+    replay://tmp/2025-07-26/detection_data/xxx.csv?loop=1&segment=0
+"""
+
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit, parse_qs, unquote
+
+import numpy as np
+import serial
+
+from date import FRAME_HEADER_BYTES
+from data_processor import JQ_INVERSE_PERMUTATION
+
+VIRTUAL_SCHEMES = ("emu", "pty", "replay")
+
+# 帧内时间戳标记：每字节只用低7位，保证不会出现帧头首字节0xAA
+STAMP_SEQUENCE_BYTES = 4   # 帧序号，28位
+STAMP_TIME_BYTES = 9       # 发送时间perf_counter_ns，63位
+STAMP_SIZE = STAMP_SEQUENCE_BYTES + STAMP_TIME_BYTES
+
+
+def is_virtual_port(port_name):
+    """端口名是否为虚拟字节源"""
+    return isinstance(port_name, str) and urlsplit(port_name).scheme in VIRTUAL_SCHEMES
+
+
+def open_byte_source(port_name, baudrate=1000000, timeout=1):
+    """
+    按端口名打开字节源
+
+    Args:
+        port_name (str): 串口名（COM3、/dev/ttyUSB0）或虚拟端口URL
+        baudrate (int): 波特率（虚拟端口忽略）
+        timeout (float): 读取超时（秒）
+
+    Returns:
+        具有readinto/read/in_waiting/is_open/close/name的端口对象
+    """
+    if not is_virtual_port(port_name):
+        return serial.Serial(port_name, baudrate, timeout=timeout)
+
+    url = urlsplit(port_name)
+    params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+    options = _emulator_options(params)
+    segment = params.get('segment', '0')
+
+    if url.scheme == "replay":
+        path = unquote(url.netloc + url.path)
+        payloads, intervals_ns = load_replay_payloads(path, int(segment))
+        if 'fps' in params:
+            intervals_ns = None
+        options.setdefault('loop', params.get('loop', '1') != '0')
+        source = EmulatedSerialPort(payloads, intervals_ns=intervals_ns, name=port_name,
+                                    timeout=timeout, **options)
+    else:
+        segments = int(params.get('segments', 1))
+        if segment == "all":
+            # 单端口多设备（如步道）：各段帧依次发送
+            payloads = [payload for group in zip(*(synthetic_payloads(index, segments)
+                                                   for index in range(segments)))
+                        for payload in group]
+        else:
+            payloads = synthetic_payloads(int(segment), segments)
+        source = EmulatedSerialPort(payloads, name=port_name, timeout=timeout, **options)
+
+    if url.scheme == "pty":
+        return PtySerialPort(source, baudrate, timeout)
+    return source
+
+
+def _emulator_options(params):
+    """查询串参数 -> EmulatedSerialPort关键字参数"""
+    options = {}
+    if 'fps' in params:
+        options['fps'] = float(params['fps'])
+    if 'jitter_ms' in params:
+        options['jitter_ms'] = float(params['jitter_ms'])
+    if 'corrupt' in params:
+        options['corrupt_rate'] = float(params['corrupt'])
+    if 'drop' in params:
+        options['drop_rate'] = float(params['drop'])
+    if 'seed' in params:
+        options['seed'] = int(params['seed'])
+    if 'stamp' in params:
+        options['stamp'] = params['stamp'] != '0'
+    return options
+
+
+def _to_device_payload(matrix_32x32):
+    """把显示空间（JQ变换后）的32x32矩阵还原为设备原始负载"""
+    return np.asarray(matrix_32x32, dtype=np.uint8).ravel()[JQ_INVERSE_PERMUTATION].tobytes()
+
+
+def synthetic_payloads(segment=0, segments=1, count=100):
+    """
+    生成一组循环播放的模拟压力帧（两只脚沿步道方向来回移动）
+
+    Args:
+        segment (int): 本端口对应的段序号（多端口/步道时每个端口一段32列）
+        segments (int): 总段数
+        count (int): 帧数（一个循环）
+
+    Returns:
+        list[bytes]: 设备原始负载（1024字节）
+    """
+    rng = np.random.default_rng(segment)
+    width = 32 * segments
+    rows, cols = np.mgrid[0:32, 0:width]
+
+    payloads = []
+    for i in range(count):
+        phase = i / count
+        center = 6 + (width - 12) * (0.5 - 0.5 * np.cos(2 * np.pi * phase))
+        field = np.zeros((32, width))
+        for foot_row, offset in ((10, -3.0), (22, 3.0)):
+            dist = ((rows - foot_row) / 4.0) ** 2 + ((cols - center - offset) / 6.0) ** 2
+            field += 180 * np.exp(-dist)
+        field += rng.integers(0, 6, size=field.shape)
+        matrix = np.clip(field, 0, 255).astype(np.uint8)[:, segment * 32:(segment + 1) * 32]
+        payloads.append(_to_device_payload(matrix))
+    return payloads
+
+
+def load_replay_payloads(path, segment=0):
+    """
+    读取检测数据CSV（time,max,timestamp,area,press,data）作为回放帧
+
+    CSV中的data已经过JQ变换（多设备时为拼接后的32xN矩阵），
+    这里取出对应段的32列并还原为设备原始负载。
+
+    Returns:
+        tuple: (payloads, intervals_ns) 原始负载列表和按记录时间计算的帧间隔
+    """
+    import csv
+    import json
+
+    segment_frames = []
+    times = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            values = np.asarray(json.loads(row['data']), dtype=np.uint8)
+            matrix = values.reshape(32, -1)
+            segments = matrix.shape[1] // 32
+            column = (segment % segments) * 32
+            segment_frames.append(matrix[:, column:column + 32].ravel())
+            times.append(float(row['time']))
+
+    if not segment_frames:
+        raise ValueError(f"回放文件没有数据: {path}")
+
+    # 整个会话一次批量逆变换
+    raw_frames = np.take(np.stack(segment_frames), JQ_INVERSE_PERMUTATION, axis=1)
+    payloads = [frame.tobytes() for frame in raw_frames]
+
+    intervals_ns = [max(int((b - a) * 1e9), 0) for a, b in zip(times, times[1:])]
+    # 循环回放时最后一帧到第一帧使用平均间隔
+    mean_interval = sum(intervals_ns) / len(intervals_ns) if intervals_ns else 1e7
+    intervals_ns.append(int(mean_interval))
+    return payloads, intervals_ns
+
+
+def encode_stamp(sequence, emit_ns):
+    """帧序号和发送时间编码为STAMP_SIZE个7位字节"""
+    stamp = bytearray(STAMP_SIZE)
+    for i in range(STAMP_SEQUENCE_BYTES):
+        stamp[i] = (sequence >> (7 * i)) & 0x7F
+    for i in range(STAMP_TIME_BYTES):
+        stamp[STAMP_SEQUENCE_BYTES + i] = (emit_ns >> (7 * i)) & 0x7F
+    return stamp
+
+
+def decode_stamp(payload):
+    """
+    从设备原始负载开头解出时间戳标记
+
+    Returns:
+        tuple: (sequence, emit_ns)
+    """
+    stamp = bytes(payload[:STAMP_SIZE])
+    sequence = 0
+    for i in range(STAMP_SEQUENCE_BYTES):
+        sequence |= stamp[i] << (7 * i)
+    emit_ns = 0
+    for i in range(STAMP_TIME_BYTES):
+        emit_ns |= stamp[STAMP_SEQUENCE_BYTES + i] << (7 * i)
+    return sequence, emit_ns
+
+
+class EmulatedSerialPort:
+    """进程内虚拟串口设备
+
+    按帧率（或回放间隔）在预定时刻"到达"一帧 AA 55 03 99 + 1024字节，
+    读取时只返回已到达的字节，与真实串口的in_waiting/readinto行为一致。
+    可选:
+        - jitter_ms: 帧间隔的均匀抖动
+        - corrupt_rate: 每帧被破坏的概率（截断、字节翻转、插入垃圾字节）
+        - drop_rate: 整帧丢失的概率
+        - stamp: 在负载开头写入帧序号和发送时间，用于测量端到端延迟
+    """
+
+    def __init__(self, payloads, fps=100.0, intervals_ns=None, jitter_ms=0.0,
+                 corrupt_rate=0.0, drop_rate=0.0, stamp=False, seed=None,
+                 loop=True, buffer_size=65536, name="emu://", timeout=1):
+        """
+        Args:
+            payloads (list[bytes]): 循环发送的设备负载
+            fps (float): 帧率，intervals_ns为None时使用
+            intervals_ns (list[int]): 每帧之后的间隔（回放使用）
+            buffer_size (int): 模拟驱动接收缓冲区大小，读取不及时超出部分丢弃
+            loop (bool): 负载发送完后是否从头循环
+        """
+        self.payloads = payloads
+        self.period_ns = int(1e9 / fps)
+        self.intervals_ns = intervals_ns
+        self.jitter_ns = int(jitter_ms * 1e6)
+        self.corrupt_rate = corrupt_rate
+        self.drop_rate = drop_rate
+        self.stamp = stamp
+        self.loop = loop
+        self.buffer_size = buffer_size
+        self.name = name
+        self.port = name
+        self.timeout = timeout
+        self.baudrate = None
+
+        self._random = random.Random(seed)
+        self._pending = bytearray()
+        self._lock = threading.Lock()
+        self._next_emit_ns = time.perf_counter_ns()
+        self._index = 0
+        self.is_open = True
+
+        self.sequence = 0          # 已调度的帧数（含丢失的帧）
+        self.emitted_count = 0     # 实际发出的帧数
+        self.dropped_frames = 0    # 模拟丢失的帧数
+        self.corrupted_frames = 0  # 被破坏的帧数
+        self.overrun_bytes = 0     # 接收缓冲区溢出丢弃的字节数
+        self.read_bytes = 0        # 已被读取的字节数
+
+    @property
+    def finished(self):
+        """不循环时，所有负载是否已发送完毕"""
+        return not self.loop and self._index >= len(self.payloads)
+
+    def _interval_ns(self, index):
+        if self.intervals_ns is not None:
+            interval = self.intervals_ns[index % len(self.intervals_ns)]
+        else:
+            interval = self.period_ns
+        if self.jitter_ns:
+            interval += self._random.randint(-self.jitter_ns, self.jitter_ns)
+        return max(interval, 0)
+
+    def _build_frame(self, payload, emit_ns):
+        frame = bytearray(FRAME_HEADER_BYTES)
+        frame += payload
+        if self.stamp:
+            frame[len(FRAME_HEADER_BYTES):len(FRAME_HEADER_BYTES) + STAMP_SIZE] = encode_stamp(self.sequence, emit_ns)
+
+        if self.corrupt_rate and self._random.random() < self.corrupt_rate:
+            self.corrupted_frames += 1
+            mode = self._random.randrange(3)
+            if mode == 0:
+                # 截断：帧尾部分字节丢失
+                del frame[self._random.randrange(1, len(frame)):]
+            elif mode == 1:
+                # 字节翻转（可能落在帧头上）
+                frame[self._random.randrange(len(frame))] ^= 0xFF
+            else:
+                # 帧前插入垃圾字节
+                garbage = bytes(self._random.randrange(256) for _ in range(self._random.randrange(1, 64)))
+                frame[0:0] = garbage
+        return frame
+
+    def _pump(self, now_ns):
+        """把到达时刻已过的帧放入接收缓冲区（调用时持有锁）"""
+        while self._next_emit_ns <= now_ns and not self.finished:
+            emit_ns = self._next_emit_ns
+            payload = self.payloads[self._index % len(self.payloads)]
+            self._next_emit_ns += self._interval_ns(self._index)
+            self._index += 1
+
+            if self.drop_rate and self._random.random() < self.drop_rate:
+                self.dropped_frames += 1
+            else:
+                frame = self._build_frame(payload, emit_ns)
+                room = self.buffer_size - len(self._pending)
+                if room < len(frame):
+                    self.overrun_bytes += len(frame) - max(room, 0)
+                    frame = frame[:max(room, 0)]
+                self._pending += frame
+                self.emitted_count += 1
+            self.sequence += 1
+
+    @property
+    def in_waiting(self):
+        with self._lock:
+            self._pump(time.perf_counter_ns())
+            return len(self._pending)
+
+    def readinto(self, buffer):
+        """读取已到达的字节，没有数据时最多等待timeout秒"""
+        deadline_ns = time.perf_counter_ns() + int((self.timeout or 0) * 1e9)
+        while self.is_open:
+            with self._lock:
+                now_ns = time.perf_counter_ns()
+                self._pump(now_ns)
+                if self._pending:
+                    count = min(len(buffer), len(self._pending))
+                    buffer[:count] = self._pending[:count]
+                    del self._pending[:count]
+                    self.read_bytes += count
+                    return count
+                wait_ns = min(self._next_emit_ns, deadline_ns) - now_ns
+                if self.finished or now_ns >= deadline_ns:
+                    return 0
+            time.sleep(max(wait_ns, 0) / 1e9)
+        return 0
+
+    def read(self, size=1):
+        buffer = bytearray(size)
+        count = self.readinto(buffer)
+        return bytes(buffer[:count])
+
+    def write(self, data):
+        return len(data)
+
+    def reset_input_buffer(self):
+        with self._lock:
+            self._pending.clear()
+
+    def close(self):
+        self.is_open = False
+
+    def get_stats(self):
+        """获取模拟设备统计"""
+        return {
+            'scheduled': self.sequence,
+            'emitted': self.emitted_count,
+            'dropped_frames': self.dropped_frames,
+            'corrupted_frames': self.corrupted_frames,
+            'overrun_bytes': self.overrun_bytes,
+            'read_bytes': self.read_bytes
+        }
+
+
+class PtyEmulator:
+    """通过伪终端输出虚拟设备数据（仅Linux/macOS）
+
+    后台线程把EmulatedSerialPort的字节写入pty主端，
+    slave_name（如/dev/pts/3）可以像真实串口一样被pyserial或其他程序打开。
+    """
+
+    def __init__(self, source):
+        import tty
+
+        self.source = source
+        self.master_fd, self.slave_fd = os.openpty()
+        tty.setraw(self.slave_fd)
+        self.slave_name = os.ttyname(self.slave_fd)
+        self.is_running = False
+        self.thread = None
+
+    def start(self):
+        self.is_running = True
+        self.thread = threading.Thread(target=self._pump_thread, daemon=True)
+        self.thread.start()
+        return self
+
+    def _pump_thread(self):
+        buffer = bytearray(4096)
+        view = memoryview(buffer)
+        while self.is_running:
+            count = self.source.readinto(buffer)
+            if not count:
+                if self.source.finished:
+                    break
+                continue
+            try:
+                written = 0
+                while written < count and self.is_running:
+                    written += os.write(self.master_fd, view[written:count])
+            except OSError:
+                break
+
+    def stop(self):
+        self.is_running = False
+        self.source.close()
+        if self.thread:
+            self.thread.join(timeout=1.0)
+        for fd in (self.master_fd, self.slave_fd):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+class PtySerialPort:
+    """用pyserial打开PtyEmulator从端的串口，关闭时一并停止模拟设备"""
+
+    def __init__(self, source, baudrate=1000000, timeout=1):
+        self.emulator = PtyEmulator(source)
+        self.serial = serial.Serial(self.emulator.slave_name, baudrate, timeout=timeout)
+        self.emulator.start()
+
+    @property
+    def source(self):
+        return self.emulator.source
+
+    def close(self):
+        self.serial.close()
+        self.emulator.stop()
+
+    def __getattr__(self, name):
+        return getattr(self.serial, name)
+
+
+if __name__ == "__main__":
+    import sys
+
+    # 启动一个pty虚拟设备，供主程序或其他工具按串口名连接
+    url = sys.argv[1] if len(sys.argv) > 1 else "emu://"
+    if urlsplit(url).scheme not in VIRTUAL_SCHEMES:
+        url = "emu://" + url
+    port = open_byte_source(url.replace("pty://", "emu://", 1))
+    emulator = PtyEmulator(port).start()
+    print(f"🔌 虚拟设备已启动: {emulator.slave_name}  ({url})")
+    print("按 Ctrl+C 停止")
+    try:
+        while emulator.thread.is_alive():
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        emulator.stop()
+        print(f"📊 {port.get_stats()}")
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+压力标定模块 - 传感器原始值(0-255)到物理压力单位的查找表转换
+"""
+
+import json
+import sqlite3
+from datetime import datetime
+
+import numpy as np
+
+# 未标定设备的默认换算：0-255 线性对应 0-60mmHg
+DEFAULT_PRESSURE_UNIT = 'mmHg'
+DEFAULT_FULL_SCALE = 60.0
+
+# 每帧压力统计（物理单位）
+PRESSURE_STATS_DTYPE = np.dtype([
+    ('max', np.float64),
+    ('min', np.float64),
+    ('mean', np.float64),
+    ('sum', np.float64)
+])
+
+class PressureCalibration:
+    """单个设备的压力标定
+
+    lut为256项查找表：pressure = lut[raw]，一次np.take完成整帧（或整批）转换；
+    gain/offset为可选的逐点增益/偏移图（按显示矩阵布局，即JQ变换和拼接之后），
+    用于补偿单个传感点的灵敏度差异：pressure = lut[raw] * gain + offset。
+    """
+
+    def __init__(self, lut, gain=None, offset=None, unit=DEFAULT_PRESSURE_UNIT, source='default'):
+        """
+        Args:
+            lut (array-like): 256项查找表（原始值 -> 物理压力）
+            gain (np.ndarray): 逐点增益图 (rows, cols)，None表示不使用
+            offset (np.ndarray): 逐点偏移图 (rows, cols)，None表示不使用
+            unit (str): 压力单位
+            source (str): 标定来源（'default'、'database'等），用于日志
+        """
+        lut = np.asarray(lut, dtype=np.float32).ravel()
+        if lut.shape != (256,):
+            raise ValueError(f"查找表必须为256项，实际{lut.size}项")
+        if gain is not None and offset is not None and np.shape(gain) != np.shape(offset):
+            raise ValueError(f"增益图{np.shape(gain)}与偏移图{np.shape(offset)}尺寸不一致")
+
+        self.lut = lut
+        self.gain = None if gain is None else np.asarray(gain, dtype=np.float32)
+        self.offset = None if offset is None else np.asarray(offset, dtype=np.float32)
+        self.unit = unit
+        self.source = source
+        # 单调查找表下，帧内最大/最小压力可直接由原始值的最大/最小查表得到
+        self.monotonic = bool(np.all(np.diff(self.lut) >= 0))
+
+    @classmethod
+    def linear(cls, full_scale=DEFAULT_FULL_SCALE, unit=DEFAULT_PRESSURE_UNIT, source='default'):
+        """线性标定：0-255 对应 0-full_scale"""
+        return cls(np.arange(256) * (full_scale / 255.0), unit=unit, source=source)
+
+    @classmethod
+    def from_points(cls, raw_points, pressure_points, unit=DEFAULT_PRESSURE_UNIT, source='points'):
+        """由加载实验的标定点（原始值, 压力）分段线性插值生成查找表"""
+        raw_points = np.asarray(raw_points, dtype=np.float64)
+        order = np.argsort(raw_points)
+        lut = np.interp(np.arange(256), raw_points[order], np.asarray(pressure_points, dtype=np.float64)[order])
+        return cls(lut, unit=unit, source=source)
+
+    @property
+    def has_cell_maps(self):
+        """是否带逐点增益/偏移图"""
+        return self.gain is not None or self.offset is not None
+
+    def cell_map_shape(self):
+        """逐点图的尺寸，没有逐点图时返回None"""
+        cell_map = self.gain if self.gain is not None else self.offset
+        return None if cell_map is None else cell_map.shape
+
+    def apply(self, matrices, out=None):
+        """
+        原始值矩阵 -> 物理压力（查找表取数 + 可选的逐点增益/偏移）
+
+        逐点图尺寸与矩阵的最后两维不一致时（如切换了阵列大小）只使用查找表。
+
+        Args:
+            matrices (np.ndarray): (..., rows, cols) uint8原始值
+            out (np.ndarray): 预分配的float32输出，None时新建
+
+        Returns:
+            np.ndarray: 与输入同形状的float32压力矩阵
+        """
+        matrices = np.asarray(matrices)
+        # uint8索引不会越界，mode='clip'省去越界检查的缓冲
+        pressure = np.take(self.lut, matrices, out=out, mode='clip')
+
+        if self.has_cell_maps and self.cell_map_shape() == matrices.shape[-2:]:
+            if self.gain is not None:
+                pressure *= self.gain
+            if self.offset is not None:
+                pressure += self.offset
+                # 偏移可能使空载点为负，压力不小于0
+                np.maximum(pressure, 0, out=pressure)
+        return pressure
+
+    def convert(self, raw_value):
+        """原始值（标量或数组，可为小数）按查找表插值换算，用于刻度、阈值等显示"""
+        return np.interp(raw_value, np.arange(256), self.lut)
+
+    def statistics_batch(self, pressure, raw_statistics=None):
+        """
+        批量计算物理压力统计
+
+        Args:
+            pressure (np.ndarray): (N, rows, cols) 压力矩阵
+            raw_statistics (np.ndarray): 同一批原始值的FRAME_STATS_DTYPE统计；
+                查找表单调且没有逐点图时，最大/最小压力直接查表，省去两次归约
+
+        Returns:
+            np.ndarray: 长度N的结构数组，字段见PRESSURE_STATS_DTYPE
+        """
+        count = len(pressure)
+        flat = pressure.reshape(count, -1)
+        table = np.empty(count, dtype=PRESSURE_STATS_DTYPE)
+        if count == 0:
+            return table
+
+        if raw_statistics is not None and self.monotonic and not self.has_cell_maps:
+            table['max'] = self.lut[raw_statistics['max']]
+            table['min'] = self.lut[raw_statistics['min']]
+        else:
+            table['max'] = flat.max(axis=1)
+            table['min'] = flat.min(axis=1)
+        table['sum'] = flat.sum(axis=1)
+        table['mean'] = table['sum'] / flat.shape[1]
+        return table
+
+    def statistics_to_dict(self, stats):
+        """把一条PRESSURE_STATS_DTYPE记录转换为统计字典中的物理压力字段"""
+        return {
+            'max_pressure': float(stats['max']),
+            'min_pressure': float(stats['min']),
+            'mean_pressure': float(stats['mean']),
+            'total_pressure': float(stats['sum']),
+            'pressure_unit': self.unit
+        }
+
+    def to_dict(self):
+        """导出为可JSON序列化的字典（CSV旁的标定说明文件使用）"""
+        return {
+            'unit': self.unit,
+            'source': self.source,
+            'lut': [round(float(value), 6) for value in self.lut],
+            'gain': None if self.gain is None else self.gain.tolist(),
+            'offset': None if self.offset is None else self.offset.tolist()
+        }
+
+    def save_sidecar(self, csv_path):
+        """
+        在CSV数据文件旁写入标定说明文件（<csv>.calibration.json）
+
+        CSV的max/area/press/data列为扣除逐点零漂基线后的传感器整数读数（分析服务按整数解析），
+        不是物理单位；需要物理单位时用此文件中的查找表换算。
+        """
+        sidecar_path = f"{csv_path}.calibration.json"
+        with open(sidecar_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+        return sidecar_path
+
+
+class CalibrationStore:
+    """设备标定存储 - 与设备配置共用device_config.db中的device_calibration表"""
+
+    def __init__(self, db_path="device_config.db"):
+        self.db_path = db_path
+        self.init_database()
+
+    def init_database(self):
+        """创建标定表"""
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=10.0)
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS device_calibration (
+                    device_id TEXT PRIMARY KEY,
+                    unit TEXT NOT NULL,
+                    lut BLOB NOT NULL,
+                    map_rows INTEGER,
+                    map_cols INTEGER,
+                    gain BLOB,
+                    offset BLOB,
+                    updated_at TEXT NOT NULL
+                )
+            ''')
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            print(f"❌ 初始化标定表失败: {e}")
+
+    @staticmethod
+    def _to_blob(array):
+        return None if array is None else np.ascontiguousarray(array, dtype='<f4').tobytes()
+
+    @staticmethod
+    def _from_blob(blob, shape=None):
+        if blob is None:
+            return None
+        array = np.frombuffer(blob, dtype='<f4').astype(np.float32)
+        return array if shape is None else array.reshape(shape)
+
+    def save(self, device_id, calibration):
+        """保存（覆盖）设备标定"""
+        map_shape = calibration.cell_map_shape() or (None, None)
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=10.0)
+            conn.execute('''
+                INSERT OR REPLACE INTO device_calibration
+                (device_id, unit, lut, map_rows, map_cols, gain, offset, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                device_id,
+                calibration.unit,
+                self._to_blob(calibration.lut),
+                map_shape[0],
+                map_shape[1],
+                self._to_blob(calibration.gain),
+                self._to_blob(calibration.offset),
+                datetime.now().isoformat()
+            ))
+            conn.commit()
+            conn.close()
+            print(f"✅ 设备 {device_id} 标定已保存 ({calibration.unit})")
+            return True
+        except Exception as e:
+            print(f"❌ 保存设备标定失败: {e}")
+            return False
+
+    def load(self, device_id):
+        """
+        读取设备标定
+
+        Returns:
+            PressureCalibration: 未标定或读取失败时返回None
+        """
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=10.0)
+            row = conn.execute('''
+                SELECT unit, lut, map_rows, map_cols, gain, offset
+                FROM device_calibration WHERE device_id = ?
+            ''', (device_id,)).fetchone()
+            conn.close()
+        except Exception as e:
+            print(f"❌ 读取设备标定失败: {e}")
+            return None
+
+        if row is None:
+            return None
+
+        unit, lut, map_rows, map_cols, gain, offset = row
+        shape = (map_rows, map_cols) if map_rows and map_cols else None
+        try:
+            return PressureCalibration(
+                self._from_blob(lut),
+                gain=self._from_blob(gain, shape),
+                offset=self._from_blob(offset, shape),
+                unit=unit,
+                source='database'
+            )
+        except ValueError as e:
+            print(f"⚠️ 设备 {device_id} 标定数据无效，使用默认换算: {e}")
+            return None
+
+    def delete(self, device_id):
+        """删除设备标定（恢复默认换算）"""
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=10.0)
+            conn.execute('DELETE FROM device_calibration WHERE device_id = ?', (device_id,))
+            conn.commit()
+            conn.close()
+            return True
+        except Exception as e:
+            print(f"❌ 删除设备标定失败: {e}")
+            return False
+
+    def get_calibration(self, device_id):
+        """设备标定，未标定时返回默认线性换算"""
+        return self.load(device_id) or PressureCalibration.linear()
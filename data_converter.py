@@ -8,13 +8,60 @@ from datetime import datetime, timezone
 from typing import List, Optional, Dict, Any
 import logging
 
+from data_processor import frame_statistics, frame_statistics_batch
+
 logger = logging.getLogger(__name__)
 
+# 支持的帧长度: 32x32, 32x64, 32x96
+VALID_FRAME_LENGTHS = (1024, 2048, 3072)
+
 class SarcopeniaDataConverter:
     """肌少症数据转换器"""
     
     def __init__(self):
         self.frame_interval = 0.01  # 默认10ms间隔 (100 FPS)
+    
+    @staticmethod
+    def _contact_area(values, max_pressure):
+        """接触面积：压力值大于动态阈值的传感器数量"""
+        contact_threshold = np.maximum(10, max_pressure * 0.05)
+        return np.count_nonzero(values > np.asarray(contact_threshold)[..., np.newaxis], axis=-1)
+    
+    def compute_frame_metrics(self, pressure_frames: List[List[int]]) -> Dict[int, tuple]:
+        """
+        批量计算每帧的 (最大压力, 总压力, 接触面积)
+        
+        相同长度的帧放入同一个 (N, 32, W) 数组，用frame_statistics_batch一次算出，
+        长度异常或无法转换的帧不在结果中。
+        
+        Returns:
+            帧索引 -> (max_pressure, total_pressure, contact_area)
+        """
+        groups = {}
+        for i, frame in enumerate(pressure_frames):
+            if len(frame) not in VALID_FRAME_LENGTHS:
+                logger.warning(f"帧{i}: 数据长度异常({len(frame)}), 跳过")
+                continue
+            groups.setdefault(len(frame), []).append(i)
+        
+        metrics = {}
+        for length, indices in groups.items():
+            values = np.empty((len(indices), length), dtype=np.int64)
+            valid = np.ones(len(indices), dtype=bool)
+            for row, i in enumerate(indices):
+                try:
+                    values[row] = pressure_frames[i]
+                except Exception as e:
+                    logger.error(f"处理帧{i}时出错: {e}")
+                    valid[row] = False
+            values = values[valid]
+            indices = [i for i, ok in zip(indices, valid) if ok]
+            
+            table = frame_statistics_batch(values.reshape(len(indices), 32, length // 32))
+            contact_areas = self._contact_area(values, table['max'])
+            for i, stats, contact_area in zip(indices, table, contact_areas):
+                metrics[i] = (int(stats['max']), int(stats['sum']), int(contact_area))
+        return metrics
         
     def convert_frames_to_csv(
         self, 
@@ -42,26 +89,19 @@ class SarcopeniaDataConverter:
         frame_interval = 1.0 / frame_rate
         csv_lines = ["time,max_pressure,timestamp,contact_area,total_pressure,data"]
         
+        # 所有帧的压力统计一次批量算出
+        frame_metrics = self.compute_frame_metrics(pressure_frames)
+        
         for i, frame in enumerate(pressure_frames):
+            if i not in frame_metrics:
+                continue
             try:
-                # 验证数据长度
-                if len(frame) not in [1024, 2048, 3072]:  # 32x32, 32x64, 32x96
-                    logger.warning(f"帧{i}: 数据长度异常({len(frame)}), 跳过")
-                    continue
-                
                 # 计算时间
                 time_val = i * frame_interval
                 current_time = start_time.timestamp() + time_val
                 timestamp = datetime.fromtimestamp(current_time, timezone.utc).isoformat().replace('+00:00', 'Z')
                 
-                # 计算压力统计
-                frame_array = np.array(frame, dtype=int)
-                max_pressure = int(np.max(frame_array))
-                total_pressure = int(np.sum(frame_array))
-                
-                # 计算接触面积（压力值大于阈值的传感器数量）
-                contact_threshold = max(10, max_pressure * 0.05)  # 动态阈值
-                contact_area = int(np.sum(frame_array > contact_threshold))
+                max_pressure, total_pressure, contact_area = frame_metrics[i]
                 
                 # 转换为JSON字符串
                 data_json = json.dumps(frame)
@@ -100,16 +140,15 @@ class SarcopeniaDataConverter:
         if timestamp is None:
             timestamp = datetime.now(timezone.utc)
             
-        if len(frame) not in [1024, 2048, 3072]:
+        if len(frame) not in VALID_FRAME_LENGTHS:
             raise ValueError(f"数据长度异常: {len(frame)}")
             
         # 计算统计值
-        frame_array = np.array(frame, dtype=int)
-        max_pressure = int(np.max(frame_array))
-        total_pressure = int(np.sum(frame_array))
-        
-        contact_threshold = max(10, max_pressure * 0.05)
-        contact_area = int(np.sum(frame_array > contact_threshold))
+        frame_array = np.array(frame, dtype=np.int64)
+        stats = frame_statistics(frame_array.reshape(32, -1))
+        max_pressure = int(stats['max'])
+        total_pressure = int(stats['sum'])
+        contact_area = int(self._contact_area(frame_array, max_pressure))
         
         time_val = frame_index * self.frame_interval
         timestamp_str = timestamp.isoformat().replace('+00:00', 'Z')
@@ -177,16 +216,10 @@ class SarcopeniaDataConverter:
             return {"quality": "无数据", "score": 0}
             
         total_frames = len(pressure_frames)
-        valid_frames = 0
-        total_pressure_sum = 0
-        max_pressures = []
-        
-        for frame in pressure_frames:
-            if len(frame) in [1024, 2048, 3072]:
-                valid_frames += 1
-                frame_array = np.array(frame)
-                total_pressure_sum += np.sum(frame_array)
-                max_pressures.append(np.max(frame_array))
+        frame_metrics = self.compute_frame_metrics(pressure_frames)
+        valid_frames = len(frame_metrics)
+        total_pressure_sum = sum(metrics[1] for metrics in frame_metrics.values())
+        max_pressures = [metrics[0] for metrics in frame_metrics.values()]
         
         if valid_frames == 0:
             return {"quality": "数据异常", "score": 0}
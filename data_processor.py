@@ -4,8 +4,362 @@
 数据处理模块 - 负责压力传感器数据的处理和转换
 """
 
+import time
 import numpy as np
-from datetime import datetime
+
+from calibration import PressureCalibration
+
+def _build_jq_permutation():
+    """
+    生成JQ变换的索引表（32x32，1024个点的固定置换）
+    
+    第一步：前8行分别与第15-i行交换；第二步：前15行移到后面
+    """
+    row_order = np.arange(32)
+    for i in range(8):
+        mirror_row = 14 - i
+        row_order[[i, mirror_row]] = row_order[[mirror_row, i]]
+    row_order = np.concatenate([row_order[15:], row_order[:15]])
+    return (row_order[:, None] * 32 + np.arange(32)).ravel()
+
+# JQ变换索引表：transformed = raw[JQ_PERMUTATION]
+JQ_PERMUTATION = _build_jq_permutation()
+# 逆变换索引表：raw = transformed[JQ_INVERSE_PERMUTATION]
+JQ_INVERSE_PERMUTATION = np.argsort(JQ_PERMUTATION)
+
+_stitch_permutations = {}
+
+def jq_stitch_permutation(segments, segment_order=None):
+    """
+    多段拼接的索引表：各段原始数据依次排列（segments*1024字节），
+    一次取数即得到各段JQ变换后左右拼接的32x(32*segments)矩阵
+    
+    Args:
+        segments (int): 段数（端口/设备帧数）
+        segment_order (list): 拼接位置k使用的原始段序号，None表示按顺序
+        
+    Returns:
+        np.ndarray: (32, 32*segments) 的索引表，combined = raw[perm]
+    """
+    order = tuple(segment_order) if segment_order is not None else tuple(range(segments))
+    key = (segments, order)
+    perm = _stitch_permutations.get(key)
+    if perm is None:
+        jq_2d = JQ_PERMUTATION.reshape(32, 32)
+        perm = np.hstack([jq_2d + source * 1024 for source in order])
+        _stitch_permutations[key] = perm
+    return perm
+
+# 单帧统计表的字段：一次计算，显示、记录、转换共用
+FRAME_STATS_DTYPE = np.dtype([
+    ('max', np.int64),
+    ('min', np.int64),
+    ('sum', np.int64),
+    ('sumsq', np.int64),
+    ('nonzero', np.int64),
+    ('cop_x', np.float64),   # 压力中心列坐标（格），无压力时为NaN
+    ('cop_y', np.float64)    # 压力中心行坐标（格），无压力时为NaN
+])
+
+_moment_weights = {}
+
+def _get_moment_weights(rows, cols):
+    """整数权重矩阵 (rows*cols, 3)：[1, 列号, 行号]，一次矩阵乘得到总和及两个一阶矩"""
+    weights = _moment_weights.get((rows, cols))
+    if weights is None:
+        row_index, col_index = np.divmod(np.arange(rows * cols, dtype=np.int64), cols)
+        weights = np.stack([np.ones(rows * cols, dtype=np.int64), col_index, row_index], axis=1)
+        _moment_weights[(rows, cols)] = weights
+    return weights
+
+def frame_statistics_batch(frames):
+    """
+    批量计算帧统计（整数累加）
+    
+    最大/最小/非零点数直接在原始数据上计算，总和、平方和与压力中心的
+    一阶矩在一次int64转换后用一次矩阵乘和一次einsum得到。
+    
+    Args:
+        frames (np.ndarray): (N, H, W) 整数压力帧
+        
+    Returns:
+        np.ndarray: 长度N的结构数组，字段见FRAME_STATS_DTYPE
+    """
+    frames = np.asarray(frames)
+    if frames.ndim != 3:
+        raise ValueError(f"Batch shape must be (N, H, W), got {frames.shape}")
+    
+    count, rows, cols = frames.shape
+    flat = frames.reshape(count, rows * cols)
+    table = np.empty(count, dtype=FRAME_STATS_DTYPE)
+    if count == 0:
+        return table
+    
+    table['max'] = flat.max(axis=1)
+    table['min'] = flat.min(axis=1)
+    table['nonzero'] = np.count_nonzero(flat, axis=1)
+    
+    values = flat.astype(np.int64)
+    moments = values @ _get_moment_weights(rows, cols)
+    table['sum'] = moments[:, 0]
+    table['sumsq'] = np.einsum('ij,ij->i', values, values)
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        table['cop_x'] = moments[:, 1] / moments[:, 0]
+        table['cop_y'] = moments[:, 2] / moments[:, 0]
+    return table
+
+def frame_statistics(matrix_2d):
+    """单帧统计，返回FRAME_STATS_DTYPE的一条记录"""
+    return frame_statistics_batch(np.asarray(matrix_2d)[np.newaxis])[0]
+
+class CellBaseline:
+    """逐点零漂基线估计
+
+    空载时传感器存在非零底数且随温度缓慢漂移，会虚增接触面积和非零点数。
+        - 建立：整帧最大值不超过 noise_margin+load_margin 的第一帧（之前offset为0、只去除噪声，
+          连接或切换设备时已有负载也不会被当作基线）
+        - 下调：读数低于基线时立即下调（滚动最小值）
+        - 缓慢上漂：逐点判断，本批读数都不超过 基线+noise_margin 的点按alpha做EWMA跟随，
+          其他点有负载不影响这些点
+        - 整体阶跃：每step_window次更新内，(本批最小值-基线)的全阵列中位数始终在
+          (noise_margin, load_margin] 内时，整个基线抬高该最小中位数（负载只占部分点，不影响中位数）
+        - 单点阶跃：每drift_window次更新内，某点的最小读数始终比基线高出 (noise_margin, load_margin]
+          时，该点基线抬到这个最小值
+    高出基线超过load_margin的负载永远不会被吸收；不超过load_margin的轻负载静止超过drift_window次更新
+    才会被当作零漂。只保存基线和两个窗口内的最小值，不保存历史帧；建立后每update_interval次调用更新一次。
+    """
+    
+    def __init__(self, rows, cols, alpha=0.05, noise_margin=2, load_margin=8, update_interval=4,
+                 step_window=25, drift_window=250):
+        """
+        Args:
+            rows (int): 行数
+            cols (int): 列数
+            alpha (float): 基线上漂的EWMA系数
+            noise_margin (int): 扣除基线后不超过此值的读数视为噪声置零
+            load_margin (int): 建立基线时整帧最大值不超过noise_margin+load_margin才视为空载
+            update_interval (int): 每隔多少次update调用实际更新一次基线
+            step_window (int): 整体阶跃判定窗口（更新次数，默认约100帧）
+            drift_window (int): 单点阶跃判定窗口（更新次数，默认约1000帧）
+        """
+        self.rows = rows
+        self.cols = cols
+        self.alpha = alpha
+        self.noise_margin = noise_margin
+        self.load_margin = load_margin
+        self.update_interval = update_interval
+        self.step_window = step_window
+        self.drift_window = drift_window
+        self.reset()
+    
+    def reset(self):
+        """清除基线（阵列大小改变、设备切换时）"""
+        self.baseline = None                                            # float32 (rows, cols)
+        self.offset = np.zeros((self.rows, self.cols), dtype=np.uint8)     # 扣除用的整数基线
+        self.threshold = np.full((self.rows, self.cols), self.noise_margin, dtype=np.uint8)  # 基线+噪声容限
+        self.update_count = 0
+        self._calls = 0
+        self._reset_windows()
+
+    def _reset_windows(self):
+        self._step_min = np.inf     # 窗口内超出基线的中位数的最小值
+        self._step_updates = 0
+        self._drift_min = None      # 窗口内逐点最小读数 float32 (rows, cols)
+        self._drift_updates = 0
+    
+    def update(self, matrices):
+        """
+        用一批 (N, rows, cols) 帧更新基线：整批最小值下调，空载的点按最新一帧上漂，
+        阶跃按窗口内最小值跟随
+
+        有负载的点只有在整个窗口内都高出基线时才会被抬高，单批负载帧不会抬高基线。
+        """
+        if matrices.shape[1:] != (self.rows, self.cols) or len(matrices) == 0:
+            return
+
+        if self.baseline is None:
+            # 只用整帧空载的帧建立基线
+            if int(matrices.max()) > self.noise_margin + self.load_margin:
+                return
+            self.baseline = matrices.min(axis=0).astype(np.float32)
+            self._reset_windows()
+        else:
+            self._calls += 1
+            if self._calls % self.update_interval:
+                return
+            baseline = self.baseline
+            batch_min = matrices.min(axis=0).astype(np.float32)
+            np.minimum(baseline, batch_min, out=baseline)
+
+            # 缓慢上漂：只有本批都在噪声容限内的点跟随
+            idle = (matrices.max(axis=0) - baseline) <= self.noise_margin
+            delta = matrices[-1].astype(np.float32)
+            delta -= baseline
+            delta *= idle
+            baseline += self.alpha * delta
+
+            self._track_steps(batch_min)
+
+        offset = np.ceil(self.baseline).astype(np.uint8)
+        self.offset = offset
+        self.threshold = np.minimum(offset.astype(np.int16) + self.noise_margin, 255).astype(np.uint8)
+        self.update_count += 1
+    
+    def _track_steps(self, batch_min):
+        """按窗口内的最小值跟随整体阶跃和单点阶跃（见类说明）"""
+        baseline = self.baseline
+
+        excess = float(np.median(batch_min - baseline))
+        self._step_min = min(self._step_min, excess)
+        self._step_updates += 1
+        if self._step_updates >= self.step_window:
+            if self.noise_margin < self._step_min <= self.load_margin:
+                baseline += self._step_min
+            self._step_min = np.inf
+            self._step_updates = 0
+
+        if self._drift_min is None:
+            self._drift_min = batch_min
+        else:
+            np.minimum(self._drift_min, batch_min, out=self._drift_min)
+        self._drift_updates += 1
+        if self._drift_updates >= self.drift_window:
+            rise = self._drift_min - baseline
+            stepped = (rise > self.noise_margin) & (rise <= self.load_margin)
+            np.copyto(baseline, self._drift_min, where=stepped)
+            self._drift_min = None
+            self._drift_updates = 0
+
+    def subtract(self, matrices, out=None):
+        """
+        饱和扣除基线并去除噪声（uint8，不会下溢）
+        
+        Args:
+            matrices (np.ndarray): (N, rows, cols) uint8帧
+            out (np.ndarray): 输出缓冲区，可与输入相同（原地扣除）
+            
+        Returns:
+            np.ndarray: 扣除基线后的帧
+        """
+        if matrices.shape[1:] != (self.rows, self.cols):
+            return matrices
+        
+        # 基线建立前offset为0，只去除不超过noise_margin的噪声
+        # 不超过 基线+噪声容限 的点置零，其余点扣除基线（此时不会下溢）
+        loaded = np.greater(matrices, self.threshold)
+        cleaned = np.subtract(matrices, self.offset, out=out)
+        cleaned *= loaded
+        return cleaned
+    
+    def get_info(self):
+        """基线状态（日志、调试用）"""
+        if self.baseline is None:
+            return {'initialized': False, 'update_count': 0}
+        return {
+            'initialized': True,
+            'update_count': self.update_count,
+            'mean_offset': float(self.offset.mean()),
+            'max_offset': int(self.offset.max()),
+            'offset_cells': int(np.count_nonzero(self.offset))
+        }
+
+class FramePipeline:
+    """单个设备的实时帧处理流水线
+
+    切换设备时构建一次：阵列布局、JQ/拼接索引表和输出缓冲区都预先确定，
+    每帧只做一次取数、基线扣除、统计和标定，不再查询设备配置或判断阵列大小。
+    输出矩阵在buffer_count个预分配槽位间轮换，结果中的matrix_2d/pressure_matrix
+    在之后第buffer_count次process调用时被覆盖，需要长期保留的数据应自行复制。
+    长度与设备不符的帧交给DataProcessor的通用路径处理。
+    """
+    
+    def __init__(self, processor, rows, cols, enable_jq_transform=True, buffer_count=2):
+        """
+        Args:
+            processor (DataProcessor): 提供基线、标定和通用处理路径的数据处理器
+            rows (int): 行数
+            cols (int): 列数
+            enable_jq_transform (bool): 是否需要JQ变换（单端口设备需要，多端口已在合并时变换）
+            buffer_count (int): 输出缓冲区槽位数
+        """
+        self.processor = processor
+        self.rows = rows
+        self.cols = cols
+        self.frame_length = rows * cols
+        self.enable_jq_transform = enable_jq_transform
+        processor.set_array_size(rows, cols)
+        
+        # 预先确定索引表（None表示原样复制）
+        segments = cols // 32
+        if enable_jq_transform and rows == 32 and cols == 32:
+            self.permutation = JQ_PERMUTATION
+            self.preparation_msg = "Perfect match"
+        elif enable_jq_transform and rows == 32 and cols in (64, 96):
+            order = processor.walkway_segment_order if segments == len(processor.walkway_segment_order) else None
+            self.permutation = jq_stitch_permutation(segments, order).ravel()
+            self.preparation_msg = f"32x{cols} walkway processed ({segments}x1024->JQ->combined)"
+        else:
+            self.permutation = None
+            self.preparation_msg = "Perfect match"
+        self.jq_applied = self.permutation is not None
+        
+        self._matrices = np.zeros((buffer_count, 1, rows, cols), dtype=np.uint8)
+        self._flat = self._matrices.reshape(buffer_count, self.frame_length)
+        self._pressure = np.zeros((buffer_count, 1, rows, cols), dtype=np.float32)
+        self._next_slot = 0
+        
+    def process(self, frame_data_dict, update_baseline=True):
+        """
+        处理一帧（返回格式同DataProcessor.process_frame_data）
+        
+        Args:
+            frame_data_dict: 包含数据、时间戳等信息的帧字典（或帧池引用）
+            update_baseline: 是否用此帧更新零漂基线
+        """
+        processor = self.processor
+        try:
+            data_array = processor._frame_raw_data(frame_data_dict)
+            if len(data_array) != self.frame_length:
+                return processor.process_frame_data(frame_data_dict, self.enable_jq_transform, update_baseline)
+            
+            slot = self._next_slot
+            self._next_slot = (slot + 1) % len(self._matrices)
+            matrices = self._matrices[slot]
+            
+            # 取数（JQ变换/拼接）直接写入预分配槽位；原始数据可能是帧池内存，不原地修改
+            if self.permutation is not None:
+                np.take(data_array, self.permutation, out=self._flat[slot], mode='clip')
+            else:
+                self._flat[slot] = data_array
+            
+            if processor.enable_baseline:
+                if update_baseline:
+                    processor.baseline.update(matrices)
+                processor.baseline.subtract(matrices, out=matrices)
+            
+            statistics = frame_statistics_batch(matrices)
+            calibration = processor.calibration
+            pressure = calibration.apply(matrices, out=self._pressure[slot])
+            pressure_stats = calibration.statistics_batch(pressure, statistics)
+            return processor._build_result(frame_data_dict, matrices[0], statistics[0], self.preparation_msg,
+                                           self.jq_applied, pressure[0], pressure_stats[0])
+            
+        except Exception as e:
+            return {
+                'error': str(e),
+                'original_frame': frame_data_dict
+            }
+    
+    def get_info(self):
+        """流水线配置（日志、调试用）"""
+        return {
+            'rows': self.rows,
+            'cols': self.cols,
+            'frame_length': self.frame_length,
+            'jq_transform': self.jq_applied,
+            'preparation_msg': self.preparation_msg
+        }
 
 class DataProcessor:
     """数据处理器类"""
@@ -16,75 +370,154 @@ class DataProcessor:
         self.total_points = array_rows * array_cols
         # 32x96步道的段顺序，固定为端口1、2的顺序 [0, 1, 2]
         self.walkway_segment_order = [0, 1, 2]  # 对应端口1, 端口2的顺序
+        # 压力标定（原始值 -> 物理单位），默认0-255线性对应0-60mmHg
+        self.calibration = PressureCalibration.linear()
+        # 逐点零漂基线：实时显示路径更新，实时显示和记录路径扣除
+        self.enable_baseline = True
+        self.baseline = CellBaseline(array_rows, array_cols)
+        
+    def set_baseline_enabled(self, enabled):
+        """开启/关闭零漂基线扣除（关闭时同时清除已估计的基线）"""
+        self.enable_baseline = enabled
+        self.baseline.reset()
+        
+    def reset_baseline(self):
+        """重新估计基线（如确认传感器空载后手动清零）"""
+        self.baseline.reset()
+        
+    def create_pipeline(self, rows, cols, enable_jq_transform=True):
+        """为设备构建实时帧处理流水线（同时把阵列大小设为该设备的大小）"""
+        return FramePipeline(self, rows, cols, enable_jq_transform)
+        
+    def set_calibration(self, calibration):
+        """设置压力标定，None表示恢复默认线性换算"""
+        self.calibration = calibration or PressureCalibration.linear()
         
     def set_array_size(self, rows, cols):
         """设置阵列大小"""
         self.array_rows = rows
         self.array_cols = cols
         self.total_points = rows * cols
+        if (rows, cols) != (self.baseline.rows, self.baseline.cols):
+            self.baseline = CellBaseline(rows, cols, self.baseline.alpha, self.baseline.noise_margin,
+                                         self.baseline.load_margin, self.baseline.update_interval,
+                                         self.baseline.step_window, self.baseline.drift_window)
     
         
-    def prepare_data(self, raw_data):
-        """准备数据 - 快速调整数据长度以匹配阵列大小"""
+    def _to_uint8_array(self, raw_data):
+        """统一数据类型：bytes/bytearray/list/ndarray -> 一维uint8数组"""
         try:
-            # 统一数据类型处理
             if isinstance(raw_data, (list, bytearray)):
-                data_array = np.frombuffer(bytes(raw_data), dtype=np.uint8)
+                return np.frombuffer(bytes(raw_data), dtype=np.uint8)
             elif isinstance(raw_data, bytes):
-                data_array = np.frombuffer(raw_data, dtype=np.uint8)
+                return np.frombuffer(raw_data, dtype=np.uint8)
             elif isinstance(raw_data, str):
                 # 字符串类型，可能是错误传入
                 raise ValueError(f"不能处理字符串类型的数据: {raw_data[:50]}...")
             else:
-                data_array = np.asarray(raw_data, dtype=np.uint8)
+                return np.asarray(raw_data, dtype=np.uint8).ravel()
         except Exception as e:
             raise ValueError(f"数据类型转换失败: {e}, 数据类型: {type(raw_data)}")
+    
+    def prepare_data(self, raw_data):
+        """准备数据 - 快速调整数据长度以匹配阵列大小"""
+        data_array = self._to_uint8_array(raw_data)
+        prepared, prep_msg = self._prepare_batch(data_array[np.newaxis])
+        return prepared[0], prep_msg
+    
+    def _prepare_batch(self, frames):
+        """(N, L) -> (N, total_points)：长度不足时循环填充（同np.resize），过长时截断"""
+        data_len = frames.shape[1]
         
-        data_len = len(data_array)
-        
-        # 其他阵列大小的正常处理
         if data_len < self.total_points:
-            # 使用numpy的resize，更高效
-            result = np.resize(data_array, self.total_points)
+            if data_len == 0:
+                result = np.zeros((len(frames), self.total_points), dtype=frames.dtype)
+            else:
+                result = np.take(frames, np.arange(self.total_points) % data_len, axis=1)
             return result, f"Padded ({data_len}->{self.total_points})"
             
         elif data_len > self.total_points:
             # 直接切片，避免复制
-            result = data_array[:self.total_points]
-            return result, f"Trimmed ({data_len}->{self.total_points})"
+            return frames[:, :self.total_points], f"Trimmed ({data_len}->{self.total_points})"
             
-        return data_array, "Perfect match"
+        return frames, "Perfect match"
     
-    def jqbed_transform(self, data_array):
+    def jqbed_transform(self, data_array, out=None):
         """
-        JQ公司的数据变换算法 - 优化版本
-        基于提供的JavaScript伪代码实现
+        JQ公司的数据变换算法 - 预计算索引表版本
+        基于提供的JavaScript伪代码实现，变换是固定的行置换，
+        用一次np.take按JQ_PERMUTATION取数
+        
+        Args:
+            data_array (np.ndarray): 1024点原始数据
+            out (np.ndarray): 预分配的输出缓冲区（1024点，与输入同类型），None时新建
+            
+        Returns:
+            np.ndarray: 变换后的一维数组（传入out时即为out）
         """
         if len(data_array) != 1024:  # 32x32 = 1024
             raise ValueError("Data length must be 1024 (32x32)")
+        
+        return np.take(data_array, JQ_PERMUTATION, out=out)
+    
+    def jqbed_transform_batch(self, frames, out=None):
+        """
+        批量JQ变换（回放、离线转换使用）
+        
+        Args:
+            frames (np.ndarray): (N, 1024) 原始数据
+            out (np.ndarray): 预分配的 (N, 1024) 输出缓冲区，None时新建
             
-        # 使用视图而不是复制，提高性能
-        ws_point_data = data_array.copy()  # 只复制一次
-        ws_2d = ws_point_data.reshape(32, 32)
+        Returns:
+            np.ndarray: (N, 1024) 变换后的数据
+        """
+        frames = np.asarray(frames)
+        if frames.ndim != 2 or frames.shape[1] != 1024:
+            raise ValueError(f"Batch shape must be (N, 1024), got {frames.shape}")
         
-        # 第一步：1-15行调换 (使用numpy数组操作，更快)
-        # 前8行分别与对应的后面行交换
-        for i in range(8):
-            mirror_row = 14 - i
-            # 使用numpy的数组交换，比逐个元素交换快得多
-            ws_2d[[i, mirror_row]] = ws_2d[[mirror_row, i]]
+        return np.take(frames, JQ_PERMUTATION, axis=1, out=out)
+    
+    def jq_stitch(self, raw_data, segments, out=None):
+        """
+        多段原始数据一次取数完成JQ变换和左右拼接
         
-        # 第二步：将前15行移到后面 (1-15)(16-32) => (16-32)(1-15)
-        # 使用numpy切片操作，避免创建中间副本
-        result_2d = np.vstack([ws_2d[15:], ws_2d[:15]])
+        Args:
+            raw_data (np.ndarray): 各段原始数据依次排列（segments*1024点）
+            segments (int): 段数
+            out (np.ndarray): 预分配的 (32, 32*segments) 输出，None时新建
+            
+        Returns:
+            np.ndarray: (32, 32*segments) 拼接后的矩阵
+        """
+        order = self.walkway_segment_order if segments == len(self.walkway_segment_order) else None
+        # 索引表预先生成，不会越界，mode='clip'避免输出缓冲
+        return np.take(raw_data, jq_stitch_permutation(segments, order), out=out, mode='clip')
+    
+    def jq_stitch_segments(self, segment_list, out):
+        """
+        各端口分开存放的1024字节帧直接写入拼接矩阵的对应列（每段一次取数）
         
-        # 重新展平为1D数组
-        return result_2d.ravel()
+        Args:
+            segment_list (list): 按拼接位置排列的各段原始数据（bytes或uint8数组）
+            out (np.ndarray): (32, 32*N) 输出矩阵（如帧池槽位视图）
+            
+        Returns:
+            np.ndarray: out
+        """
+        perm = jq_stitch_permutation(len(segment_list))
+        for position, segment in enumerate(segment_list):
+            segment = np.frombuffer(segment, dtype=np.uint8)
+            if len(segment) != 1024:
+                raise ValueError(f"设备帧长度必须为1024字节，实际{len(segment)}字节")
+            columns = slice(position * 32, (position + 1) * 32)
+            np.take(segment, perm[:, columns] - position * 1024, out=out[:, columns], mode='clip')
+        return out
     
-    def process_walkway_data(self, raw_data):
+    def process_walkway_data(self, raw_data, segments=3):
         """
-        处理32x96步道数据：3个1024字节帧，每个先进行JQ变换，然后合并
+        处理多段步道数据：segments个1024字节帧各自JQ变换后左右合并（32x64/32x96）
         """
+        expected_length = segments * 1024
         try:
             # 确保数据是numpy数组
             if isinstance(raw_data, (bytes, bytearray)):
@@ -94,30 +527,13 @@ class DataProcessor:
             
             data_len = len(data_array)
             
-            if data_len < 3072:
-                raise ValueError(f"步道数据长度不足，期望3072字节，实际{data_len}字节")
-            
-            # 分割成3个1024字节的段
-            segment1 = data_array[:1024]
-            segment2 = data_array[1024:2048]
-            segment3 = data_array[2048:3072]
+            if data_len < expected_length:
+                raise ValueError(f"步道数据长度不足，期望{expected_length}字节，实际{data_len}字节")
             
-            # 对每个段进行JQ变换
-            transformed_seg1 = self.jqbed_transform(segment1)
-            transformed_seg2 = self.jqbed_transform(segment2) 
-            transformed_seg3 = self.jqbed_transform(segment3)
+            # 按端口1、2...的固定顺序，一次取数完成JQ变换和合并
+            combined_matrix = self.jq_stitch(data_array[:expected_length], segments)
             
-            # 将每个变换后的1024字节段重塑为32x32
-            matrix1 = transformed_seg1.reshape(32, 32)
-            matrix2 = transformed_seg2.reshape(32, 32)
-            matrix3 = transformed_seg3.reshape(32, 32)
-            
-            # 按照端口1、2的固定顺序合并成32x96
-            matrices = [matrix1, matrix2, matrix3]
-            ordered_matrices = [matrices[i] for i in self.walkway_segment_order]
-            combined_matrix = np.hstack(ordered_matrices)
-            
-            return combined_matrix.ravel(), f"32x96 walkway processed (3x1024->JQ->combined)"
+            return combined_matrix.ravel(), f"32x{segments * 32} walkway processed ({segments}x1024->JQ->combined)"
             
         except Exception as e:
             # 降级处理：直接使用原始数据
@@ -127,74 +543,165 @@ class DataProcessor:
                 else:
                     fallback_array = np.asarray(raw_data, dtype=np.uint8)
                 
-                if len(fallback_array) >= 3072:
-                    return fallback_array[:3072], f"32x96 fallback (no JQ transform)"
+                if len(fallback_array) >= expected_length:
+                    return fallback_array[:expected_length], f"32x{segments * 32} fallback (no JQ transform)"
                 else:
-                    # 数据不足，填充到3072
-                    padded = np.resize(fallback_array, 3072)
-                    return padded, f"32x96 padded fallback ({len(fallback_array)}->3072)"
+                    # 数据不足，填充
+                    padded = np.resize(fallback_array, expected_length)
+                    return padded, f"32x{segments * 32} padded fallback ({len(fallback_array)}->{expected_length})"
                     
             except Exception as e2:
                 # 最后的降级：返回零数组
-                return np.zeros(3072, dtype=np.uint8), f"32x96 zeros fallback"
+                return np.zeros(expected_length, dtype=np.uint8), f"32x{segments * 32} zeros fallback"
+    
+    def _as_frame_batch(self, batch, frame_length=None):
+        """连续缓冲区或二维数组 -> (N, L) uint8数组"""
+        if isinstance(batch, np.ndarray) and batch.ndim == 2:
+            return batch if batch.dtype == np.uint8 else batch.astype(np.uint8)
+        
+        data_array = self._to_uint8_array(batch)
+        frame_length = frame_length or self.total_points
+        if len(data_array) % frame_length:
+            raise ValueError(f"缓冲区长度{len(data_array)}不是帧长度{frame_length}的整数倍")
+        return data_array.reshape(-1, frame_length)
+    
+    def _process_batch(self, frames, enable_jq_transform, subtract_baseline=False, update_baseline=False):
+        """
+        批量处理 (N, L) 原始帧
+        
+        Args:
+            frames (np.ndarray): (N, L) uint8原始帧
+            enable_jq_transform (bool): 是否启用JQ变换
+            subtract_baseline (bool): 是否扣除逐点零漂基线
+            update_baseline (bool): 是否先用本批帧更新基线（仅实时显示路径）
+            
+        Returns:
+            tuple: (matrices, statistics, preparation_msg, jq_applied)
+        """
+        segments = self.array_cols // 32
+        walkway = self.array_rows == 32 and self.array_cols in (64, 96)
+        
+        # 单端口32x64/32x96步道原始数据：一次取数完成JQ变换和拼接
+        # （多端口数据已在合并时完成JQ变换和拼接，不再变换）
+        if enable_jq_transform and walkway and frames.shape[1] >= self.total_points:
+            order = self.walkway_segment_order if segments == len(self.walkway_segment_order) else None
+            transformed = np.take(frames[:, :self.total_points],
+                                  jq_stitch_permutation(segments, order).ravel(), axis=1, mode='clip')
+            prep_msg = f"32x{self.array_cols} walkway processed ({segments}x1024->JQ->combined)"
+            jq_applied = True
+        else:
+            # 1. 准备数据
+            transformed, prep_msg = self._prepare_batch(frames)
+            
+            # 2. 应用JQ变换（仅对32x32数据且用户启用时）
+            if enable_jq_transform and self.array_rows == 32 and self.array_cols == 32:
+                transformed = self.jqbed_transform_batch(transformed)
+                jq_applied = True
+            elif enable_jq_transform and walkway:
+                # 步道数据长度不足：降级为不做JQ变换
+                prep_msg = f"32x{self.array_cols} padded fallback ({frames.shape[1]}->{self.total_points})"
+                jq_applied = False
+            else:
+                jq_applied = False
+        
+        # 3. 重塑为 (N, rows, cols)
+        matrices = transformed.reshape(-1, self.array_rows, self.array_cols)
+        
+        # 4. 零漂基线：JQ取数得到的新数组上原地扣除，未变换时输入可能是帧池内存，另行输出
+        if self.enable_baseline and (subtract_baseline or update_baseline):
+            if update_baseline:
+                self.baseline.update(matrices)
+            if subtract_baseline:
+                matrices = self.baseline.subtract(matrices, out=matrices if jq_applied else None)
+        
+        # 5. 一次计算全部统计
+        statistics = frame_statistics_batch(matrices)
+        return matrices, statistics, prep_msg, jq_applied
     
-    def process_frame_data(self, frame_data_dict, enable_jq_transform=True):
+    def process_frames(self, batch, enable_jq_transform=True, frame_length=None, subtract_baseline=False):
         """
-        处理完整的帧数据
+        批量处理帧数据（CSV导入、回放、记录写入等离线路径）
+        
+        Args:
+            batch: (N, L) uint8数组，或N帧首尾相连的连续缓冲区（bytes/bytearray/一维数组）
+            enable_jq_transform: 是否启用JQ变换
+            frame_length: 连续缓冲区中每帧的字节数，默认为阵列点数
+            subtract_baseline: 是否扣除当前的零漂基线（离线数据通常已扣除，默认否）
+            
+        Returns:
+            tuple: (matrices, statistics)
+                matrices为 (N, rows, cols) 矩阵，statistics为FRAME_STATS_DTYPE结构数组
+        """
+        frames = self._as_frame_batch(batch, frame_length)
+        matrices, statistics, _, _ = self._process_batch(frames, enable_jq_transform, subtract_baseline)
+        return matrices, statistics
+    
+    def calibrate_batch(self, matrices, statistics=None):
+        """
+        批量压力标定：一次查找表取数得到物理压力矩阵，并计算物理压力统计
+        
+        Args:
+            matrices (np.ndarray): (N, rows, cols) 原始值矩阵（process_frames的输出）
+            statistics (np.ndarray): 同一批的FRAME_STATS_DTYPE统计（可选，用于省去最大/最小归约）
+            
+        Returns:
+            tuple: (pressure, pressure_statistics)
+                pressure为 (N, rows, cols) float32矩阵，pressure_statistics为PRESSURE_STATS_DTYPE结构数组
+        """
+        pressure = self.calibration.apply(matrices)
+        return pressure, self.calibration.statistics_batch(pressure, statistics)
+    
+    def _build_result(self, frame_data_dict, matrix_2d, stats, prep_msg, jq_applied,
+                      pressure_matrix, pressure_stats):
+        """单帧处理结果字典（原有process_frame_data的返回格式，附加物理压力）"""
+        statistics = self.statistics_to_dict(stats, matrix_2d.size)
+        statistics.update(self.calibration.statistics_to_dict(pressure_stats))
+        return {
+            'original_frame': frame_data_dict,
+            'matrix_2d': matrix_2d,
+            'transformed_data': matrix_2d.ravel(),
+            'pressure_matrix': pressure_matrix,
+            'pressure_unit': self.calibration.unit,
+            'preparation_msg': prep_msg,
+            'statistics': statistics,
+            'capture_timestamp': frame_data_dict.get('timestamp'),  # 采集时间戳（perf_counter_ns）
+            'processing_timestamp': time.perf_counter_ns(),
+            'array_size': f"{self.array_rows}x{self.array_cols}",
+            'jq_transform_applied': jq_applied
+        }
+    
+    def _frame_raw_data(self, frame_data_dict):
+        """取出帧字典中的原始数据并做类型检查"""
+        raw_data = frame_data_dict['data']
+        
+        # 数据类型检查和转换
+        if isinstance(raw_data, str):
+            # 如果是字符串，转换为字节
+            raw_data = raw_data.encode('latin-1')
+        elif not isinstance(raw_data, (bytes, bytearray, list, np.ndarray)):
+            # 如果不是预期的数据类型，尝试转换
+            raise ValueError(f"不支持的数据类型: {type(raw_data)}, 应为 bytes/bytearray/list/ndarray")
+        return self._to_uint8_array(raw_data)
+    
+    def process_frame_data(self, frame_data_dict, enable_jq_transform=True, update_baseline=True):
+        """
+        处理完整的帧数据（process_frames的单帧封装，实时显示路径）
         
         Args:
             frame_data_dict: 包含数据、时间戳等信息的字典
             enable_jq_transform: 是否启用JQ变换
+            update_baseline: 是否用此帧更新零漂基线（基线总会被扣除）
             
         Returns:
             dict: 处理后的数据字典
         """
         try:
-            raw_data = frame_data_dict['data']
-            
-            # 数据类型检查和转换
-            if isinstance(raw_data, str):
-                # 如果是字符串，转换为字节
-                raw_data = raw_data.encode('latin-1')
-            elif not isinstance(raw_data, (bytes, bytearray, list, np.ndarray)):
-                # 如果不是预期的数据类型，尝试转换
-                raise ValueError(f"不支持的数据类型: {type(raw_data)}, 应为 bytes/bytearray/list/ndarray")
-            
-            # 特殊处理32x96步道数据
-            if self.array_rows == 32 and self.array_cols == 96:
-                transformed_data, prep_msg = self.process_walkway_data(raw_data)
-                jq_applied = True  # 步道数据已经进行了JQ变换
-            else:
-                # 1. 准备数据
-                prepared_data, prep_msg = self.prepare_data(raw_data)
-                
-                # 2. 应用JQ变换（仅对32x32数据且用户启用时）
-                if enable_jq_transform and self.array_rows == 32 and self.array_cols == 32:
-                    transformed_data = self.jqbed_transform(prepared_data)
-                    jq_applied = True
-                else:
-                    transformed_data = prepared_data
-                    jq_applied = False
-            
-            # 3. 重塑为2D数组
-            matrix_2d = transformed_data.reshape(self.array_rows, self.array_cols)
-            
-            # 4. 计算统计信息
-            stats = self.calculate_statistics(matrix_2d)
-            
-            # 5. 返回处理结果
-            result = {
-                'original_frame': frame_data_dict,
-                'matrix_2d': matrix_2d,
-                'transformed_data': transformed_data,
-                'preparation_msg': prep_msg,
-                'statistics': stats,
-                'processing_timestamp': datetime.now().strftime("%H:%M:%S.%f")[:-3],
-                'array_size': f"{self.array_rows}x{self.array_cols}",
-                'jq_transform_applied': jq_applied
-            }
-            
-            return result
+            data_array = self._frame_raw_data(frame_data_dict)
+            matrices, statistics, prep_msg, jq_applied = self._process_batch(
+                data_array[np.newaxis], enable_jq_transform, True, update_baseline)
+            pressure, pressure_stats = self.calibrate_batch(matrices, statistics)
+            return self._build_result(frame_data_dict, matrices[0], statistics[0], prep_msg, jq_applied,
+                                      pressure[0], pressure_stats[0])
             
         except Exception as e:
             return {
@@ -202,17 +709,56 @@ class DataProcessor:
                 'original_frame': frame_data_dict
             }
     
+    def process_frame_list(self, frame_data_list, enable_jq_transform=True, subtract_baseline=True):
+        """
+        批量处理多个帧字典，相同长度的帧合并为一次process_frames
+        
+        记录路径使用：扣除实时显示路径估计的零漂基线，但不更新基线。
+        
+        Returns:
+            list: 与输入顺序一致的处理结果字典（格式同process_frame_data）
+        """
+        results = [None] * len(frame_data_list)
+        groups = {}
+        for index, frame_data_dict in enumerate(frame_data_list):
+            try:
+                data_array = self._frame_raw_data(frame_data_dict)
+                groups.setdefault(len(data_array), []).append((index, data_array))
+            except Exception as e:
+                results[index] = {'error': str(e), 'original_frame': frame_data_dict}
+        
+        for entries in groups.values():
+            frames = np.stack([data_array for _, data_array in entries])
+            matrices, statistics, prep_msg, jq_applied = self._process_batch(
+                frames, enable_jq_transform, subtract_baseline)
+            pressure, pressure_stats = self.calibrate_batch(matrices, statistics)
+            for (index, _), matrix_2d, stats, pressure_matrix, pressure_row in zip(
+                    entries, matrices, statistics, pressure, pressure_stats):
+                results[index] = self._build_result(frame_data_list[index], matrix_2d, stats, prep_msg, jq_applied,
+                                                    pressure_matrix, pressure_row)
+        return results
+    
     def calculate_statistics(self, matrix_2d):
-        """计算统计信息"""
+        """计算统计信息（单次融合计算，见frame_statistics）"""
+        return self.statistics_to_dict(frame_statistics(matrix_2d), matrix_2d.size)
+    
+    @staticmethod
+    def statistics_to_dict(stats, total_points):
+        """把一条FRAME_STATS_DTYPE统计记录转换为原有的统计字典"""
+        mean_value = stats['sum'] / total_points
+        variance = max(stats['sumsq'] / total_points - mean_value * mean_value, 0.0)
+        nonzero_count = int(stats['nonzero'])
         return {
-            'max_value': int(np.max(matrix_2d)),
-            'min_value': int(np.min(matrix_2d)),
-            'mean_value': float(np.mean(matrix_2d)),
-            'std_value': float(np.std(matrix_2d)),
-            'sum_value': int(np.sum(matrix_2d)),
-            'nonzero_count': int(np.count_nonzero(matrix_2d)),
-            'contact_area': int(np.count_nonzero(matrix_2d)),  # 接触面积等于非零点数
-            'total_points': int(matrix_2d.size)
+            'max_value': int(stats['max']),
+            'min_value': int(stats['min']),
+            'mean_value': float(mean_value),
+            'std_value': float(np.sqrt(variance)),
+            'sum_value': int(stats['sum']),
+            'nonzero_count': nonzero_count,
+            'contact_area': nonzero_count,  # 接触面积等于非零点数
+            'total_points': int(total_points),
+            'cop_x': float(stats['cop_x']),
+            'cop_y': float(stats['cop_y'])
         }
     
     def get_array_info(self):
@@ -220,5 +766,68 @@ class DataProcessor:
         return {
             'rows': self.array_rows,
             'cols': self.array_cols,
-            'total_points': self.total_points
-        } 
\ No newline at end of file
+            'total_points': self.total_points,
+            'pressure_unit': self.calibration.unit
+        } 
+
+
+def test_cell_baseline():
+    """零漂基线检查：整体阶跃、单点阶跃跟随，开机已有负载和短时轻负载不被吸收"""
+    print("🧪 测试零漂基线...")
+    rows, cols = 32, 32
+
+    def run(baseline, frame, count):
+        frame = frame.astype(np.uint8)[np.newaxis]
+        cleaned = None
+        for _ in range(count):
+            baseline.update(frame)
+            cleaned = baseline.subtract(frame.copy())
+        return cleaned[0]
+
+    idle = np.full((rows, cols), 3)
+
+    # 整体阶跃 3→6：400帧内全部归零
+    baseline = CellBaseline(rows, cols)
+    run(baseline, idle, 200)
+    cleaned = run(baseline, idle + 3, 400)
+    assert np.count_nonzero(cleaned) == 0, f"整体阶跃未跟随: {np.count_nonzero(cleaned)}个非零点"
+
+    # 单点阶跃 3→9（其余点空载）：4000帧内归零
+    baseline = CellBaseline(rows, cols)
+    run(baseline, idle, 200)
+    drifted = idle.copy()
+    drifted[5, 5] = 9
+    cleaned = run(baseline, drifted, 4000)
+    assert cleaned[5, 5] == 0 and baseline.baseline[5, 5] > 8, f"单点阶跃未跟随: 基线{baseline.baseline[5, 5]:.1f}"
+
+    # 单点缓慢漂移 3→9，同时另一区域有负载：逐点跟随，负载保留
+    baseline = CellBaseline(rows, cols)
+    run(baseline, idle, 200)
+    frame = idle.copy()
+    frame[20:30, 20:30] = 120
+    for step in range(6):
+        frame[5, 5] = 4 + step
+        cleaned = run(baseline, frame, 300)
+    assert cleaned[5, 5] == 0, f"缓慢漂移未跟随: 基线{baseline.baseline[5, 5]:.1f}"
+    assert np.count_nonzero(cleaned) == 100, f"负载被吸收: {np.count_nonzero(cleaned)}"
+
+    # 开机即有负载：不以负载帧建立基线
+    baseline = CellBaseline(rows, cols)
+    loaded = idle.copy()
+    loaded[:10, :20] = 120
+    cleaned = run(baseline, loaded, 200)
+    assert baseline.baseline is None and np.all(cleaned[:10, :20] == 120), "开机负载被当作基线"
+
+    # 短时静止的轻负载（高出7）保持可见
+    baseline = CellBaseline(rows, cols)
+    run(baseline, idle, 200)
+    light = idle.copy()
+    light[10:14, 10:14] = 10
+    cleaned = run(baseline, light, 600)
+    assert np.count_nonzero(cleaned) == 16, f"轻负载被吸收: {np.count_nonzero(cleaned)}"
+
+    print("✅ 零漂基线检查通过")
+
+
+if __name__ == "__main__":
+    test_cell_baseline()
@@ -12,9 +12,52 @@ from datetime import datetime
 
 # 帧头定义
 FRAME_HEADER = [0xAA, 0x55, 0x03, 0x99]
+FRAME_HEADER_BYTES = bytes(FRAME_HEADER)
+FRAME_HEADER_SIZE = len(FRAME_HEADER_BYTES)
+# 每个设备帧的固定负载长度（32x32）
+FRAME_PAYLOAD_SIZE = 1024
 # 固定终止符
 FRAME_TERMINATOR = [0xFF, 0xFF]
 
+# 采集时钟锚点：采集时间戳使用单调的perf_counter_ns，输出时再换算为墙上时间
+_WALL_ANCHOR_NS = time.time_ns()
+_PERF_ANCHOR_NS = time.perf_counter_ns()
+
+def capture_timestamp_ns():
+    """
+    获取采集时间戳（单调、纳秒整数），在接收线程中调用
+    
+    Returns:
+        int: perf_counter_ns时间戳
+    """
+    return time.perf_counter_ns()
+
+def capture_to_datetime(capture_ns):
+    """
+    把采集时间戳换算为本地datetime
+    
+    Args:
+        capture_ns (int): capture_timestamp_ns返回的时间戳
+        
+    Returns:
+        datetime: 对应的本地时间
+    """
+    wall_ns = _WALL_ANCHOR_NS + (capture_ns - _PERF_ANCHOR_NS)
+    return datetime.fromtimestamp(wall_ns / 1e9)
+
+def format_capture_time(capture_ns, fmt="%H:%M:%S.%f"):
+    """
+    格式化采集时间戳（只在输出时调用），精确到毫秒
+    
+    Args:
+        capture_ns (int): capture_timestamp_ns返回的时间戳
+        fmt (str): strftime格式，需以%f结尾
+        
+    Returns:
+        str: 格式化后的时间字符串
+    """
+    return capture_to_datetime(capture_ns).strftime(fmt)[:-3]
+
 def find_available_ports():
     """
     查找所有可用的COM端口
@@ -92,23 +135,39 @@ def auto_find_working_port():
     print("❌ 未找到可用的端口")
     return None
 
-def find_frame_start(data_buffer):
+def find_frame_start(data_buffer, start=0):
     """
     在数据缓冲区中查找帧头
     
+    使用bytes.find（底层memchr/快速搜索）代替逐字节Python循环
+    
     Args:
-        data_buffer (bytearray): 数据缓冲区
+        data_buffer (bytes-like): 数据缓冲区
+        start (int): 开始查找的位置
         
     Returns:
         int: 帧头位置，如果未找到返回-1
     """
-    for i in range(len(data_buffer) - 3):
-        if (data_buffer[i] == FRAME_HEADER[0] and 
-            data_buffer[i+1] == FRAME_HEADER[1] and 
-            data_buffer[i+2] == FRAME_HEADER[2] and 
-            data_buffer[i+3] == FRAME_HEADER[3]):
-            return i
-    return -1
+    return data_buffer.find(FRAME_HEADER_BYTES, start)
+
+def find_all_frame_starts(data_buffer, start=0):
+    """
+    一次扫描找出缓冲区中所有帧头位置
+    
+    Args:
+        data_buffer (bytes-like): 数据缓冲区
+        start (int): 开始查找的位置
+        
+    Returns:
+        list: 所有帧头位置（升序），未找到返回空列表
+    """
+    positions = []
+    find = data_buffer.find
+    pos = find(FRAME_HEADER_BYTES, start)
+    while pos != -1:
+        positions.append(pos)
+        pos = find(FRAME_HEADER_BYTES, pos + FRAME_HEADER_SIZE)
+    return positions
 
 def extract_frame_content(data_buffer, start_pos):
     """
@@ -121,18 +180,17 @@ def extract_frame_content(data_buffer, start_pos):
     Returns:
         tuple: (帧内容, 下一个帧头位置)
     """
-    content_start = start_pos + 4  # 跳过帧头
+    content_start = start_pos + FRAME_HEADER_SIZE  # 跳过帧头
     
-    # 查找下一个帧头
-    next_frame_pos = find_frame_start(data_buffer[content_start:])
+    # 从帧内容起点直接查找下一个帧头，避免先切片复制
+    next_frame_pos = find_frame_start(data_buffer, content_start)
     
     if next_frame_pos == -1:
         # 没有找到下一个帧头，返回剩余所有数据
         return data_buffer[content_start:], -1
     else:
         # 找到下一个帧头，返回两个帧头之间的数据
-        actual_next_pos = content_start + next_frame_pos
-        return data_buffer[content_start:actual_next_pos], actual_next_pos
+        return data_buffer[content_start:next_frame_pos], next_frame_pos
 
 def format_hex_output(data):
     """
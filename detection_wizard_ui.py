@@ -12,6 +12,7 @@ import time
 import os
 from datetime import datetime
 from sarcopenia_database import db
+from date import capture_timestamp_ns, format_capture_time
 
 class DetectionWizardDialog:
     """检测向导对话框 - 翻页式6步检测"""
@@ -482,8 +483,10 @@ class DetectionWizardDialog:
             self.is_running = False
             end_time = datetime.now()
             
-            # 停止数据记录
+            # 停止数据记录：主界面立即关闭记录通道并写完通道中剩余的帧
             self._recording_data = False
+            if self.main_ui and hasattr(self.main_ui, '_sync_recording_lane'):
+                self.main_ui._sync_recording_lane()
             
             # 更新数据库
             session_steps = db.get_session_steps(self.session_info['id'])
@@ -664,8 +667,17 @@ class DetectionWizardDialog:
                 # 写入CSV头：time,max,timestamp,area,press,data
                 writer.writerow(['time', 'max', 'timestamp', 'area', 'press', 'data'])
             
-            # 初始化CSV相关变量
+            # CSV保持传感器原始值，旁边记录当前设备的压力标定，便于换算为物理单位
+            data_processor = getattr(self.main_ui, 'data_processor', None)
+            if data_processor is not None:
+                try:
+                    data_processor.calibration.save_sidecar(self.current_data_file)
+                except Exception as e:
+                    print(f"[WARNING] 写入标定说明文件失败: {e}")
+            
+            # 初始化CSV相关变量（采集时间戳起点用于计算每帧的经过时间）
             self._csv_start_time = datetime.now()
+            self._csv_start_ns = capture_timestamp_ns()
             
         except Exception as e:
             print(f"[ERROR] 创建数据文件失败: {e}")
@@ -673,11 +685,26 @@ class DetectionWizardDialog:
     
     def write_csv_data_row(self, processed_data):
         """写入CSV数据行"""
+        self.write_csv_data_rows([processed_data])
+    
+    def write_csv_data_rows(self, processed_list, data_file=None):
+        """
+        批量写入CSV数据行（记录通道的每一帧），只打开一次文件
+        
+        Args:
+            processed_list (list): 处理结果列表
+            data_file (str): 目标数据文件（开始记录时绑定，可在处理线程中调用，
+                             结束记录后写入剩余帧时仍写入原文件）；None表示当前记录中的文件
+        """
         try:
-            # 只有在记录状态且有数据文件时才写入
-            if not getattr(self, '_recording_data', False):
+            if not processed_list:
                 return
-            if not hasattr(self, 'current_data_file') or not self.current_data_file:
+            if data_file is None:
+                # 未绑定文件：只有在记录状态时写入当前数据文件
+                if not getattr(self, '_recording_data', False):
+                    return
+                data_file = getattr(self, 'current_data_file', None)
+            if not data_file:
                 return
             
             # 检查当前设备是否匹配当前步骤所需的设备
@@ -687,59 +714,51 @@ class DetectionWizardDialog:
                 return
             
             import csv
-            import time
-            
-            # 计算经过时间
-            if hasattr(self, '_csv_start_time'):
-                elapsed_time = (datetime.now() - self._csv_start_time).total_seconds()
-            else:
-                elapsed_time = 0
-            
-            # 提取数据
-            stats = processed_data['statistics']
-            matrix_data = processed_data['matrix_2d']
-            frame_info = processed_data['original_frame']
-            
-            max_value = stats['max_value']
-            # 格式化timestamp为 2025/6/17 14:43:28:219 格式
-            if 'timestamp' in frame_info and frame_info['timestamp']:
-                # 如果是datetime对象
-                if hasattr(frame_info['timestamp'], 'strftime'):
-                    timestamp = frame_info['timestamp'].strftime("%Y/%m/%d %H:%M:%S:%f")[:-3]
-                else:
-                    # 如果是字符串，尝试解析然后重新格式化
-                    try:
-                        if isinstance(frame_info['timestamp'], str):
-                            # 尝试解析现有的时间戳格式
-                            dt = datetime.strptime(frame_info['timestamp'], "%H:%M:%S.%f")
-                            # 添加当前日期
-                            dt = dt.replace(year=datetime.now().year, month=datetime.now().month, day=datetime.now().day)
-                            timestamp = dt.strftime("%Y/%m/%d %H:%M:%S:%f")[:-3]
-                        else:
-                            timestamp = str(frame_info['timestamp'])
-                    except:
-                        timestamp = datetime.now().strftime("%Y/%m/%d %H:%M:%S:%f")[:-3]
-            else:
-                # 使用当前时间
-                timestamp = datetime.now().strftime("%Y/%m/%d %H:%M:%S:%f")[:-3]
             
-            area = stats.get('contact_area', 0)
-            press = stats['sum_value']
-            
-            # 将2D矩阵转换为1D数组字符串，去掉空格
-            data_array = matrix_data.flatten().tolist()
-            data_str = str(data_array).replace(' ', '')
+            rows = [self._build_csv_row(processed_data) for processed_data in processed_list]
             
             # 写入CSV行
-            with open(self.current_data_file, 'a', newline='', encoding='utf-8') as f:
+            with open(data_file, 'a', newline='', encoding='utf-8') as f:
                 writer = csv.writer(f)
-                writer.writerow([elapsed_time, max_value, timestamp, area, press, data_str])
+                writer.writerows(rows)
                 
         except Exception as e:
             print(f"[ERROR] 写入CSV数据失败: {e}")
             import traceback
             traceback.print_exc()
     
+    def _build_csv_row(self, processed_data):
+        """把一帧处理结果转换为CSV行：time,max,timestamp,area,press,data"""
+        # 提取数据
+        stats = processed_data['statistics']
+        matrix_data = processed_data['matrix_2d']
+        frame_info = processed_data['original_frame']
+        
+        max_value = stats['max_value']
+        capture_ns = frame_info.get('timestamp')
+        
+        if isinstance(capture_ns, int) and hasattr(self, '_csv_start_ns'):
+            # 采集时间戳（perf_counter_ns）：经过时间按帧精确计算，只在此处格式化
+            elapsed_time = (capture_ns - self._csv_start_ns) / 1e9
+            # 格式化timestamp为 2025/6/17 14:43:28:219 格式
+            timestamp = format_capture_time(capture_ns, "%Y/%m/%d %H:%M:%S:%f")
+        else:
+            # 兼容没有采集时间戳的帧：使用写入时刻
+            if hasattr(self, '_csv_start_time'):
+                elapsed_time = (datetime.now() - self._csv_start_time).total_seconds()
+            else:
+                elapsed_time = 0
+            timestamp = datetime.now().strftime("%Y/%m/%d %H:%M:%S:%f")[:-3]
+        
+        area = stats.get('contact_area', 0)
+        press = stats['sum_value']
+        
+        # 将2D矩阵转换为1D数组字符串，去掉空格
+        data_array = matrix_data.flatten().tolist()
+        data_str = str(data_array).replace(' ', '')
+        
+        return [elapsed_time, max_value, timestamp, area, press, data_str]
+    
     def start_timer(self):
         """启动计时器"""
         def timer_thread():
@@ -13,6 +13,7 @@ import sqlite3
 import os
 from datetime import datetime
 from serial_interface import SerialInterface
+from shared_ingest import create_serial_interface
 from window_manager import WindowManager, WindowLevel, setup_management_window
 
 class DeviceConfigDialog:
@@ -1050,10 +1051,17 @@ class DeviceConfigDialog:
 class DeviceManager:
     """设备管理器"""
     
-    def __init__(self):
+    def __init__(self, data_processor=None, ingest_backend="thread", frame_terminator=False):
         self.devices = {}
         self.current_device = None
         self.serial_interfaces = {}
+        # 串口接收后端：thread=本进程线程接收，process=独立子进程接收（共享内存帧池）
+        self.ingest_backend = ingest_backend
+        # 设备是否在帧负载后发送终止符（接收时校验）
+        self.frame_terminator = frame_terminator
+        # 当前设备的帧处理流水线（切换设备时构建，需要data_processor）
+        self.data_processor = data_processor
+        self.current_pipeline = None
         
     def setup_devices(self, device_configs):
         """设置设备配置"""
@@ -1082,7 +1090,7 @@ class DeviceManager:
                         print(f"重用端口 {port_name} 的现有连接 (设备: {device_name})")
                     else:
                         # 创建新的串口接口
-                        serial_interface = SerialInterface(baudrate=1000000)
+                        serial_interface = self._create_serial_interface()
                         # 根据设备类型设置模式
                         if device_type == "walkway":
                             serial_interface.set_device_mode("walkway")
@@ -1144,7 +1152,7 @@ class DeviceManager:
                                 print(f"🗑️ 移除冲突设备 '{conflicting_device_name}' 的接口映射")
                         
                         # 创建支持多端口的SerialInterface
-                        serial_interface = SerialInterface(baudrate=1000000)
+                        serial_interface = self._create_serial_interface()
                         
                         # 配置多端口
                         port_configs = [{'port': ports[i], 'device_id': i} for i in range(len(ports))]
@@ -1166,7 +1174,14 @@ class DeviceManager:
         # 设置默认设备
         if self.devices:
             self.current_device = list(self.devices.keys())[0]
+            self._build_pipeline()
             
+    def _create_serial_interface(self):
+        """按接收后端和帧校验配置创建串口接口"""
+        serial_interface = create_serial_interface(self.ingest_backend, baudrate=1000000)
+        serial_interface.set_frame_terminator(self.frame_terminator)
+        return serial_interface
+    
     def get_device_list(self):
         """获取设备列表"""
         return [(device_id, config['name'], config['icon']) 
@@ -1194,9 +1209,34 @@ class DeviceManager:
             
             # 切换到新设备
             self.current_device = device_id
+            self._build_pipeline()
             return True
         return False
     
+    def _build_pipeline(self):
+        """按当前设备的阵列大小和端口数构建帧处理流水线"""
+        if self.data_processor is None:
+            return
+        device_info = self.get_current_device_info()
+        if not device_info:
+            self.current_pipeline = None
+            return
+        
+        try:
+            rows, cols = (int(value) for value in device_info['array_size'].split('x'))
+        except (KeyError, ValueError):
+            print(f"⚠️ 设备 {device_info.get('name', '未知')} 阵列大小无效: {device_info.get('array_size')}")
+            self.current_pipeline = None
+            return
+        
+        # 单端口设备需要JQ变换，多端口设备已在合并时变换
+        enable_jq = device_info.get('com_ports', 1) == 1
+        self.current_pipeline = self.data_processor.create_pipeline(rows, cols, enable_jq)
+    
+    def get_current_pipeline(self):
+        """获取当前设备的帧处理流水线"""
+        return self.current_pipeline
+    
     def get_current_device_info(self):
         """获取当前设备信息"""
         if self.current_device and self.current_device in self.devices:
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+帧接收缓冲区模块 - 串口接收线程使用的零拷贝字节缓冲区
+"""
+
+from date import FRAME_HEADER_BYTES, FRAME_HEADER_SIZE
+
+class FrameBuffer:
+    """定长字节缓冲区 + 读写游标
+
+    串口数据通过readinto直接写入预分配的bytearray，帧以memoryview形式交出，
+    不再对缓冲区反复切片重建。返回的帧视图只在下一次fill_from之前有效，
+    需要保留的帧由调用方在发布时复制一次。
+
+    支持两种分帧方式：
+        - 定界模式（frame_length=None）：帧内容为两个帧头之间的数据，需等到下一个帧头
+        - 定长模式（frame_length=N）：帧头后固定N字节即为一帧，收齐即交出；
+          下一帧起点不是帧头时，先回看上一帧：上一帧内有由其后frame_size处帧头确认的帧头，
+          说明上一帧尾部丢失，从该帧头继续（事后计为截断帧），否则重新查找并确认帧头（重同步）；
+          负载中恰好出现的帧头字节不会被确认，不影响分帧
+    """
+
+    def __init__(self, capacity=16384, read_size=2000, frame_length=None):
+        """
+        Args:
+            capacity (int): 缓冲区容量（字节）
+            read_size (int): 每次从串口读取的最大字节数
+            frame_length (int): 定长模式的帧负载长度，None表示定界模式
+        """
+        if capacity < read_size * 2:
+            raise ValueError(f"缓冲区容量过小: {capacity}，至少需要 {read_size * 2} 字节")
+
+        self.capacity = capacity
+        self.read_size = read_size
+        self._buffer = bytearray(capacity)
+        self._view = memoryview(self._buffer)
+
+        self.read_pos = 0   # 未处理数据起点
+        self.write_pos = 0  # 已写入数据终点
+        self.scan_pos = 0   # 已确认不含下一个帧头的位置，避免重复扫描
+
+        self.frame_length = frame_length
+        self.dropped_bytes = 0    # 溢出时丢弃的字节数
+        self.resync_count = 0     # 定长模式下帧头错位后重新同步的次数
+        self.truncated_count = 0  # 定长模式下事后发现被截断（帧内有已确认的下一个帧头）的帧数
+        self._frame_start = None  # 定长模式下上一帧的起点（回看截断用，缓冲区搬移时保留）
+        self.received_bytes = 0   # 累计读取的字节数
+        self.synced = False     # 是否已对齐到帧边界
+
+    def __len__(self):
+        return self.write_pos - self.read_pos
+
+    def clear(self):
+        """清空缓冲区"""
+        self.read_pos = 0
+        self.write_pos = 0
+        self.scan_pos = 0
+        self.synced = False
+        self._frame_start = None
+
+    def _reserve(self, size):
+        """确保写入位置之后至少有size字节空间，必要时把未处理数据搬到开头"""
+        if self.write_pos + size <= self.capacity:
+            return
+
+        # 定长模式保留上一帧的字节，供回看截断
+        keep_pos = self.read_pos if self._frame_start is None else min(self._frame_start, self.read_pos)
+        pending = self.write_pos - keep_pos
+        max_pending = self.capacity - size
+        if pending > max_pending:
+            # 积压过多（长时间未找到帧头），丢弃最旧的数据
+            keep_pos = self.write_pos - max_pending
+            if keep_pos > self.read_pos:
+                self.dropped_bytes += keep_pos - self.read_pos
+                self.read_pos = keep_pos
+            pending = max_pending
+        if self._frame_start is not None and self._frame_start < keep_pos:
+            self._frame_start = None
+
+        # memoryview切片赋值按memmove语义处理重叠区域
+        self._view[:pending] = self._view[keep_pos:self.write_pos]
+        self.scan_pos = max(self.scan_pos - keep_pos, 0)
+        self.read_pos -= keep_pos
+        if self._frame_start is not None:
+            self._frame_start -= keep_pos
+        self.write_pos = pending
+
+    def fill_from(self, port):
+        """
+        从串口（或任何提供readinto的字节源）读取数据到缓冲区
+
+        Returns:
+            int: 本次读取的字节数
+        """
+        self._reserve(self.read_size)
+
+        # 只读取已到达的字节（至少1字节），不等凑满read_size，
+        # 使采集时间戳贴近数据实际到达的时刻
+        read_size = self.read_size
+        in_waiting = getattr(port, 'in_waiting', None)
+        if in_waiting is not None:
+            read_size = min(read_size, max(in_waiting, 1))
+
+        count = port.readinto(self._view[self.write_pos:self.write_pos + read_size])
+        if count:
+            self.write_pos += count
+            self.received_bytes += count
+            return count
+        return 0
+
+    def next_frame(self):
+        """
+        取出下一个完整帧
+
+        Returns:
+            memoryview: 帧内容视图，缓冲区中没有完整帧时返回None
+        """
+        if self.frame_length:
+            return self._next_fixed_frame()
+        return self._next_delimited_frame()
+
+    def _find_header(self):
+        """从读游标开始查找帧头，未找到时丢弃无用数据并返回-1"""
+        frame_start = self._buffer.find(FRAME_HEADER_BYTES, self.read_pos, self.write_pos)
+
+        if frame_start == -1:
+            # 没有帧头，只保留最后3个字节以防帧头被分割
+            self.read_pos = max(self.read_pos, self.write_pos - (FRAME_HEADER_SIZE - 1))
+            self.scan_pos = self.read_pos
+        return frame_start
+
+    def _next_fixed_frame(self):
+        """定长模式：帧头 + frame_length字节"""
+        buffer = self._buffer
+        frame_size = FRAME_HEADER_SIZE + self.frame_length
+
+        if self.synced:
+            if self.write_pos - self.read_pos < FRAME_HEADER_SIZE:
+                return None
+            if not buffer.startswith(FRAME_HEADER_BYTES, self.read_pos, self.write_pos):
+                truncated_at = self._truncated_previous_frame(frame_size)
+                if truncated_at is None:
+                    # 回看确认所需的数据尚未到达
+                    return None
+                if truncated_at >= 0:
+                    # 上一帧尾部丢失，下一帧从上一帧内的帧头开始
+                    self.truncated_count += 1
+                    self.read_pos = truncated_at
+                else:
+                    # 上一帧结束处不是帧头：数据丢失或错位，进入重同步
+                    self.synced = False
+                    self.resync_count += 1
+            self._frame_start = None
+
+        while not self.synced:
+            # 重同步：候选帧头必须由frame_size之后的下一个帧头确认，
+            # 避免负载中恰好出现的帧头字节造成错位
+            frame_start = self._find_header()
+            if frame_start == -1:
+                return None
+            self.read_pos = frame_start
+
+            confirm_pos = frame_start + frame_size
+            if confirm_pos + FRAME_HEADER_SIZE > self.write_pos:
+                return None
+            if buffer.startswith(FRAME_HEADER_BYTES, confirm_pos, self.write_pos):
+                self.synced = True
+            else:
+                self.read_pos = frame_start + 1
+
+        frame_end = self.read_pos + frame_size
+        if frame_end > self.write_pos:
+            return None
+
+        # 收齐即交出（负载中的帧头字节不做处理）
+        content_start = self.read_pos + FRAME_HEADER_SIZE
+        self._frame_start = self.read_pos
+        self.read_pos = frame_end
+        return self._view[content_start:frame_end]
+
+    def _truncated_previous_frame(self, frame_size):
+        """
+        回看上一帧：查找其中由其后frame_size处的帧头确认的帧头
+
+        Returns:
+            int: 帧头位置；没有时返回-1；确认所需的数据尚未到达时返回None
+        """
+        if self._frame_start is None:
+            return -1
+        buffer = self._buffer
+        end = self.read_pos
+        candidate = buffer.find(FRAME_HEADER_BYTES, self._frame_start + FRAME_HEADER_SIZE, end)
+        while candidate != -1:
+            confirm_pos = candidate + frame_size
+            if confirm_pos + FRAME_HEADER_SIZE > self.write_pos:
+                return None
+            if buffer.startswith(FRAME_HEADER_BYTES, confirm_pos, self.write_pos):
+                return candidate
+            candidate = buffer.find(FRAME_HEADER_BYTES, candidate + 1, end)
+        return -1
+
+    def _next_delimited_frame(self):
+        """定界模式：两个帧头之间的内容"""
+        buffer = self._buffer
+        frame_start = self._find_header()
+        if frame_start == -1:
+            return None
+
+        self.read_pos = frame_start
+        content_start = frame_start + FRAME_HEADER_SIZE
+        next_frame_pos = buffer.find(FRAME_HEADER_BYTES, max(content_start, self.scan_pos), self.write_pos)
+
+        if next_frame_pos == -1:
+            # 帧尚未结束，记录已扫描位置，下次只扫描新到的数据
+            self.scan_pos = max(content_start, self.write_pos - (FRAME_HEADER_SIZE - 1))
+            return None
+
+        self.read_pos = next_frame_pos
+        self.scan_pos = next_frame_pos + FRAME_HEADER_SIZE
+        return self._view[content_start:next_frame_pos]
+
+
+def test_frame_buffer():
+    """定长分帧回归检查：负载中的帧头字节不拆帧，真正的截断帧计数"""
+    print("🧪 测试定长分帧...")
+    from date import FRAME_PAYLOAD_SIZE
+
+    class _Bytes:
+        def __init__(self, data):
+            self.data = memoryview(bytes(data))
+
+        def readinto(self, target):
+            count = min(len(target), len(self.data))
+            target[:count] = self.data[:count]
+            self.data = self.data[count:]
+            return count
+
+    def frame(index, payload_size=FRAME_PAYLOAD_SIZE):
+        return FRAME_HEADER_BYTES + bytes([index]) * payload_size
+
+    def parse(stream):
+        buffer = FrameBuffer(frame_length=FRAME_PAYLOAD_SIZE)
+        source = _Bytes(stream)
+        frames = []
+        while buffer.fill_from(source):
+            while True:
+                payload = buffer.next_frame()
+                if payload is None:
+                    break
+                frames.append(bytes(payload))
+        return frames, buffer
+
+    # 4个完整帧，第2帧负载偏移500处是帧头字节
+    second = bytearray(frame(2))
+    second[FRAME_HEADER_SIZE + 500:FRAME_HEADER_SIZE + 500 + FRAME_HEADER_SIZE] = FRAME_HEADER_BYTES
+    stream = frame(1) + bytes(second) + frame(3) + frame(4) + FRAME_HEADER_BYTES
+    frames, buffer = parse(stream)
+    assert len(frames) == 4, f"负载中的帧头字节拆分了帧: {len(frames)}"
+    assert frames[1] == bytes(second[FRAME_HEADER_SIZE:]), "负载含帧头字节的帧内容不一致"
+    assert buffer.truncated_count == 0 and buffer.resync_count == 0, \
+        f"误计截断/重同步: {buffer.truncated_count}/{buffer.resync_count}"
+
+    # 第2帧尾部丢失300字节：事后计为截断帧，第3、4帧照常（不因重同步多丢一帧）
+    stream = frame(1) + frame(2)[:-300] + frame(3) + frame(4) + FRAME_HEADER_BYTES
+    frames, buffer = parse(stream)
+    assert [payload[0] for payload in frames] == [1, 2, 3, 4], f"截断帧处理错误: {[p[0] for p in frames]}"
+    assert buffer.truncated_count == 1 and buffer.resync_count == 0, \
+        f"截断/重同步计数错误: {buffer.truncated_count}/{buffer.resync_count}"
+
+    print("✅ 定长分帧检查通过")
+
+
+if __name__ == "__main__":
+    test_frame_buffer()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+帧池模块 - 预分配的帧存储，接收线程写入、UI/记录/分析共享读取
+"""
+
+import numpy as np
+
+from date import capture_timestamp_ns
+
+class FramePool:
+    """预分配帧池
+
+    frames为(N, rows, cols)的uint8环形槽位，timestamps/frame_numbers/sequences
+    为与之并列的结构数组。接收线程把帧负载直接写入槽位，消费者通过FrameRef
+    读取同一块内存，不再为每帧创建bytes对象。
+    槽位在capacity帧之后会被覆盖，需要长期保留的数据应自行复制。
+    """
+
+    def __init__(self, rows=32, cols=32, capacity=128):
+        """
+        Args:
+            rows (int): 每帧行数
+            cols (int): 每帧列数
+            capacity (int): 槽位数量
+        """
+        self.rows = rows
+        self.cols = cols
+        self.frame_size = rows * cols
+        self.capacity = capacity
+
+        self.frames = np.zeros((capacity, rows, cols), dtype=np.uint8)
+        self._flat_frames = self.frames.reshape(capacity, self.frame_size)
+        self.lengths = np.zeros(capacity, dtype=np.int32)
+        self.timestamps = np.zeros(capacity, dtype=np.int64)     # 采集时间戳（perf_counter_ns）
+        self.frame_numbers = np.zeros(capacity, dtype=np.int64)
+        self.sequences = np.full(capacity, -1, dtype=np.int64)   # 槽位当前数据的发布序号
+
+        self.sequence = 0  # 下一个发布序号
+
+    def acquire(self):
+        """获取下一个可写槽位（发布前不可见）"""
+        slot = self.sequence % self.capacity
+        self.sequences[slot] = -1
+        return slot
+
+    def write_segment(self, slot, offset, data):
+        """把一段负载写入槽位的指定偏移（用于多段拼接的帧）"""
+        segment = np.frombuffer(data, dtype=np.uint8)
+        self._flat_frames[slot, offset:offset + len(segment)] = segment
+
+    def publish(self, slot, length, frame_number, timestamp=None):
+        """
+        发布已写好的槽位
+
+        Returns:
+            FrameRef: 指向该槽位的帧引用
+        """
+        sequence = self.sequence
+        self.lengths[slot] = length
+        self.timestamps[slot] = capture_timestamp_ns() if timestamp is None else timestamp
+        self.frame_numbers[slot] = frame_number
+        self.sequences[slot] = sequence
+        self.sequence += 1
+        return FrameRef(self, slot, sequence)
+
+    def write(self, data, frame_number, timestamp=None):
+        """把一帧负载写入下一个槽位并发布"""
+        slot = self.acquire()
+        self.write_segment(slot, 0, data)
+        return self.publish(slot, len(data), frame_number, timestamp)
+
+    def flat(self, slot):
+        """槽位的一维视图"""
+        return self._flat_frames[slot, :self.lengths[slot]]
+
+    def frame(self, slot):
+        """槽位的二维视图 (rows, cols)"""
+        return self.frames[slot]
+
+    def is_current(self, slot, sequence):
+        """槽位数据是否仍为指定序号（未被覆盖）"""
+        return self.sequences[slot] == sequence
+
+
+class FrameRef:
+    """帧池中一帧的轻量引用
+
+    兼容原有的帧字典接口（frame['data']、frame.get('timestamp')等），
+    data为帧池中的numpy视图，timestamp为采集时间戳（perf_counter_ns整数）。
+    """
+
+    __slots__ = ('pool', 'slot', 'sequence', 'extra')
+
+    _KEYS = ('data', 'timestamp', 'frame_number', 'data_length')
+
+    def __init__(self, pool, slot, sequence, extra=None):
+        self.pool = pool
+        self.slot = slot
+        self.sequence = sequence
+        self.extra = extra or {}
+
+    @property
+    def data(self):
+        return self.pool.flat(self.slot)
+
+    @property
+    def matrix(self):
+        return self.pool.frame(self.slot)
+
+    @property
+    def timestamp_ns(self):
+        return int(self.pool.timestamps[self.slot])
+
+    @property
+    def frame_number(self):
+        return int(self.pool.frame_numbers[self.slot])
+
+    @property
+    def is_valid(self):
+        """帧数据是否仍在帧池中（未被新帧覆盖）"""
+        return self.pool.is_current(self.slot, self.sequence)
+
+    def copy(self):
+        """复制为独立的帧字典"""
+        frame = dict(self.extra)
+        frame.update((key, self[key]) for key in self._KEYS)
+        frame['data'] = frame['data'].tobytes()
+        return frame
+
+    def __getitem__(self, key):
+        if key == 'data':
+            return self.data
+        if key == 'timestamp':
+            return self.timestamp_ns
+        if key == 'frame_number':
+            return self.frame_number
+        if key == 'data_length':
+            return int(self.pool.lengths[self.slot])
+        return self.extra[key]
+
+    def __setitem__(self, key, value):
+        if key in self._KEYS:
+            raise KeyError(f"帧池字段只读: {key}")
+        self.extra[key] = value
+
+    def __contains__(self, key):
+        return key in self._KEYS or key in self.extra
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return list(self._KEYS) + list(self.extra)
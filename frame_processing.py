@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+帧处理线程模块 - 在接收线程与Tk主循环之间完成JQ变换、统计和记录写入
+"""
+
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from frame_queue import LatestValueSlot
+
+class TickTimer:
+    """耗时采样器：记录最近window次调用的耗时，给出分位数"""
+
+    def __init__(self, window=1000):
+        self._samples = deque(maxlen=window)
+        self.count = 0
+
+    def start(self):
+        return time.perf_counter_ns()
+
+    def stop(self, start_ns):
+        """记录自start_ns以来的耗时，返回耗时（纳秒）"""
+        elapsed_ns = time.perf_counter_ns() - start_ns
+        self._samples.append(elapsed_ns)
+        self.count += 1
+        return elapsed_ns
+
+    def reset(self):
+        self._samples.clear()
+        self.count = 0
+
+    def get_stats(self):
+        """耗时统计（毫秒）"""
+        if not self._samples:
+            return {'count': self.count, 'mean_ms': 0.0, 'p50_ms': 0.0, 'p95_ms': 0.0, 'p99_ms': 0.0, 'max_ms': 0.0}
+        samples = np.fromiter(self._samples, dtype=np.int64) / 1e6
+        p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+        return {
+            'count': self.count,
+            'mean_ms': float(samples.mean()),
+            'p50_ms': float(p50),
+            'p95_ms': float(p95),
+            'p99_ms': float(p99),
+            'max_ms': float(samples.max())
+        }
+
+
+class FrameProcessingThread:
+    """帧处理线程
+
+    阻塞等待接口的最新帧，用当前设备的FramePipeline处理后发布到最新值槽位，
+    Tk主循环每次只取槽位中的最新结果用于显示。设置smoother/overlay_tracker时同时生成
+    平滑后的display_matrix和叠加层数据overlay，不再占用主线程。记录期间同时把记录通道中的
+    全部帧批量处理并交给记录回调（检测向导写CSV），文件写入不再占用主线程。
+    发布的结果中matrix_2d/pressure_matrix为独立副本，不受流水线缓冲区轮换影响。
+    """
+
+    def __init__(self, data_processor, get_pipeline=None):
+        """
+        Args:
+            data_processor (DataProcessor): 流水线缺失时使用的通用处理器，也用于记录帧的批量处理
+            get_pipeline (callable): 返回当前设备FramePipeline的函数（切换设备后自动生效）
+        """
+        self.data_processor = data_processor
+        self.get_pipeline = get_pipeline or (lambda: None)
+        self.interface = None
+        self.recording_sink = None  # 记录回调 callback(processed_list)，None表示不记录
+        self.smoother = None        # 显示平滑（GaussianSmoother），结果放在display_matrix，None表示不平滑
+        self.overlay_tracker = None # 叠加层（PressureOverlayTracker），结果放在overlay，None表示不计算
+
+        self.latest = LatestValueSlot()
+        self.process_timer = TickTimer()
+        self.processed_count = 0
+        self.error_count = 0
+        self.recorded_rows = 0
+        self.recording_errors = 0
+        self.last_error = None
+
+        self._recording_lock = threading.Lock()  # 记录批次的取出与写入不可分割，结束记录时据此等待
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def attach(self, interface):
+        """切换数据来源接口（串口接口或多端口接口）"""
+        old_interface = self.interface
+        self.interface = interface
+        if old_interface is not None and old_interface is not interface:
+            self._wake(old_interface)
+        self.latest.clear()
+
+    def set_recording_sink(self, sink):
+        """设置/清除记录回调"""
+        with self._recording_lock:
+            self.recording_sink = sink
+    
+    def finish_recording(self, interface):
+        """
+        结束记录（Tk线程在关闭记录通道之后调用）：等处理线程正在写的批次完成，
+        把通道中剩余的帧全部写入，再清除记录回调，记录通道中的每一帧都会被写入
+        """
+        with self._recording_lock:
+            sink = self.recording_sink
+            if sink is not None:
+                while True:
+                    frames = interface.get_recording_data()
+                    if not frames:
+                        break
+                    self._write_frames(frames, sink)
+            self.recording_sink = None
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """启动处理线程"""
+        if self.is_running():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="FrameProcessing", daemon=True)
+        self._thread.start()
+        print("✅ 帧处理线程已启动")
+
+    def stop(self, timeout=1.0):
+        """停止处理线程"""
+        self._stop_event.set()
+        if self.interface is not None:
+            self._wake(self.interface)
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        self.latest.clear()
+
+    @staticmethod
+    def _wake(interface):
+        wake = getattr(interface, 'wake_data_waiters', None)
+        if wake:
+            wake()
+
+    def take_latest(self):
+        """取出最新的处理结果（Tk主循环调用，不阻塞），没有新结果时返回None"""
+        return self.latest.take()
+
+    def _next_frame(self, interface):
+        wait_latest = getattr(interface, 'wait_latest_data', None)
+        if wait_latest is not None:
+            return wait_latest(timeout=0.1)
+        # 不支持阻塞等待的接口：短暂休眠后轮询
+        time.sleep(0.005)
+        return interface.get_latest_data()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            interface = self.interface
+            if interface is None:
+                self._stop_event.wait(0.05)
+                continue
+
+            try:
+                frame_data = self._next_frame(interface)
+                if frame_data is not None:
+                    self._process(frame_data)
+                self._write_recording(interface)
+            except Exception as e:
+                self.error_count += 1
+                self.last_error = str(e)
+                if self.error_count % 100 == 1:
+                    print(f"❌ 帧处理线程出错: {e}")
+                self._stop_event.wait(0.01)
+
+    def _process(self, frame_data):
+        start_ns = self.process_timer.start()
+        pipeline = self.get_pipeline()
+        if pipeline is not None:
+            processed = pipeline.process(frame_data)
+        else:
+            processed = self.data_processor.process_frame_data(frame_data, True)
+
+        if 'error' in processed:
+            self.error_count += 1
+            self.last_error = processed['error']
+        else:
+            # 流水线输出缓冲区会轮换复用，发布独立副本
+            processed['matrix_2d'] = processed['matrix_2d'].copy()
+            processed['transformed_data'] = processed['matrix_2d'].ravel()
+            processed['pressure_matrix'] = processed['pressure_matrix'].copy()
+            smoother = self.smoother
+            if smoother is not None:
+                # 只用于显示，统计和记录仍使用原始矩阵
+                processed['display_matrix'] = smoother(processed['matrix_2d']).copy()
+            overlay_tracker = self.overlay_tracker
+            if overlay_tracker is not None:
+                processed['overlay'] = overlay_tracker.update(processed['matrix_2d'], processed['statistics'])
+            self.processed_count += 1
+        self.process_timer.stop(start_ns)
+        self.latest.publish(processed)
+
+    def _write_recording(self, interface):
+        with self._recording_lock:
+            sink = self.recording_sink
+            if sink is None:
+                return
+            frames = interface.get_recording_data()
+            if frames:
+                self._write_frames(frames, sink)
+
+    def _write_frames(self, frames, sink):
+        pipeline = self.get_pipeline()
+        enable_jq = pipeline.enable_jq_transform if pipeline is not None else True
+        processed_list = [processed for processed in self.data_processor.process_frame_list(frames, enable_jq)
+                          if 'error' not in processed]
+        try:
+            sink(processed_list)
+            self.recorded_rows += len(processed_list)
+        except Exception as e:
+            self.recording_errors += 1
+            if self.recording_errors % 100 == 1:
+                print(f"⚠️ 记录数据写入错误: {e}")
+
+    def get_stats(self):
+        """处理线程统计：处理帧数、每帧处理耗时、槽位覆盖次数、记录行数"""
+        stats = {
+            'running': self.is_running(),
+            'processed': self.processed_count,
+            'errors': self.error_count,
+            'last_error': self.last_error,
+            'recorded_rows': self.recorded_rows,
+            'recording_errors': self.recording_errors,
+            'process_time': self.process_timer.get_stats()
+        }
+        stats.update(self.latest.get_stats())
+        return stats
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+帧队列模块 - 有界的最新帧队列（满时覆盖最旧帧）及丢帧统计、最新值槽位
+"""
+
+import threading
+import queue
+from collections import deque
+
+class LatestFrameQueue:
+    """有界最新帧队列
+
+    队列满时丢弃最旧的帧，避免消费者（Tk主循环）卡顿时内存无限增长。
+    统计三类计数：
+        - dropped: 未被取出就被新帧覆盖的帧
+        - coalesced: 被取出但因只需要最新帧而被合并丢弃的帧
+        - delivered: 实际交给消费者使用的帧
+    接口与queue.Queue的put/get_nowait/qsize兼容。
+    """
+
+    def __init__(self, maxsize=16):
+        """
+        Args:
+            maxsize (int): 最大缓存帧数，None表示不限制（旧行为）
+        """
+        self.maxsize = maxsize
+        self._frames = deque(maxlen=maxsize)
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+
+        self.put_count = 0
+        self.dropped_count = 0
+        self.coalesced_count = 0
+        self.delivered_count = 0
+
+    def put(self, frame):
+        """放入一帧，队列满时覆盖最旧的帧"""
+        with self._lock:
+            if self.maxsize and len(self._frames) >= self.maxsize:
+                self.dropped_count += 1
+            self._frames.append(frame)
+            self.put_count += 1
+            self._not_empty.notify()
+
+    def get_nowait(self):
+        """取出最旧的一帧，队列为空时抛出queue.Empty"""
+        with self._lock:
+            if not self._frames:
+                raise queue.Empty
+            self.delivered_count += 1
+            return self._frames.popleft()
+
+    def get_many(self, max_count=5):
+        """按顺序批量取出最多max_count帧"""
+        with self._lock:
+            count = min(max_count, len(self._frames))
+            frames = [self._frames.popleft() for _ in range(count)]
+            self.delivered_count += count
+            return frames
+
+    def get_latest(self):
+        """取出最新的一帧并丢弃其余积压帧，队列为空时返回None"""
+        with self._lock:
+            if not self._frames:
+                return None
+            frame = self._frames.pop()
+            self.coalesced_count += len(self._frames)
+            self._frames.clear()
+            self.delivered_count += 1
+            return frame
+
+    def wait_latest(self, timeout=None):
+        """
+        阻塞等待新帧并取出最新的一帧（处理线程使用）
+
+        Returns:
+            最新帧，超时或被wake唤醒且队列为空时返回None
+        """
+        with self._not_empty:
+            if not self._frames:
+                self._not_empty.wait(timeout)
+                if not self._frames:
+                    return None
+            frame = self._frames.pop()
+            self.coalesced_count += len(self._frames)
+            self._frames.clear()
+            self.delivered_count += 1
+            return frame
+
+    def wake(self):
+        """唤醒所有等待中的消费者（停止处理线程时使用）"""
+        with self._not_empty:
+            self._not_empty.notify_all()
+
+    def qsize(self):
+        return len(self._frames)
+
+    def empty(self):
+        return not self._frames
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+
+    def get_stats(self):
+        """获取队列统计"""
+        with self._lock:
+            return {
+                'maxsize': self.maxsize,
+                'queued': len(self._frames),
+                'put': self.put_count,
+                'dropped': self.dropped_count,
+                'coalesced': self.coalesced_count,
+                'delivered': self.delivered_count
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self.put_count = 0
+            self.dropped_count = 0
+            self.coalesced_count = 0
+            self.delivered_count = 0
+
+
+class RecordingLane:
+    """记录专用的无损帧通道
+
+    记录期间每一帧都以独立副本进入无界队列，不受显示队列丢帧影响，
+    也不会因帧池槽位被覆盖而丢失数据。
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self.active = False
+        self.recorded_count = 0
+
+    def start(self):
+        """开始记录：清空残留帧"""
+        self._drain()
+        self.recorded_count = 0
+        self.active = True
+
+    def stop(self):
+        self.active = False
+
+    def put(self, frame):
+        if not self.active:
+            return
+        # 帧池引用需要复制，避免槽位被覆盖
+        if hasattr(frame, 'copy') and not isinstance(frame, dict):
+            frame = frame.copy()
+        self._queue.put(frame)
+        self.recorded_count += 1
+
+    def get_all(self, max_count=None):
+        """取出待写入的记录帧"""
+        frames = []
+        try:
+            while max_count is None or len(frames) < max_count:
+                frames.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return frames
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def _drain(self):
+        self.get_all()
+
+
+class LatestValueSlot:
+    """最新值槽位
+
+    生产者（处理线程）每处理完一帧就覆盖槽位，消费者（Tk主循环）每次只取最新值，
+    两边都不阻塞。统计被覆盖而未被取走的值（superseded），用于观察显示端跟不上的程度。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._value = None
+        self.version = 0          # 已发布的值的个数
+        self._taken_version = 0   # 消费者最后取走的版本
+
+        self.superseded_count = 0
+        self.taken_count = 0
+
+    def publish(self, value):
+        """发布新值，覆盖尚未取走的旧值"""
+        with self._lock:
+            if self.version > self._taken_version:
+                self.superseded_count += 1
+            self._value = value
+            self.version += 1
+
+    def take(self):
+        """取出自上次以来的最新值，没有新值时返回None"""
+        with self._lock:
+            if self.version == self._taken_version:
+                return None
+            self._taken_version = self.version
+            self.taken_count += 1
+            value, self._value = self._value, None
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._value = None
+            self._taken_version = self.version
+
+    def get_stats(self):
+        """获取槽位统计"""
+        with self._lock:
+            return {
+                'published': self.version,
+                'taken': self.taken_count,
+                'superseded': self.superseded_count
+            }
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+帧平滑模块 - uint8压力矩阵的可分离整数高斯平滑（核按sigma缓存，缓冲区复用）
+"""
+
+import numpy as np
+
+# 核半径 = int(GAUSSIAN_TRUNCATE * sigma + 0.5)，与scipy.ndimage.gaussian_filter的默认截断一致
+GAUSSIAN_TRUNCATE = 4.0
+# 定点权重：每个一维核的权重之和为256（两次一维卷积后右移8位）
+KERNEL_SCALE = 256
+
+_kernel_cache = {}
+
+def gaussian_kernel(sigma, truncate=GAUSSIAN_TRUNCATE):
+    """
+    一维整数高斯核（结果缓存）
+
+    Returns:
+        np.ndarray: uint16权重，长度2*radius+1，和为KERNEL_SCALE
+    """
+    key = (float(sigma), float(truncate))
+    kernel = _kernel_cache.get(key)
+    if kernel is None:
+        radius = max(1, int(truncate * sigma + 0.5))
+        x = np.arange(-radius, radius + 1, dtype=np.float64)
+        weights = np.exp(-0.5 * (x / sigma) ** 2)
+        weights = np.round(weights / weights.sum() * KERNEL_SCALE).astype(np.int64)
+        # 取整误差补到中心，保证权重和为KERNEL_SCALE（平坦区域数值不变）
+        weights[radius] += KERNEL_SCALE - weights.sum()
+        # 两端取整为0的权重不参与卷积
+        nonzero = np.flatnonzero(weights)
+        trim = min(nonzero[0], len(weights) - 1 - nonzero[-1])
+        kernel = weights[trim:len(weights) - trim].astype(np.uint16)
+        kernel.flags.writeable = False
+        _kernel_cache[key] = kernel
+    return kernel
+
+
+class GaussianSmoother:
+    """uint8矩阵的高斯平滑
+
+    先按列方向、再按行方向做两次一维卷积，边缘按最近值延伸（等同mode='nearest'）。
+    中间结果为uint16定点数（最大255*256），每次卷积只做2*radius+1次整块乘加，
+    所有缓冲区按矩阵尺寸预分配并复用。返回的矩阵在下一次调用时被覆盖。
+    """
+
+    def __init__(self, sigma=0.5, truncate=GAUSSIAN_TRUNCATE):
+        self.truncate = truncate
+        self._shape = None
+        self.set_sigma(sigma)
+
+    def set_sigma(self, sigma):
+        """更换sigma（核取缓存，缓冲区按新半径重建）"""
+        self.sigma = sigma
+        self.kernel = gaussian_kernel(sigma, self.truncate)
+        self.radius = len(self.kernel) // 2
+        self._shape = None
+
+    def _allocate(self, rows, cols):
+        radius = self.radius
+        self._shape = (rows, cols)
+        self._row_index = np.clip(np.arange(-radius, rows + radius), 0, rows - 1)
+        self._col_index = np.clip(np.arange(-radius, cols + radius), 0, cols - 1)
+        self._source = np.empty((rows, cols), dtype=np.uint16)
+        self._padded_rows = np.empty((rows + 2 * radius, cols), dtype=np.uint16)
+        self._padded_cols = np.empty((rows, cols + 2 * radius), dtype=np.uint16)
+        self._accumulator = np.empty((rows, cols), dtype=np.uint16)
+        self._scratch = np.empty((rows, cols), dtype=np.uint16)
+        self._output = np.empty((rows, cols), dtype=np.uint8)
+
+    def _convolve(self, padded, axis):
+        """沿axis对已延伸的padded做一维卷积，结果（定点）留在_accumulator"""
+        accumulator, scratch = self._accumulator, self._scratch
+        rows, cols = self._shape
+        for offset, weight in enumerate(self.kernel):
+            window = padded[offset:offset + rows] if axis == 0 else padded[:, offset:offset + cols]
+            if offset == 0:
+                np.multiply(window, weight, out=accumulator)
+            else:
+                np.multiply(window, weight, out=scratch)
+                accumulator += scratch
+
+    def __call__(self, matrix):
+        """
+        平滑一帧
+
+        Args:
+            matrix (np.ndarray): (rows, cols) uint8矩阵
+
+        Returns:
+            np.ndarray: 平滑后的uint8矩阵（复用的缓冲区）
+        """
+        if matrix.shape != self._shape:
+            self._allocate(*matrix.shape)
+        accumulator = self._accumulator
+
+        # 列方向（沿行索引）
+        # 统一为uint16后再卷积（同类型乘加比uint8*uint16快）
+        np.copyto(self._source, matrix, casting='unsafe')
+        np.take(self._source, self._row_index, axis=0, out=self._padded_rows)
+        self._convolve(self._padded_rows, axis=0)
+        accumulator += KERNEL_SCALE // 2
+        accumulator >>= 8
+
+        # 行方向（沿列索引）
+        np.take(accumulator, self._col_index, axis=1, out=self._padded_cols)
+        self._convolve(self._padded_cols, axis=1)
+        accumulator += KERNEL_SCALE // 2
+        accumulator >>= 8
+
+        np.copyto(self._output, accumulator, casting='unsafe')
+        return self._output
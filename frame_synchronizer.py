@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多端口帧同步模块 - 按采集时间戳对齐步道各段的帧
+"""
+
+import threading
+import time
+from collections import deque
+
+class FrameSynchronizer:
+    """多端口帧同步器
+
+    每个端口一个按时间排序的环形缓冲区（帧 + 采集时间戳），
+    合并时为各端口选取与基准时间最接近的帧，时间差在容差内才输出，
+    保证拼接后的32x64/32x96帧来自同一时刻。
+    合并线程通过wait_for_match阻塞等待，只有所有端口都有新帧时才被唤醒。
+    """
+
+    def __init__(self, port_ids, tolerance_ms=10.0, depth=8):
+        """
+        Args:
+            port_ids (iterable): 端口（设备）ID列表
+            tolerance_ms (float): 允许的最大时间差（毫秒）
+            depth (int): 每个端口缓存的帧数
+        """
+        self.port_ids = sorted(port_ids)
+        self.depth = depth
+        self.tolerance_ns = int(tolerance_ms * 1e6)
+        self._buffers = {port_id: deque(maxlen=depth) for port_id in self.port_ids}
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self.reset_stats()
+
+    def set_tolerance(self, tolerance_ms):
+        """设置匹配容差（毫秒）"""
+        self.tolerance_ns = int(tolerance_ms * 1e6)
+
+    def reset_stats(self):
+        """重置统计"""
+        self.received_counts = {port_id: 0 for port_id in self.port_ids}
+        self.matched_count = 0     # 成功匹配输出的合并帧数
+        self.unmatched_count = 0   # 容差内找不到搭配而丢弃的帧数
+        self.overflow_count = 0    # 缓冲区满被挤出的帧数
+        self.last_skew_ns = 0
+        self.max_skew_ns = 0
+        self._skew_sum_ns = 0
+        self.wakeup_count = 0      # 合并线程被唤醒的次数
+        self.consumer_cpu_ns = 0   # 合并线程累计CPU时间
+
+    def clear(self):
+        """清空所有端口的缓存帧"""
+        with self._lock:
+            for buffer in self._buffers.values():
+                buffer.clear()
+
+    def push(self, port_id, timestamp_ns, frame):
+        """
+        放入一个端口的新帧
+
+        Args:
+            port_id: 端口（设备）ID
+            timestamp_ns (int): 采集时间戳（perf_counter_ns）
+            frame: 帧数据（bytes或帧池引用）
+        """
+        with self._lock:
+            buffer = self._buffers[port_id]
+            if len(buffer) == self.depth:
+                self.overflow_count += 1
+            buffer.append((timestamp_ns, frame))
+            self.received_counts[port_id] += 1
+
+            # 只有所有端口都有帧时才可能组成一组，此时才唤醒合并线程
+            if all(self._buffers.values()):
+                self._condition.notify()
+
+    def wake(self):
+        """唤醒所有等待中的合并线程（断开连接时使用）"""
+        with self._condition:
+            self._condition.notify_all()
+
+    def pop_match(self):
+        """
+        取出一组时间对齐的帧
+
+        Returns:
+            tuple: (frames, timestamps) 两个按端口ID索引的字典；
+                   暂时无法组成一组时返回None
+        """
+        with self._lock:
+            return self._pop_match_locked()
+
+    def wait_for_match(self, timeout=None):
+        """
+        阻塞等待一组时间对齐的帧
+
+        Args:
+            timeout (float): 最长等待时间（秒），None表示一直等待
+
+        Returns:
+            tuple: 同pop_match，超时或被wake唤醒且无可用帧时返回None
+        """
+        with self._condition:
+            match = self._pop_match_locked()
+            if match is None:
+                self._condition.wait(timeout)
+                self.wakeup_count += 1
+                match = self._pop_match_locked()
+            self.consumer_cpu_ns = time.thread_time_ns()
+            return match
+
+    def _pop_match_locked(self):
+        buffers = self._buffers
+        tolerance_ns = self.tolerance_ns
+
+        while all(buffers.values()):
+            # 基准时间：各端口最旧帧中最晚的一个，之前的时刻不可能所有端口都有数据
+            pivot_ns = max(buffer[0][0] for buffer in buffers.values())
+
+            chosen = {}
+            for port_id, buffer in buffers.items():
+                chosen[port_id] = min(range(len(buffer)), key=lambda i: abs(buffer[i][0] - pivot_ns))
+
+            chosen_ts = [buffers[port_id][index][0] for port_id, index in chosen.items()]
+            skew_ns = max(chosen_ts) - min(chosen_ts)
+
+            if skew_ns <= tolerance_ns:
+                frames = {}
+                timestamps = {}
+                for port_id, index in chosen.items():
+                    buffer = buffers[port_id]
+                    # 比选中帧更旧的帧已无法匹配，丢弃
+                    for _ in range(index):
+                        buffer.popleft()
+                        self.unmatched_count += 1
+                    timestamps[port_id], frames[port_id] = buffer.popleft()
+
+                self.matched_count += 1
+                self.last_skew_ns = skew_ns
+                self.max_skew_ns = max(self.max_skew_ns, skew_ns)
+                self._skew_sum_ns += skew_ns
+                return frames, timestamps
+
+            # 超出容差：丢弃全局最旧的帧后重试
+            oldest_port = min(buffers, key=lambda port_id: buffers[port_id][0][0])
+            buffers[oldest_port].popleft()
+            self.unmatched_count += 1
+
+        return None
+
+    def get_stats(self):
+        """获取同步统计（时间单位：毫秒）"""
+        with self._lock:
+            mean_skew_ns = self._skew_sum_ns / self.matched_count if self.matched_count else 0
+            return {
+                'tolerance_ms': self.tolerance_ns / 1e6,
+                'matched': self.matched_count,
+                'unmatched': self.unmatched_count,
+                'overflow': self.overflow_count,
+                'received': dict(self.received_counts),
+                'last_skew_ms': self.last_skew_ns / 1e6,
+                'mean_skew_ms': mean_skew_ns / 1e6,
+                'max_skew_ms': self.max_skew_ns / 1e6,
+                'wakeups': self.wakeup_count,
+                'consumer_cpu_ms': self.consumer_cpu_ns / 1e6,
+                'pending': {port_id: len(buffer) for port_id, buffer in self._buffers.items()}
+            }
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+帧校验模块 - 接收线程中对分帧结果做长度、终止符和合理性检查，并按端口计数
+"""
+
+import numpy as np
+
+from date import FRAME_PAYLOAD_SIZE
+
+# 整帧饱和（255）点数超过该比例视为不合理帧（线路干扰/接线异常时常见全0xFF）
+DEFAULT_MAX_SATURATED_FRACTION = 0.9
+
+class FrameValidator:
+    """单个端口的帧校验与完整性计数
+
+    FrameBuffer负责分帧（重同步、溢出丢弃、定长模式下的截断帧），
+    本类检查分出的每一帧：
+        - 长度：负载（加终止符）必须正好为payload_length（+终止符长度），
+          过短（截断）或过长（帧头损坏导致两帧相连）的帧丢弃
+        - 终止符：设置trailer时检查帧尾，不一致的帧丢弃
+        - 合理性：饱和点比例超过max_saturated_fraction的帧只计数、不丢弃
+    计数与所属FrameBuffer的重同步次数、丢弃字节数一起由get_stats给出，
+    用于区分吞吐下降来自线路（短帧、重同步、坏终止符）还是来自程序（缓冲区溢出丢弃）。
+    """
+
+    def __init__(self, frame_buffer=None, payload_length=FRAME_PAYLOAD_SIZE, trailer=b'',
+                 max_saturated_fraction=DEFAULT_MAX_SATURATED_FRACTION):
+        """
+        Args:
+            frame_buffer (FrameBuffer): 本端口的接收缓冲区（统计重同步和丢弃字节）
+            payload_length (int): 帧负载长度
+            trailer (bytes): 帧尾终止符，空表示设备不发送终止符
+            max_saturated_fraction (float): 合理性检查的饱和点比例上限，None表示不检查
+        """
+        self.frame_buffer = frame_buffer
+        self.payload_length = payload_length
+        self.trailer = bytes(trailer)
+        self.frame_length = payload_length + len(self.trailer)
+        self.max_saturated = None if max_saturated_fraction is None else int(payload_length * max_saturated_fraction)
+        self.reset()
+
+    def reset(self):
+        """清零计数"""
+        self.valid_frames = 0
+        self.short_frames = 0
+        self.long_frames = 0
+        self.trailer_errors = 0
+        self.implausible_frames = 0
+
+    def validate(self, frame):
+        """
+        校验一帧
+
+        Args:
+            frame (memoryview): FrameBuffer交出的帧内容（帧头之后）
+
+        Returns:
+            memoryview: 通过校验的负载（已去掉终止符），丢弃时返回None
+        """
+        length = len(frame)
+        if length != self.frame_length:
+            if length < self.frame_length:
+                self.short_frames += 1
+            else:
+                self.long_frames += 1
+            return None
+
+        if self.trailer:
+            if frame[self.payload_length:] != self.trailer:
+                self.trailer_errors += 1
+                return None
+            frame = frame[:self.payload_length]
+
+        if self.max_saturated is not None:
+            if np.count_nonzero(np.frombuffer(frame, dtype=np.uint8) == 255) > self.max_saturated:
+                self.implausible_frames += 1
+
+        self.valid_frames += 1
+        return frame
+
+    @property
+    def rejected_frames(self):
+        return self.short_frames + self.long_frames + self.trailer_errors
+
+    def get_stats(self):
+        """
+        完整性统计
+
+        Returns:
+            dict: valid/short/long/trailer_errors/implausible帧数，
+                  以及接收缓冲区的resyncs/dropped_bytes/received_bytes
+        """
+        buffer = self.frame_buffer
+        truncated = buffer.truncated_count if buffer is not None else 0
+        return {
+            'valid_frames': self.valid_frames,
+            'short_frames': self.short_frames + truncated,
+            'long_frames': self.long_frames,
+            'trailer_errors': self.trailer_errors,
+            'implausible_frames': self.implausible_frames,
+            'resyncs': buffer.resync_count if buffer is not None else 0,
+            'dropped_bytes': buffer.dropped_bytes if buffer is not None else 0,
+            'received_bytes': buffer.received_bytes if buffer is not None else 0
+        }
+
+
+def summarize_integrity(port_stats):
+    """
+    汇总多个端口的完整性统计
+
+    Args:
+        port_stats (dict): {端口: get_stats()结果}
+
+    Returns:
+        dict: 各计数之和
+    """
+    total = {}
+    for stats in port_stats.values():
+        for key, value in stats.items():
+            total[key] = total.get(key, 0) + value
+    return total
+
+
+def format_integrity(stats):
+    """完整性统计的单行描述（日志使用）"""
+    return (f"有效 {stats.get('valid_frames', 0)}  短帧 {stats.get('short_frames', 0)}  "
+            f"长帧 {stats.get('long_frames', 0)}  终止符错误 {stats.get('trailer_errors', 0)}  "
+            f"异常帧 {stats.get('implausible_frames', 0)}  重同步 {stats.get('resyncs', 0)}  "
+            f"丢弃字节 {stats.get('dropped_bytes', 0)}")
@@ -12,16 +12,21 @@ from datetime import datetime
 import sys
 import os
 import numpy as np
+from functools import partial
 
 # 导入单串口接口
 from serial_interface import SerialInterface
-from date import find_available_ports, test_port_connection
+from date import find_available_ports
 from data_processor import DataProcessor
+from frame_pool import FramePool
+from frame_queue import LatestFrameQueue, RecordingLane
+from frame_synchronizer import FrameSynchronizer
+from frame_validator import summarize_integrity
 
 class MultiPortInterface:
     """多串口接口类 - 处理多个COM口的步道设备"""
     
-    def __init__(self, port_configs, baudrate=1000000):
+    def __init__(self, port_configs, baudrate=1000000, queue_maxsize=16, sync_tolerance_ms=10.0):
         """
         初始化多串口接口
         
@@ -29,18 +34,24 @@ class MultiPortInterface:
             port_configs (list): 端口配置列表
                 [{'port': 'COM3', 'device_id': 0}, {'port': 'COM4', 'device_id': 1}]
             baudrate (int): 波特率，默认1000000
+            queue_maxsize (int): 合并帧显示队列的最大长度，满时覆盖最旧帧
+            sync_tolerance_ms (float): 各设备帧的最大允许时间差（毫秒）
         """
         self.baudrate = baudrate
         self.port_configs = port_configs
         self.serial_interfaces = {}
         self.is_running = False
-        self.combined_data_queue = queue.Queue()
+        self.combined_data_queue = LatestFrameQueue(queue_maxsize)
+        self.recording_lane = RecordingLane()  # 记录专用无损通道
+        self.frame_listeners = []  # 新合并帧回调（在合并线程中调用）
         self.frame_count = 0
         
         # 数据同步相关
-        self.device_data_buffers = {}  # 各设备的数据缓冲区
         self.device_frame_counts = {}  # 各设备的帧计数
-        self.sync_lock = threading.Lock()
+        self.sync_tolerance_ms = sync_tolerance_ms
+        # 按采集时间戳对齐各设备帧，各设备新帧到达时由接收线程直接放入
+        self.frame_synchronizer = FrameSynchronizer(
+            [config['device_id'] for config in port_configs], sync_tolerance_ms)
         
         # 预期设备数量
         self.expected_devices = len(port_configs)
@@ -49,6 +60,9 @@ class MultiPortInterface:
         # 帧头定义
         self.FRAME_HEADER = [0xAA, 0x55, 0x03, 0x99]
         
+        # 合并帧的预分配帧池（各设备段依次写入）
+        self.frame_pool = FramePool(32, 32 * self.expected_devices)
+        
         # 初始化数据处理器用于JQ转化
         self.data_processor = DataProcessor(32, 32)  # 每个设备都是32x32
         
@@ -63,19 +77,20 @@ class MultiPortInterface:
             device_id = config['device_id']
             
             try:
-                # 测试端口
-                if not test_port_connection(port_name, self.baudrate):
+                # 创建串口接口
+                serial_interface = SerialInterface(self.baudrate)
+                
+                # 测试端口（虚拟端口无需测试）
+                if not serial_interface.test_port(port_name):
                     print(f"❌ 端口 {port_name} (设备{device_id}) 测试失败")
                     continue
                 
-                # 创建串口接口
-                serial_interface = SerialInterface(self.baudrate)
                 serial_interface.set_device_mode("single")  # 每个端口都是单设备模式
+                serial_interface.add_frame_listener(partial(self._on_device_frame, device_id))
                 
                 # 连接端口
                 if serial_interface.connect(port_name):
                     self.serial_interfaces[device_id] = serial_interface
-                    self.device_data_buffers[device_id] = None
                     self.device_frame_counts[device_id] = 0
                     success_count += 1
                     print(f"✅ 设备{device_id} 连接成功: {port_name}")
@@ -110,90 +125,59 @@ class MultiPortInterface:
         
         while self.is_running:
             try:
-                # 从各个设备收集数据
-                all_devices_ready = True
-                collected_data = {}
-                collected_timestamps = {}
-                
-                with self.sync_lock:
-                    for device_id in self.serial_interfaces:
-                        serial_interface = self.serial_interfaces[device_id]
-                        
-                        # 尝试获取数据
-                        frame_data = serial_interface.get_data()
-                        
-                        if frame_data and len(frame_data['data']) == self.expected_frame_size:
-                            # 收到有效的1024字节数据
-                            collected_data[device_id] = frame_data['data']
-                            collected_timestamps[device_id] = frame_data['timestamp']
-                            self.device_frame_counts[device_id] += 1
-                        else:
-                            # 该设备暂无数据
-                            all_devices_ready = False
-                            break
-                
-                # 检查是否所有设备都有数据
-                if all_devices_ready and len(collected_data) == self.expected_devices:
-                    # 先对每个1024字节数据进行JQ转化，然后合并
-                    combined_data = bytearray()
-                    jq_transform_results = []
+                # 等待一组时间对齐的帧（所有设备都有新帧时才唤醒，不再轮询）
+                match = self.frame_synchronizer.wait_for_match(timeout=0.1)
+                if match is not None:
+                    collected_data, collected_timestamps = match
                     
-                    # 按设备ID顺序处理和合并数据
-                    for device_id in sorted(collected_data.keys()):
-                        raw_data = collected_data[device_id]
-                        
-                        try:
-                            # 对每个1024字节数据进行JQ转化
-                            if len(raw_data) == 1024:
-                                # 转换为numpy数组
-                                data_array = np.frombuffer(raw_data, dtype=np.uint8)
-                                # 应用JQ转化
-                                transformed_data = self.data_processor.jqbed_transform(data_array)
-                                # 转换回字节
-                                transformed_bytes = transformed_data.astype(np.uint8).tobytes()
-                                combined_data.extend(transformed_bytes)
-                                jq_transform_results.append(f"设备{device_id}: JQ转化成功")
-                            else:
-                                # 数据长度不是1024，直接使用原始数据
-                                combined_data.extend(raw_data)
-                                jq_transform_results.append(f"设备{device_id}: 跳过JQ转化(长度{len(raw_data)})")
-                                
-                        except Exception as e:
-                            # JQ转化失败，使用原始数据
-                            combined_data.extend(raw_data)
-                            jq_transform_results.append(f"设备{device_id}: JQ转化失败({str(e)[:30]})")
+                    # 按设备ID顺序，各设备数据一次取数完成JQ转化并左右拼接，直接写入帧池槽位
+                    # （与SerialInterface多端口合并的32x64/32x96布局一致）
+                    device_ids = sorted(collected_data.keys())
+                    slot = self.frame_pool.acquire()
+                    self.data_processor.jq_stitch_segments(
+                        [collected_data[device_id] for device_id in device_ids],
+                        out=self.frame_pool.frame(slot))
+                    segment_offset = len(device_ids) * 1024
                     
-                    # 生成合并后的帧数据
+                    # 发布合并后的帧数据
                     self.frame_count += 1
-                    combined_frame = {
-                        'data': bytes(combined_data),
-                        'timestamp': max(collected_timestamps.values()),  # 使用最新时间戳
-                        'frame_number': self.frame_count,
-                        'data_length': len(combined_data),
-                        'device_frames': self.expected_devices,
-                        'device_type': f"{self.expected_devices}x1024_multi_port",
-                        'source_devices': list(collected_data.keys()),
-                        'jq_transform_results': jq_transform_results  # JQ转化结果信息
-                    }
+                    combined_frame = self.frame_pool.publish(slot, segment_offset, self.frame_count,
+                                                             max(collected_timestamps.values()))  # 使用最新时间戳
+                    combined_frame['device_frames'] = self.expected_devices
+                    combined_frame['device_type'] = f"{self.expected_devices}x1024_multi_port"
+                    combined_frame['source_devices'] = list(collected_data.keys())
                     
-                    # 放入合并数据队列
-                    self.combined_data_queue.put(combined_frame)
+                    # 放入合并数据队列、记录通道和新帧回调
+                    self._publish_frame(combined_frame)
                     
                     # 调试输出
                     if self.frame_count % 100 == 0:  # 每100帧输出一次
-                        jq_success_count = len([r for r in jq_transform_results if "JQ转化成功" in r])
                         print(f"📊 已合并 {self.frame_count} 帧数据 "
-                              f"({self.expected_devices}个设备, 总长度: {len(combined_data)}字节, "
-                              f"JQ转化: {jq_success_count}/{self.expected_devices})")
-                
-                # 短暂休眠，避免CPU占用过高
-                time.sleep(0.001)
+                              f"({self.expected_devices}个设备, 总长度: {segment_offset}字节)")
                 
             except Exception as e:
                 if self.is_running:
                     print(f"❌ 数据合并错误: {e}")
                 time.sleep(0.01)
     
+    def add_frame_listener(self, callback):
+        """注册新合并帧回调，callback(frame_data)在合并线程中调用，应尽快返回"""
+        self.frame_listeners.append(callback)
+    
+    def _publish_frame(self, frame_data):
+        """发布一帧合并数据到显示队列、记录通道和新帧回调"""
+        self.combined_data_queue.put(frame_data)
+        self.recording_lane.put(frame_data)
+        for listener in self.frame_listeners:
+            listener(frame_data)
+    
+    def _on_device_frame(self, device_id, frame_data):
+        """设备新帧回调（在该设备的接收线程中调用）：按采集时间戳放入同步器"""
+        if len(frame_data['data']) == self.expected_frame_size:
+            # 收到有效的1024字节数据
+            self.frame_synchronizer.push(device_id, frame_data['timestamp'], frame_data['data'])
+            self.device_frame_counts[device_id] = self.device_frame_counts.get(device_id, 0) + 1
+    
     def get_combined_data(self, timeout=0.1):
         """获取合并后的数据"""
         try:
@@ -203,14 +187,62 @@ class MultiPortInterface:
     
     def get_multiple_combined_data(self, max_count=5):
         """批量获取多个合并数据帧"""
-        data_list = []
-        try:
-            for _ in range(max_count):
-                data = self.combined_data_queue.get_nowait()
-                data_list.append(data)
-        except queue.Empty:
-            pass
-        return data_list
+        return self.combined_data_queue.get_many(max_count)
+    
+    def get_latest_data(self):
+        """获取最新的合并帧，丢弃积压的旧帧"""
+        return self.combined_data_queue.get_latest()
+    
+    def wait_latest_data(self, timeout=None):
+        """阻塞等待新帧并取出最新一帧（处理线程使用），超时返回None"""
+        return self.combined_data_queue.wait_latest(timeout)
+    
+    def wake_data_waiters(self):
+        """唤醒阻塞在wait_latest_data上的线程"""
+        self.combined_data_queue.wake()
+    
+    def get_queue_stats(self):
+        """获取合并队列统计：丢弃/合并/交付帧数及记录通道状态"""
+        stats = self.combined_data_queue.get_stats()
+        stats['recording'] = self.recording_lane.active
+        stats['recorded'] = self.recording_lane.recorded_count
+        stats['recording_pending'] = self.recording_lane.pending()
+        return stats
+    
+    def start_recording(self):
+        """开启无损记录通道"""
+        self.recording_lane.start()
+    
+    def stop_recording(self):
+        """关闭无损记录通道"""
+        self.recording_lane.stop()
+    
+    def get_recording_data(self, max_count=None):
+        """取出记录通道中待写入的帧"""
+        return self.recording_lane.get_all(max_count)
+    
+    def set_sync_tolerance(self, tolerance_ms):
+        """设置各设备帧同步的最大允许时间差（毫秒）"""
+        self.sync_tolerance_ms = tolerance_ms
+        if self.frame_synchronizer:
+            self.frame_synchronizer.set_tolerance(tolerance_ms)
+    
+    def get_sync_stats(self):
+        """获取帧同步统计（时间差、匹配/丢弃帧数）"""
+        if self.frame_synchronizer:
+            return self.frame_synchronizer.get_stats()
+        return None
+    
+    def get_integrity_stats(self):
+        """各端口的帧完整性统计 {端口: 统计}"""
+        stats = {}
+        for serial_interface in self.serial_interfaces.values():
+            stats.update(serial_interface.get_integrity_stats())
+        return stats
+    
+    def get_integrity_summary(self):
+        """所有端口完整性统计之和"""
+        return summarize_integrity(self.get_integrity_stats())
     
     def get_frame_count(self):
         """获取合并帧计数"""
@@ -240,6 +272,7 @@ class MultiPortInterface:
     def disconnect_all(self):
         """断开所有设备连接"""
         self.is_running = False
+        self.frame_synchronizer.wake()
         
         for device_id, serial_interface in self.serial_interfaces.items():
             try:
@@ -249,7 +282,6 @@ class MultiPortInterface:
                 print(f"❌ 设备{device_id} 断开连接时出错: {e}")
         
         self.serial_interfaces.clear()
-        self.device_data_buffers.clear()
         self.device_frame_counts.clear()
         
         print("🔚 所有设备已断开连接")
@@ -344,12 +376,10 @@ def test_multi_port_interface():
             while time.time() - start_time < test_duration:
                 combined_data = multi_interface.get_combined_data()
                 if combined_data:
-                    jq_results = combined_data.get('jq_transform_results', [])
-                    jq_success_count = len([r for r in jq_results if "JQ转化成功" in r])
+                    # JQ转化与拼接对所有来源设备一次完成（失败时整帧不发布）
                     print(f"📨 收到合并数据: {combined_data['data_length']}字节, "
                           f"帧#{combined_data['frame_number']}, "
-                          f"来源设备: {combined_data['source_devices']}, "
-                          f"JQ转化: {jq_success_count}/{len(combined_data['source_devices'])}")
+                          f"来源设备: {combined_data['source_devices']}")
                 
                 time.sleep(0.1)
             
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+压力叠加层模块 - 实时压力中心(CoP)、CoP轨迹和左右接触区域，供热力图叠加显示
+"""
+
+import time
+
+import numpy as np
+
+class CopTrail:
+    """最近trail_seconds秒的CoP轨迹
+
+    位置和时间存放在容量固定的环形数组中，长时间运行内存不增长；
+    容量不足时最旧的点被覆盖（轨迹变短但不丢最新点）。
+    """
+
+    def __init__(self, trail_seconds=2.0, capacity=256):
+        self.trail_seconds = trail_seconds
+        self.capacity = capacity
+        self._points = np.empty((capacity, 2), dtype=np.float64)
+        self._times = np.empty(capacity, dtype=np.float64)
+        self.reset()
+
+    def reset(self):
+        self._next = 0
+        self._count = 0
+
+    def append(self, x, y, timestamp):
+        index = self._next
+        self._points[index, 0] = x
+        self._points[index, 1] = y
+        self._times[index] = timestamp
+        self._next = (index + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def recent(self, now):
+        """
+        按时间顺序返回最近trail_seconds秒内的点
+
+        Returns:
+            np.ndarray: (N, 2) [列, 行] 副本
+        """
+        count = self._count
+        if count == 0:
+            return np.empty((0, 2), dtype=np.float64)
+        order = (np.arange(self._next - count, self._next)) % self.capacity
+        keep = order[self._times[order] >= now - self.trail_seconds]
+        return self._points[keep]
+
+
+def contact_boxes(matrix_2d, split_axis=1):
+    """
+    左右两侧接触区域的外接矩形
+
+    按行/列投影（每侧一次求和）得到有压力的行列范围，不做逐点轮廓搜索。
+
+    Args:
+        matrix_2d (np.ndarray): (rows, cols) 压力矩阵（已扣除基线，0表示无接触）
+        split_axis (int): 1表示按列左右对半分（单块平台），0表示按行分（步道横向为左右）
+
+    Returns:
+        list: [(row0, row1, col0, col1) 或 None, ...]，依次为左、右，坐标为格（闭区间）
+    """
+    rows, cols = matrix_2d.shape
+    if split_axis == 1:
+        middle = cols // 2
+        halves = ((matrix_2d[:, :middle], 0, 0), (matrix_2d[:, middle:], 0, middle))
+    else:
+        middle = rows // 2
+        halves = ((matrix_2d[:middle], 0, 0), (matrix_2d[middle:], middle, 0))
+
+    boxes = []
+    for half, row_offset, col_offset in halves:
+        row_profile = np.flatnonzero(half.any(axis=1))
+        if row_profile.size == 0:
+            boxes.append(None)
+            continue
+        col_profile = np.flatnonzero(half[row_profile[0]:row_profile[-1] + 1].any(axis=0))
+        boxes.append((row_offset + int(row_profile[0]), row_offset + int(row_profile[-1]),
+                      col_offset + int(col_profile[0]), col_offset + int(col_profile[-1])))
+    return boxes
+
+
+class PressureOverlayTracker:
+    """每帧叠加层数据
+
+    CoP直接取融合统计（frame_statistics的一阶矩）中的cop_x/cop_y，不再重新遍历矩阵；
+    接触区域由contact_boxes的行列投影得到。左右划分：宽阵列（步道）按行，其余按列。
+    处理线程调用update，结果中的轨迹为独立副本，可直接交给Tk线程。
+    """
+
+    def __init__(self, trail_seconds=2.0, capacity=256):
+        self.trail = CopTrail(trail_seconds, capacity)
+        self._shape = None
+
+    def reset(self):
+        """清空轨迹（切换设备/阵列大小时调用）"""
+        self.trail.reset()
+
+    def update(self, matrix_2d, statistics, now=None):
+        """
+        Args:
+            matrix_2d (np.ndarray): (rows, cols) 压力矩阵
+            statistics (dict): 统计字典（含cop_x/cop_y，无压力时为NaN）
+            now (float): 时间（秒，perf_counter），默认取当前时间
+
+        Returns:
+            dict: cop为(列, 行)或None，trail为(N, 2)数组，contacts为左右外接矩形
+        """
+        if now is None:
+            now = time.perf_counter()
+        if matrix_2d.shape != self._shape:
+            self._shape = matrix_2d.shape
+            self.trail.reset()
+
+        cop = None
+        cop_x = statistics.get('cop_x', float('nan'))
+        cop_y = statistics.get('cop_y', float('nan'))
+        if np.isfinite(cop_x) and np.isfinite(cop_y):
+            cop = (cop_x, cop_y)
+            self.trail.append(cop_x, cop_y, now)
+
+        rows, cols = matrix_2d.shape
+        return {
+            'cop': cop,
+            'trail': self.trail.recent(now),
+            'contacts': contact_boxes(matrix_2d, split_axis=0 if cols > rows else 1)
+        }
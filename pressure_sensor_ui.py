@@ -12,12 +12,20 @@ import time
 import os
 import json
 import sqlite3
+import configparser
+import multiprocessing
 from datetime import datetime
 
 # 导入自定义模块
 from serial_interface import SerialInterface
 from data_processor import DataProcessor
-from visualization import HeatmapVisualizer
+from calibration import CalibrationStore
+from frame_processing import FrameProcessingThread, TickTimer
+from frame_smoothing import GaussianSmoother
+from pressure_overlay import PressureOverlayTracker
+from frame_validator import format_integrity
+from render_governor import RenderGovernor
+from visualization import HEATMAP_BACKENDS, create_heatmap_visualizer
 from device_config import DeviceConfigDialog, DeviceManager
 from patient_manager_ui import PatientManagerDialog
 from sarcopenia_database import db
@@ -35,6 +43,62 @@ except ImportError as e:
     log_warn(f"SarcNeuro Edge 功能不可用: {e}", "INTEGRATION")
     SARCNEURO_AVAILABLE = False
 
+def load_display_config(config_file='config.ini'):
+    """读取config.ini中的[DISPLAY]显示配置"""
+    config = configparser.ConfigParser()
+    display_config = {
+        'threaded_processing': True,
+        'heatmap_backend': 'matplotlib',
+        'adaptive_render': True,
+        'target_latency_ms': 50.0,
+        'smoothing': True,
+        'smooth_sigma': 0.8,
+        'overlay': True,
+        'cop_trail_seconds': 2.0
+    }
+    try:
+        if os.path.exists(config_file):
+            config.read(config_file, encoding='utf-8')
+            if 'DISPLAY' in config:
+                section = config['DISPLAY']
+                display_config['threaded_processing'] = section.getboolean('threaded_processing', True)
+                backend = section.get('heatmap_backend', 'matplotlib').strip().lower()
+                if backend in HEATMAP_BACKENDS:
+                    display_config['heatmap_backend'] = backend
+                else:
+                    print(f"[WARN] 未知的热力图后端 {backend}，使用matplotlib")
+                display_config['adaptive_render'] = section.getboolean('adaptive_render', True)
+                display_config['target_latency_ms'] = section.getfloat('target_latency_ms', 50.0)
+                display_config['smoothing'] = section.getboolean('smoothing', True)
+                display_config['smooth_sigma'] = section.getfloat('smooth_sigma', 0.8)
+                display_config['overlay'] = section.getboolean('overlay', True)
+                display_config['cop_trail_seconds'] = section.getfloat('cop_trail_seconds', 2.0)
+    except Exception as e:
+        print(f"[WARN] 读取显示配置失败，使用默认配置: {e}")
+    return display_config
+
+def load_ingest_config(config_file='config.ini'):
+    """读取config.ini中的[INGEST]串口接收配置"""
+    config = configparser.ConfigParser()
+    ingest_config = {
+        'backend': 'thread',
+        'frame_terminator': False
+    }
+    try:
+        if os.path.exists(config_file):
+            config.read(config_file, encoding='utf-8')
+            if 'INGEST' in config:
+                section = config['INGEST']
+                backend = section.get('backend', 'thread').strip().lower()
+                if backend in ('thread', 'process'):
+                    ingest_config['backend'] = backend
+                else:
+                    print(f"[WARN] 未知的接收后端 {backend}，使用thread")
+                ingest_config['frame_terminator'] = section.getboolean('frame_terminator', False)
+    except Exception as e:
+        print(f"[WARN] 读取接收配置失败，使用默认配置: {e}")
+    return ingest_config
+
 class PressureSensorUI:
     """主UI控制器类"""
     
@@ -66,9 +130,13 @@ class PressureSensorUI:
         self._cleanup_expired_sessions()
         
         # 初始化多设备管理器
-        self.device_manager = DeviceManager()
-        self.serial_interface = None  # 将根据当前设备动态获取
         self.data_processor = DataProcessor(array_rows=32, array_cols=32)
+        self.ingest_config = load_ingest_config()
+        self.device_manager = DeviceManager(data_processor=self.data_processor,
+                                            ingest_backend=self.ingest_config['backend'],
+                                            frame_terminator=self.ingest_config['frame_terminator'])
+        self.serial_interface = None  # 将根据当前设备动态获取
+        self.calibration_store = CalibrationStore("device_config.db")  # 设备压力标定
         self.visualizer = None  # 在UI设置后创建
         
         # 设备配置状态
@@ -97,6 +165,29 @@ class PressureSensorUI:
         
         # 活动的检测向导引用
         self._active_detection_wizard = None
+        self._recording_sink = None  # 本次记录的CSV写入回调（绑定开始记录时的数据文件）
+        
+        # 帧处理：默认在独立线程中完成，Tk主线程只取最新结果显示
+        self.display_config = load_display_config()
+        self.threaded_processing = self.display_config['threaded_processing']
+        self.processing_thread = FrameProcessingThread(
+            self.data_processor, lambda: self.device_manager.current_pipeline)
+        if self.threaded_processing and self.display_config['smoothing']:
+            # 显示平滑在处理线程中完成
+            self.processing_thread.smoother = GaussianSmoother(self.display_config['smooth_sigma'])
+        # 热力图叠加层（CoP点、CoP轨迹、左右接触框），线程模式下在处理线程中计算
+        self.overlay_tracker = None
+        if self.display_config['overlay']:
+            self.overlay_tracker = PressureOverlayTracker(trail_seconds=self.display_config['cop_trail_seconds'])
+            if self.threaded_processing:
+                self.processing_thread.overlay_tracker = self.overlay_tracker
+        self.tick_timer = TickTimer()  # 主线程每次update_data的耗时
+        # 自适应节拍：按实测耗时调整轮询间隔和渲染抽帧，关闭时使用固定的22ms/33ms
+        self.render_governor = None
+        if self.display_config['adaptive_render']:
+            self.render_governor = RenderGovernor(target_latency_ms=self.display_config['target_latency_ms'])
+        self._last_tick_report = time.time()
+        self._last_integrity_errors = {}  # 各端口上次报告时的坏帧数
         
         # 界面设置
         self.setup_ui()
@@ -524,6 +615,12 @@ class PressureSensorUI:
                     # 自动根据设备类型配置数组大小
                     self.auto_config_array_size(device_info['array_size'])
                     
+                    # 加载设备压力标定，零漂基线按新设备重新估计
+                    self.apply_device_calibration(device_id)
+                    self.data_processor.reset_baseline()
+                    if self.overlay_tracker is not None:
+                        self.overlay_tracker.reset()
+                    
                     # 强制更新热力图显示区域
                     if self.visualizer and hasattr(self.visualizer, 'canvas'):
                         # 确保画布更新
@@ -1009,6 +1106,7 @@ class PressureSensorUI:
    • 平均值：所有传感器点的平均压力
    • 标准差：压力分布的离散程度
    • 有效点：非零压力点的数量
+   • 最大压力/平均压力：按设备标定换算的物理压力
 
 数据日志区域
    • 实时显示接收到的数据帧信息
@@ -1234,7 +1332,7 @@ class PressureSensorUI:
         specs_text = """
 通信参数: 串口通信，波特率1,000,000 bps，帧头AA 55 03 99
 阵列规格: 支持32×32(1024点)、32×64(2048点)、32×96(3072点)
-数据精度: 8位无符号整数 (0-255)，压力范围0-60mmHg
+数据精度: 8位无符号整数 (0-255)，按设备标定查找表换算，未标定时0-255对应0-60mmHg
 刷新性能: 标准20FPS/快速100FPS/极速200FPS三种模式
 系统要求: Windows 10/11，Python 3.7+，4GB内存，USB端口
 数据处理: JQ变换算法，NumPy向量化计算，多线程架构
@@ -1435,7 +1533,8 @@ class PressureSensorUI:
         
         self.stats_labels = {}
         stats_items = [("最大值:", "max_value"),  ("平均值:", "mean_value"), 
-                       ("标准差:", "std_value"), ("有效点:", "nonzero_count")]
+                       ("标准差:", "std_value"), ("有效点:", "nonzero_count"),
+                       ("最大压力:", "max_pressure"), ("平均压力:", "mean_pressure")]
         
         for i, (text, key) in enumerate(stats_items):
             row = i // 2
@@ -1500,6 +1599,11 @@ class PressureSensorUI:
                                       font=('Microsoft YaHei UI', 9))
         self.data_rate_label.pack(side=tk.RIGHT, padx=(0, 15), pady=8)
         
+        self.render_rate_label = tk.Label(status_bg, text="",
+                                        bg='#ffffff', fg='#495057',
+                                        font=('Microsoft YaHei UI', 9))
+        self.render_rate_label.pack(side=tk.RIGHT, padx=(0, 15), pady=8)
+        
         # 启动状态指示器
         self.status_bar = tk.Label(status_bg, text="🔄 正在启动系统...",
                                  bg='#ffffff', fg='#007bff',
@@ -1509,11 +1613,16 @@ class PressureSensorUI:
     def setup_visualizer(self):
         """设置可视化模块"""
         array_info = self.data_processor.get_array_info()
-        self.visualizer = HeatmapVisualizer(
+        self.visualizer = create_heatmap_visualizer(
             self.plot_frame, 
             array_rows=array_info['rows'], 
-            array_cols=array_info['cols']
+            array_cols=array_info['cols'],
+            backend=self.display_config['heatmap_backend']
         )
+        self.visualizer.set_calibration(self.data_processor.calibration)
+        # 线程模式下处理线程已给出平滑后的display_matrix，可视化器不再重复平滑
+        self.visualizer.set_smoothing(self.display_config['smoothing'] and not self.threaded_processing,
+                                      self.display_config['smooth_sigma'])
         
         # 延迟触发布局更新，确保窗口最大化完成后热力图获取正确尺寸
         def trigger_resize():
@@ -1550,6 +1659,17 @@ class PressureSensorUI:
         # 延迟500ms执行，等待窗口最大化完全完成
         self.root.after(500, trigger_resize)
         
+    def apply_device_calibration(self, device_id):
+        """加载设备的压力标定（查找表+逐点增益/偏移），未标定时使用默认线性换算"""
+        calibration = self.calibration_store.get_calibration(device_id)
+        self.data_processor.set_calibration(calibration)
+        if self.visualizer is not None:
+            self.visualizer.set_calibration(calibration)
+        
+        if calibration.source == 'database':
+            cell_maps = " + 逐点增益/偏移" if calibration.has_cell_maps else ""
+            self.log_message(f"[OK] 已加载设备压力标定: {calibration.unit}{cell_maps}")
+    
     def auto_config_array_size(self, array_size_str):
         """自动配置数组大小"""
         try:
@@ -1667,66 +1787,117 @@ class PressureSensorUI:
         
     def start_update_loop(self):
         """启动数据更新循环"""
+        if self.threaded_processing:
+            self.processing_thread.start()
         self.update_data()
         
+    def _take_processed_frame(self):
+        """线程模式：取处理线程发布的最新结果（数据来源随当前设备的接口切换）"""
+        if self.processing_thread.interface is not self.serial_interface:
+            self.processing_thread.attach(self.serial_interface)
+        return self.processing_thread.take_latest()
+        
+    def _process_latest_frame(self):
+        """主线程模式：取最新帧并在主线程中处理"""
+        # 只取最新帧，积压的旧帧由有界队列计入合并丢弃统计
+        frame_data = self.serial_interface.get_latest_data()
+        if frame_data is None:
+            return None
+        
+        # 设备的阵列布局、JQ变换和缓冲区在切换设备时已确定（见DeviceManager.switch_device）
+        pipeline = self.device_manager.current_pipeline
+        if pipeline is not None:
+            return pipeline.process(frame_data)
+        return self.data_processor.process_frame_data(frame_data, True)
+        
+    def _report_tick_time(self):
+        """每30秒在控制台输出一次主线程每次更新的耗时分布"""
+        current_time = time.time()
+        if current_time - self._last_tick_report < 30:
+            return
+        self._last_tick_report = current_time
+        
+        tick_stats = self.tick_timer.get_stats()
+        mode = "处理线程" if self.threaded_processing else "主线程处理"
+        message = (f"[PERF] 主线程每次更新耗时({mode}): p50 {tick_stats['p50_ms']:.2f} ms  "
+                   f"p95 {tick_stats['p95_ms']:.2f} ms  max {tick_stats['max_ms']:.2f} ms")
+        if self.threaded_processing:
+            thread_stats = self.processing_thread.get_stats()
+            message += (f"  | 处理线程每帧 p50 {thread_stats['process_time']['p50_ms']:.2f} ms  "
+                        f"显示未取走被覆盖 {thread_stats['superseded']}")
+        if self.visualizer:
+            render_stats = self.visualizer.get_render_stats()
+            message += (f"  | 渲染 {render_stats['fps']:.1f} FPS  每帧 p50 {render_stats['render_p50_ms']:.2f} ms  "
+                        f"p95 {render_stats['render_p95_ms']:.2f} ms  "
+                        f"({self._render_mode_label(render_stats)})")
+        if self.render_governor is not None:
+            governor_stats = self.render_governor.get_stats()
+            message += (f"  | 节拍 刷新 {governor_stats['poll_ms']:.0f} ms  渲染间隔 {governor_stats['render_interval_ms']:.0f} ms  "
+                        f"调度延迟 {governor_stats['lag_ms']:.1f} ms  退避 {governor_stats['backoffs']} 次 ({governor_stats['reason']})")
+        print(message)
+        self._report_frame_integrity()
+    
+    @staticmethod
+    def _render_mode_label(render_stats):
+        if render_stats.get('backend') == 'photoimage':
+            return 'PhotoImage'
+        return '局部重绘' if render_stats['blit'] else '整图重绘'
+    
+    def _report_frame_integrity(self):
+        """输出各端口的帧完整性统计，有新增坏帧/重同步/丢弃字节时写入日志"""
+        get_integrity_stats = getattr(self.serial_interface, 'get_integrity_stats', None)
+        if get_integrity_stats is None:
+            return
+        for port, stats in get_integrity_stats().items():
+            print(f"[PERF] 端口 {port} 帧完整性: {format_integrity(stats)}")
+            errors = (stats['short_frames'] + stats['long_frames'] + stats['trailer_errors'],
+                      stats['resyncs'], stats['dropped_bytes'])
+            last_errors = self._last_integrity_errors.get(port, (0, 0, 0))
+            # 重新连接后计数从0开始
+            increases = [current - last if current >= last else current
+                         for current, last in zip(errors, last_errors)]
+            if any(increases):
+                self.log_message(f"[WARN] 端口 {port} 接收异常（请检查线缆/接口）: "
+                                 f"坏帧 +{increases[0]}  重同步 +{increases[1]}  丢弃字节 +{increases[2]}")
+            self._last_integrity_errors[port] = errors
+        
     def update_data(self):
-        """数据更新循环 - 从串口接口获取数据并处理"""
+        """数据更新循环 - 取处理结果并刷新显示"""
+        tick_start = self.tick_timer.start()
+        render_ms = None
+        if self.render_governor is not None:
+            self.render_governor.tick_started()
         try:
             if self.is_running and self.serial_interface.is_connected():
-                # 使用批量获取，减少函数调用开销
-                frame_data_list = self.serial_interface.get_multiple_data(max_count=10)
+                # 记录通道与检测向导的记录状态保持一致
+                self._sync_recording_lane()
+                
+                if self.threaded_processing:
+                    processed_data = self._take_processed_frame()
+                else:
+                    processed_data = self._process_latest_frame()
                 
-                if frame_data_list:
+                if processed_data is not None:
                     # 更新数据接收时间
                     self.last_data_time = time.time()
                     self.device_lost_warned = False  # 重置警告状态
                     
-                    # 先检查设备信息并设置正确的数组大小
-                    device_info = self.device_manager.get_current_device_info()
-                    if device_info and device_info.get('com_ports', 1) > 1:
-                        # 多端口设备，先设置正确的数组大小
-                        com_ports = device_info.get('com_ports', 1)
-                        if com_ports == 2:
-                            self.data_processor.set_array_size(32, 64)  # 32x64: 左右拼接两个32x32
-                        elif com_ports == 3:
-                            self.data_processor.set_array_size(32, 96)  # 32x96: 左右拼接三个32x32
-                    
-                    # 只处理最新的帧，丢弃过旧的数据以减少延迟
-                    frame_data = frame_data_list[-1]  # 取最新帧
-                    
-                    # 调试：检查多端口设备的数据
-                    if device_info and device_info.get('com_ports', 1) > 1:
-                        com_ports = device_info.get('com_ports', 1)
-                        expected_length = com_ports * 1024
-                        actual_length = len(frame_data.get('data', b''))
-                            
-                    
-                    # 正确的JQ转换逻辑：
-                    # 单端口设备：这里需要JQ转换（原始数据→JQ转换→热力图）
-                    # 多端口设备：这里不需要JQ转换（已在合并时对每个端口进行了JQ转换）
-                    if device_info:
-                        com_ports = device_info.get('com_ports', 1)
-                        if com_ports == 1:
-                            enable_jq = True
-                            jq_reason = "单端口设备需要JQ转换"
-                        else:
-                            enable_jq = False
-                            jq_reason = f"多端口设备({com_ports}端口)已在合并时JQ转换"
-                    else:
-                        enable_jq = True
-                        jq_reason = "默认启用JQ转换"
-                    
-                    processed_data = self.data_processor.process_frame_data(frame_data, enable_jq)
-                    
-                    
                     if 'error' not in processed_data:
                         # 更新可视化显示
-                        matrix_2d = processed_data['matrix_2d']
+                        matrix_2d = processed_data.get('display_matrix', processed_data['matrix_2d'])
                         statistics = processed_data['statistics']
+                        overlay = processed_data.get('overlay')
+                        if overlay is None and self.overlay_tracker is not None:
+                            # 主线程处理模式
+                            overlay = self.overlay_tracker.update(processed_data['matrix_2d'], statistics)
                         
                         # 确保可视化器已初始化
                         if self.visualizer is not None:
-                            self.visualizer.update_data(matrix_2d, statistics)
+                            rendered_frames = self.visualizer.rendered_frames
+                            render_start = time.perf_counter_ns()
+                            self.visualizer.update_data(matrix_2d, statistics, overlay)
+                            if self.visualizer.rendered_frames != rendered_frames:
+                                render_ms = (time.perf_counter_ns() - render_start) / 1e6
                         elif not self._visualizer_initialized:
                             # 触发延迟初始化
                             self._lazy_init_visualizer()
@@ -1735,22 +1906,6 @@ class PressureSensorUI:
                         self.update_statistics_display(statistics)
                         self.log_processed_data(processed_data)
                         
-                        # 通知检测向导有新数据（如果向导正在运行且在记录数据）- 优化检查
-                        if hasattr(self, '_active_detection_wizard') and self._active_detection_wizard and getattr(self._active_detection_wizard, '_recording_data', False):
-                            # 只有在真正需要时才调用
-                            try:
-                                self._active_detection_wizard.write_csv_data_row(processed_data)
-                            except Exception as e:
-                                # 减少错误日志频率
-                                if not hasattr(self, '_wizard_error_count'):
-                                    self._wizard_error_count = 0
-                                self._wizard_error_count += 1
-                                if self._wizard_error_count % 100 == 0:  # 每100次错误才记录一次
-                                    self.log_ai_message(f"[WARNING] 向导数据写入错误: {e}")
-                        
-                        # 显示丢弃的帧数（如果有）- 已禁用日志
-                        dropped_frames = len(frame_data_list) - 1
-                        # 移除丢帧日志信息，避免日志冗余
                     else:
                         # 详细的错误调试信息
                         error_msg = processed_data['error']
@@ -1773,6 +1928,7 @@ class PressureSensorUI:
                                 self.log_message(f"[DEBUG] Data type: {type(data_sample)}")
                         
                         # 获取当前设备信息
+                        device_info = self.device_manager.get_current_device_info()
                         if device_info:
                             self.log_message(f"[DEBUG] Device info - ports: {device_info.get('com_ports', 1)}, "
                                            f"array_size: {device_info.get('array_size', 'unknown')}")
@@ -1780,14 +1936,91 @@ class PressureSensorUI:
                         # 获取数据处理器状态
                         self.log_message(f"[DEBUG] Processor - array: {self.data_processor.array_rows}x{self.data_processor.array_cols}")
                 
+                # 记录通道中的每一帧都写入CSV（不受显示丢帧影响；线程模式下由处理线程写入）
+                if not self.threaded_processing:
+                    self._write_recording_frames()
+                
                 # 计算数据速率
                 self.calculate_data_rate()
                 
         except Exception as e:
             self.log_message(f"[ERROR] 更新数据时出错: {e}")
         
-        # 继续更新循环 (22ms ≈ 45 FPS，平衡性能和响应速度)
-        self.root.after(22, self.update_data)
+        tick_ns = self.tick_timer.stop(tick_start)
+        self._report_tick_time()
+        
+        # 继续更新循环 (基准22ms ≈ 45 FPS，启用自适应节拍时按实测耗时调整)
+        self.root.after(self._next_update_delay(tick_ns / 1e6, render_ms), self.update_data)
+    
+    def _next_update_delay(self, tick_ms, render_ms):
+        """把本次耗时交给节拍调节器，返回下一次update_data的间隔（毫秒）"""
+        governor = self.render_governor
+        if governor is None:
+            return 22
+        
+        governor.record_tick(tick_ms, render_ms)
+        if governor.adjust():
+            if self.visualizer is not None:
+                governor.apply(self.visualizer)
+            text = governor.describe()
+            if text != self.render_rate_label.cget('text'):
+                self.render_rate_label.config(text=text)
+        return governor.next_delay()
+    
+    def _sync_recording_lane(self):
+        """根据检测向导的记录状态开启/关闭串口接口的无损记录通道"""
+        wizard = self._active_detection_wizard
+        recording = bool(wizard and getattr(wizard, '_recording_data', False))
+        lane = getattr(self.serial_interface, 'recording_lane', None)
+        if lane is None or lane.active == recording:
+            return
+        if recording:
+            self._recording_sink = self._make_recording_sink(wizard)
+            self.serial_interface.start_recording()
+            if self.threaded_processing:
+                self.processing_thread.set_recording_sink(self._recording_sink)
+        else:
+            # 先关闭记录通道，再把通道中剩余的帧全部写入，最后才清除写入回调
+            self.serial_interface.stop_recording()
+            if self.threaded_processing:
+                self.processing_thread.finish_recording(self.serial_interface)
+            else:
+                self._write_recording_frames()
+            self._recording_sink = None
+    
+    @staticmethod
+    def _make_recording_sink(wizard):
+        """写入回调绑定开始记录时的数据文件，不依赖向导在Tk线程中切换的记录标志"""
+        data_file = getattr(wizard, 'current_data_file', None)
+        return lambda processed_list: wizard.write_csv_data_rows(processed_list, data_file=data_file)
+            
+    def _write_recording_frames(self):
+        """把记录通道中的全部帧处理后写入检测向导的CSV"""
+        sink = self._recording_sink
+        if sink is None:
+            return
+        
+        frames = self.serial_interface.get_recording_data()
+        if not frames:
+            return
+        
+        # 单端口设备需要JQ转换，多端口设备已在合并时转换（由当前设备的流水线确定）
+        pipeline = self.device_manager.current_pipeline
+        enable_jq = pipeline.enable_jq_transform if pipeline is not None else True
+        
+        # 记录帧长度一致，整批一次处理
+        processed_list = [processed for processed in self.data_processor.process_frame_list(frames, enable_jq)
+                          if 'error' not in processed]
+        
+        try:
+            sink(processed_list)
+        except Exception as e:
+            # 减少错误日志频率
+            if not hasattr(self, '_wizard_error_count'):
+                self._wizard_error_count = 0
+            self._wizard_error_count += 1
+            if self._wizard_error_count % 100 == 0:  # 每100次错误才记录一次
+                self.log_ai_message(f"[WARNING] 向导数据写入错误: {e}")
     
     def update_statistics_display(self, statistics):
         """更新统计信息显示（节流以提高性能）"""
@@ -4709,4 +4942,6 @@ def main():
     print("[DEBUG] mainloop结束，程序退出")
 
 if __name__ == "__main__":
+    # 打包后的程序启动接收子进程时需要
+    multiprocessing.freeze_support()
     main() 
\ No newline at end of file
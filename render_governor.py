@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+渲染节拍调节模块 - 根据实测的渲染/处理耗时和主循环延迟调整Tk轮询间隔和渲染抽帧
+"""
+
+import math
+import time
+
+class RenderGovernor:
+    """实时显示的自适应节拍
+
+    每次Tk主循环调用update_data时记录：
+        - 调度延迟：实际执行时刻比root.after预定时刻晚了多少（对话框、报告生成等占用主线程时变大）
+        - 渲染耗时：本次实际渲染热力图的耗时（跳过渲染的调用不计）
+        - 其他耗时：本次调用除渲染外的耗时（取结果、统计显示，主线程处理模式下含帧处理）
+    每adjust_interval秒按指数平均值调整一次：
+        - 调度延迟超过目标界面延迟：主线程繁忙，轮询间隔和渲染间隔同时放大（退避）
+        - 否则渲染间隔取 max(基准, 渲染耗时/busy_fraction)，轮询间隔取 max(基准, 其他耗时/busy_fraction)，
+          即渲染和轮询各自最多占用busy_fraction的主线程时间；高于需要时逐步回落到基准
+    渲染间隔通过可视化器的min_render_interval/frame_skip_threshold生效。
+    """
+
+    SMOOTHING = 0.2      # 指数平均系数
+    BACKOFF = 1.5        # 繁忙时每次放大倍数
+    RECOVERY = 0.8       # 空闲时每次回落倍数
+
+    def __init__(self, target_latency_ms=50.0, base_poll_ms=22, base_render_interval_ms=33.0,
+                 max_poll_ms=200, max_render_interval_ms=500.0, busy_fraction=0.5, adjust_interval=0.5):
+        """
+        Args:
+            target_latency_ms (float): 目标界面延迟（调度延迟上限）
+            base_poll_ms (int): 基准轮询间隔（原固定的22ms）
+            base_render_interval_ms (float): 基准最小渲染间隔（原固定的33ms）
+            max_poll_ms (int): 轮询间隔上限
+            max_render_interval_ms (float): 渲染间隔上限
+            busy_fraction (float): 渲染/轮询各自允许占用的主线程时间比例
+            adjust_interval (float): 调整周期（秒）
+        """
+        self.target_latency_ms = target_latency_ms
+        self.base_poll_ms = base_poll_ms
+        self.base_render_interval_ms = base_render_interval_ms
+        self.max_poll_ms = max_poll_ms
+        self.max_render_interval_ms = max_render_interval_ms
+        self.busy_fraction = busy_fraction
+        self.adjust_interval = adjust_interval
+        self.reset()
+
+    def reset(self):
+        """恢复基准节拍，清空测量值"""
+        self.poll_ms = float(self.base_poll_ms)
+        self.render_interval_ms = float(self.base_render_interval_ms)
+        self.lag_ms = 0.0
+        self.render_ms = 0.0
+        self.other_ms = 0.0
+        self.reason = '正常'
+        self.backoff_count = 0
+        self._expected_at = None
+        self._last_adjust = time.perf_counter()
+
+    def tick_started(self):
+        """update_data开始时调用，返回本次调度延迟（毫秒）"""
+        now = time.perf_counter()
+        lag_ms = 0.0
+        if self._expected_at is not None:
+            lag_ms = max(0.0, (now - self._expected_at) * 1000)
+        self.lag_ms += self.SMOOTHING * (lag_ms - self.lag_ms)
+        return lag_ms
+
+    def record_tick(self, tick_ms, render_ms=None):
+        """
+        记录一次update_data的耗时
+
+        Args:
+            tick_ms (float): 本次调用总耗时
+            render_ms (float): 本次渲染耗时，未渲染时为None
+        """
+        if render_ms is not None:
+            self.render_ms += self.SMOOTHING * (render_ms - self.render_ms)
+        other_ms = tick_ms - (render_ms or 0.0)
+        self.other_ms += self.SMOOTHING * (other_ms - self.other_ms)
+
+    def next_delay(self):
+        """下一次root.after的间隔（毫秒），同时记下预定执行时刻"""
+        delay = int(round(self.poll_ms))
+        self._expected_at = time.perf_counter() + delay / 1000
+        return delay
+
+    def adjust(self):
+        """
+        到调整周期时按测量值调整节拍
+
+        Returns:
+            bool: 本次是否做了调整（调用方据此更新可视化器和状态栏）
+        """
+        now = time.perf_counter()
+        if now - self._last_adjust < self.adjust_interval:
+            return False
+        self._last_adjust = now
+
+        if self.lag_ms > self.target_latency_ms:
+            self.poll_ms = min(self.max_poll_ms, self.poll_ms * self.BACKOFF)
+            self.render_interval_ms = min(self.max_render_interval_ms, self.render_interval_ms * self.BACKOFF)
+            self.backoff_count += 1
+            self.reason = '主线程繁忙'
+            return True
+
+        needed_render = min(self.max_render_interval_ms,
+                            max(self.base_render_interval_ms, self.render_ms / self.busy_fraction))
+        needed_poll = min(self.max_poll_ms, max(self.base_poll_ms, self.other_ms / self.busy_fraction))
+        self.render_interval_ms = self._approach(self.render_interval_ms, needed_render)
+        self.poll_ms = self._approach(self.poll_ms, needed_poll)
+
+        if needed_render > self.base_render_interval_ms:
+            self.reason = '渲染耗时'
+        elif needed_poll > self.base_poll_ms:
+            self.reason = '处理耗时'
+        elif (self.render_interval_ms > self.base_render_interval_ms + 0.5
+              or self.poll_ms > self.base_poll_ms + 0.5):
+            self.reason = '恢复中'
+        else:
+            self.reason = '正常'
+        return True
+
+    def _approach(self, current, needed):
+        """需要更长间隔时直接采用，更短时按RECOVERY逐步回落"""
+        if needed >= current:
+            return needed
+        return max(needed, current * self.RECOVERY)
+
+    def apply(self, visualizer):
+        """把渲染间隔设置到可视化器的帧跳跃参数"""
+        visualizer.min_render_interval = self.render_interval_ms / 1000
+        # 连续跳过frame_skip_threshold次后强制渲染：设为渲染间隔内的轮询次数+1，只作为兜底
+        visualizer.frame_skip_threshold = math.ceil(self.render_interval_ms / self.poll_ms) + 1
+
+    def describe(self):
+        """状态栏显示的当前节拍"""
+        max_fps = 1000.0 / self.render_interval_ms
+        return f"⏱ 刷新 {int(round(self.poll_ms))}ms  渲染≤{max_fps:.0f}帧/秒 ({self.reason})"
+
+    def get_stats(self):
+        """当前节拍和测量值（毫秒）"""
+        return {
+            'poll_ms': self.poll_ms,
+            'render_interval_ms': self.render_interval_ms,
+            'lag_ms': self.lag_ms,
+            'render_ms': self.render_ms,
+            'other_ms': self.other_ms,
+            'reason': self.reason,
+            'backoffs': self.backoff_count
+        }
@@ -8,6 +8,7 @@
 import tkinter as tk
 import sys
 import os
+import multiprocessing
 
 def main():
     """启动肌少症检测系统"""
@@ -76,4 +77,5 @@ def main():
         traceback.print_exc()
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -62,7 +62,7 @@ def generate_foot_heatmap_base64(pressure_data: List[float], foot_type: str = 'l
     
     # 添加颜色条
     cbar = plt.colorbar(im, ax=ax, fraction=0.046, pad=0.04)
-    cbar.set_label('压力 (kPa)', fontsize=10, fontfamily='SimHei')
+    cbar.set_label('相对压力 (原始值/100)', fontsize=10, fontfamily='SimHei')
     
     # 保存到内存
     buf = io.BytesIO()
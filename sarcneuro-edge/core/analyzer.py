@@ -23,6 +23,30 @@ class PressurePoint:
     contact_area: int
     total_pressure: int
     data: List[int]  # 32x32 = 1024个数据点
+    # 由_ensure_frame_stats批量计算后缓存，避免各分析步骤重复计算
+    data_sum: Optional[int] = None
+    cop_x: Optional[float] = None  # 压力中心（行方向坐标，与原meshgrid计算一致）
+    cop_y: Optional[float] = None  # 压力中心（列方向坐标）
+
+_moment_weights = {}
+
+def frame_moments_batch(frames: np.ndarray) -> np.ndarray:
+    """
+    批量计算帧的总压力和一阶矩（整数累加，一次矩阵乘）
+    
+    Args:
+        frames: (N, H, W) 压力帧
+        
+    Returns:
+        (N, 3) int64数组：[总压力, 行坐标加权和, 列坐标加权和]
+    """
+    count, rows, cols = frames.shape
+    weights = _moment_weights.get((rows, cols))
+    if weights is None:
+        row_index, col_index = np.divmod(np.arange(rows * cols, dtype=np.int64), cols)
+        weights = np.stack([np.ones(rows * cols, dtype=np.int64), row_index, col_index], axis=1)
+        _moment_weights[(rows, cols)] = weights
+    return frames.reshape(count, rows * cols).astype(np.int64) @ weights
 
 @dataclass
 class PatientInfo:
@@ -718,6 +742,22 @@ class SarcNeuroAnalyzer:
         
         return cadence
     
+    def _ensure_frame_stats(self, pressure_points: List[PressurePoint]):
+        """批量计算尚未缓存的各帧总压力和压力中心（同长度的帧一次计算）"""
+        groups = {}
+        for point in pressure_points:
+            if point.data_sum is None:
+                groups.setdefault(len(point.data), []).append(point)
+        
+        for length, points in groups.items():
+            frames = np.array([point.data for point in points], dtype=np.int64).reshape(len(points), 32, length // 32)
+            moments = frame_moments_batch(frames)
+            for point, (data_sum, row_moment, col_moment) in zip(points, moments):
+                point.data_sum = int(data_sum)
+                if data_sum > 0:
+                    point.cop_x = row_moment / data_sum
+                    point.cop_y = col_moment / data_sum
+    
     def _separate_feet_data(self, pressure_points: List[PressurePoint]) -> Tuple[List[PressurePoint], List[PressurePoint]]:
         """分离左右脚数据 - 改进算法"""
         if not pressure_points:
@@ -726,15 +766,12 @@ class SarcNeuroAnalyzer:
         # 基于压力中心的左右脚分离
         left_foot_data = []
         right_foot_data = []
+        self._ensure_frame_stats(pressure_points)
         
         for point in pressure_points:
-            # 计算压力中心的横向位置
-            data = np.array(point.data).reshape(32, 32)
-            y, x = np.meshgrid(range(32), range(32))
-            
-            total_pressure = np.sum(data)
-            if total_pressure > 0:
-                cop_x = np.sum(x * data) / total_pressure
+            # 压力中心的横向位置（批量计算后缓存在数据点上）
+            if point.data_sum > 0:
+                cop_x = point.cop_x
                 
                 # 基于压力中心的X坐标分离左右脚
                 # 假设传感器中心为16，左侧<16，右侧>16
@@ -913,15 +950,11 @@ class SarcNeuroAnalyzer:
     def _calculate_cop_trajectory(self, pressure_points: List[PressurePoint]) -> List[Tuple[float, float]]:
         """计算压力中心轨迹"""
         trajectory = []
+        self._ensure_frame_stats(pressure_points)
         for point in pressure_points:
-            # 计算32x32网格的重心
-            data = np.array(point.data).reshape(32, 32)
-            y, x = np.meshgrid(range(32), range(32))
-            
-            total_pressure = np.sum(data)
-            if total_pressure > 0:
-                cop_x = np.sum(x * data) / total_pressure
-                cop_y = np.sum(y * data) / total_pressure
+            # 32x32网格的重心（批量计算后缓存在数据点上）
+            if point.data_sum > 0:
+                cop_x, cop_y = point.cop_x, point.cop_y
             else:
                 cop_x, cop_y = 16, 16  # 默认中心
             
@@ -274,7 +274,7 @@ async def generate_comprehensive_report(patient: PatientInfo, all_results: List[
         
         # 添加色条
         cbar = plt.colorbar(im, ax=ax)
-        cbar.set_label('压力值 (N)', fontsize=12)
+        cbar.set_label('压力 (传感器原始值 0-255)', fontsize=12)
         
         # 设置标题和标签
         ax.set_title(f'{foot_type.capitalize()} 足底压力分布', fontsize=14, fontweight='bold')
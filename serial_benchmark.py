@@ -0,0 +1,486 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+串口接收性能基准 - 用虚拟设备驱动SerialInterface/MultiPortInterface
+
+统计每种设备模式的:
+    - 帧率、字节率
+    - 每帧CPU时间（进程CPU，含进程内模拟设备的开销）
+    - 帧头到入队的延迟 p50/p95/p99/max（模拟设备在负载中写入发送时间）
+    - 丢帧率（应到帧数与实际入队帧数之差）
+    - 各端口帧完整性：短帧/长帧/终止符错误/重同步/丢弃字节（--corrupt模拟线路干扰）
+    - 多端口合并线程的唤醒次数与CPU时间
+    - 模拟Tk主循环每次更新的耗时：帧处理在主线程中（inline）或在处理线程中（thread）
+    - 接收在本进程线程中（thread）或在独立子进程中（process）时，界面繁忙对采集的影响
+
+用法:
+    python serial_benchmark.py                         # 全部模式，各5秒
+    python serial_benchmark.py --modes single walkway --duration 10
+    python serial_benchmark.py --interface multi --modes dual_1024 triple_1024
+    python serial_benchmark.py --idle --modes dual_1024   # 无数据时合并线程的空转开销
+    python serial_benchmark.py --idle --polling-reference --modes dual_1024   # 同时测量旧轮询循环作对比
+    python serial_benchmark.py --processing inline thread   # 对比主线程每次更新的耗时
+    python serial_benchmark.py --ingest thread process --ui-load-ms 15   # 界面繁忙时对比接收后端
+    python serial_benchmark.py --json baseline.json
+"""
+
+import argparse
+import json
+import threading
+import time
+
+import numpy as np
+
+from byte_sources import STAMP_SIZE, decode_stamp
+from data_processor import JQ_INVERSE_PERMUTATION, DataProcessor
+from frame_processing import FrameProcessingThread, TickTimer
+from frame_validator import format_integrity
+from multi_port_interface import MultiPortInterface
+from serial_interface import SerialInterface
+from shared_ingest import create_serial_interface
+
+MODES = ("single", "dual_1024", "triple_1024", "walkway")
+
+PROCESSING_MODES = ("none", "inline", "thread")
+
+INGEST_BACKENDS = ("thread", "process")
+
+# 各模式的设备段数
+MODE_SEGMENTS = {
+    "single": 1,
+    "dual_1024": 2,
+    "triple_1024": 3,
+    "walkway": 3
+}
+
+
+def _stamp_index(segments, layout):
+    """
+    各段时间戳标记在合并帧中的位置
+
+    Args:
+        segments (int): 段数
+        layout (str): 合并帧布局
+            - "raw": 各段原始负载依次排列（单端口、步道）
+            - "jq_hstack": 各段JQ变换后按列拼接为32x(32*N)（多端口合并）
+
+    Returns:
+        np.ndarray: (segments, STAMP_SIZE) 的索引表
+    """
+    raw_index = np.arange(STAMP_SIZE)
+    if layout == "raw":
+        return np.array([segment * 1024 + raw_index for segment in range(segments)])
+
+    # 原始第k字节在JQ变换后位于 JQ_INVERSE_PERMUTATION[k]
+    jq_index = JQ_INVERSE_PERMUTATION[raw_index]
+    rows, cols = jq_index // 32, jq_index % 32
+    return np.array([rows * 32 * segments + segment * 32 + cols for segment in range(segments)])
+
+
+class FrameLatencyProbe:
+    """新帧回调：记录入队时刻和各段的时间戳标记，结束后再解码"""
+
+    def __init__(self, stamp_index):
+        self.stamp_index = stamp_index
+        self.active = False
+        self.records = []
+
+    def __call__(self, frame_data):
+        if not self.active:
+            return
+        queued_ns = time.perf_counter_ns()
+        data = np.asarray(frame_data['data'])
+        if data.size < self.stamp_index.max() + 1:
+            return
+        self.records.append((queued_ns, data[self.stamp_index].copy()))
+
+    def latencies_ms(self):
+        """帧头到入队的延迟（毫秒），多段帧以最后到达的一段为准"""
+        latencies = []
+        for queued_ns, stamps in self.records:
+            emit_ns = max(decode_stamp(stamp)[1] for stamp in stamps)
+            latencies.append((queued_ns - emit_ns) / 1e6)
+        return np.array(latencies)
+
+
+def _emulator_url(segment, segments, args, fps=None):
+    scheme = "pty" if args.backend == "pty" else "emu"
+    params = {
+        'segment': segment,
+        'segments': segments,
+        'fps': fps or args.fps,
+        'jitter_ms': args.jitter_ms,
+        'corrupt': args.corrupt,
+        'drop': 1.0 if args.idle else args.drop,
+        'seed': args.seed,
+        'stamp': 1
+    }
+    return f"{scheme}://bench?" + "&".join(f"{key}={value}" for key, value in params.items())
+
+
+def _emulators(port_objects):
+    # pty端口的模拟设备在source属性上
+    return [getattr(port, 'source', port) for port in port_objects]
+
+
+class WorkerSource:
+    """接收子进程中模拟设备的统计代理（数值来自子进程最近一次上报）"""
+
+    def __init__(self, interface, index):
+        self.interface = interface
+        self.index = index
+
+    def get_stats(self):
+        return self.interface.get_worker_stats()['sources'][self.index]
+
+    @property
+    def sequence(self):
+        return self.get_stats()['scheduled']
+
+    @property
+    def read_bytes(self):
+        return self.get_stats()['read_bytes']
+
+
+def _worker_sources(interface, count):
+    interface.request_worker_stats()
+    return [WorkerSource(interface, index) for index in range(count)]
+
+
+def _open_interface(mode, args, ingest="thread"):
+    """
+    按模式创建并连接接口（ingest="process"时在子进程中接收，模拟设备统计由子进程上报）
+
+    Returns:
+        tuple: (interface, emulators, layout, device_frames_per_frame, disconnect)
+    """
+    segments = MODE_SEGMENTS[mode]
+    in_process = ingest == "thread"
+
+    if mode == "single":
+        interface = create_serial_interface(ingest)
+        interface.set_device_mode("single")
+        interface.set_parse_mode(args.parse_mode)
+        interface.connect(_emulator_url(0, 1, args))
+        sources = _emulators([interface.serial_port]) if in_process else _worker_sources(interface, 1)
+        return interface, sources, "raw", 1, interface.disconnect
+
+    if mode == "walkway":
+        # 步道：单端口依次发送3段
+        interface = create_serial_interface(ingest)
+        interface.set_device_mode("walkway")
+        interface.set_parse_mode(args.parse_mode)
+        interface.connect(_emulator_url("all", segments, args, fps=args.fps * segments))
+        sources = _emulators([interface.serial_port]) if in_process else _worker_sources(interface, 1)
+        return interface, sources, "raw", segments, interface.disconnect
+
+    port_configs = [{'port': _emulator_url(segment, segments, args), 'device_id': segment}
+                    for segment in range(segments)]
+
+    # MultiPortInterface只在本进程中接收
+    if args.interface == "multi" and in_process:
+        interface = MultiPortInterface(port_configs)
+        if not interface.connect_all_ports():
+            raise RuntimeError("多端口连接失败")
+        ports = [sub.serial_port for _, sub in sorted(interface.serial_interfaces.items())]
+        return interface, _emulators(ports), "jq_hstack", 1, interface.disconnect_all
+
+    interface = create_serial_interface(ingest)
+    interface.set_parse_mode(args.parse_mode)
+    interface.set_multi_port_config(port_configs)
+    if not interface.connect(None):
+        raise RuntimeError("多端口连接失败")
+    if not in_process:
+        return interface, _worker_sources(interface, segments), "jq_hstack", 1, interface.disconnect
+    ports = [port for _, port in sorted(interface.serial_ports.items())]
+    return interface, _emulators(ports), "jq_hstack", 1, interface.disconnect
+
+
+def _scheduled_frames(emulators, device_frames_per_frame):
+    """模拟设备已调度的合并帧数（各端口取最小值）"""
+    return min(emulator.sequence for emulator in emulators) // device_frames_per_frame
+
+
+def _mode_pipeline(mode):
+    """与DeviceManager相同的流水线配置：单端口设备需要JQ变换，多端口合并时已变换"""
+    segments = MODE_SEGMENTS[mode]
+    enable_jq = mode in ("single", "walkway")
+    return DataProcessor().create_pipeline(32, 32 * segments, enable_jq)
+
+
+def _busy_python(duration_s):
+    """持有GIL的纯Python忙循环，模拟界面绘制、报告生成等主线程负载"""
+    deadline = time.perf_counter() + duration_s
+    count = 0
+    while time.perf_counter() < deadline:
+        count += 1
+    return count
+
+
+def _polling_reference(synchronizer, duration_s):
+    """
+    旧合并线程的轮询循环（pop_match，无帧时sleep(0.001)）作为空转开销参照
+
+    Returns:
+        tuple: (唤醒次数/秒, 线程CPU ms/秒)
+    """
+    stats = {}
+
+    def poll():
+        wakeups = 0
+        cpu_start = time.thread_time_ns()
+        wall_start = time.perf_counter()
+        deadline = wall_start + duration_s
+        while time.perf_counter() < deadline:
+            if synchronizer.pop_match() is None:
+                time.sleep(0.001)
+                wakeups += 1
+        stats['seconds'] = time.perf_counter() - wall_start
+        stats['wakeups'] = wakeups
+        stats['cpu_ms'] = (time.thread_time_ns() - cpu_start) / 1e6
+
+    thread = threading.Thread(target=poll, daemon=True)
+    thread.start()
+    thread.join()
+    return stats['wakeups'] / stats['seconds'], stats['cpu_ms'] / stats['seconds']
+
+
+def _ui_consumer(interface, stop_event, interval, processing="none", pipeline=None,
+                 processing_thread=None, tick_timer=None, ui_load_s=0.0):
+    """
+    模拟Tk主循环：每interval秒更新一次
+
+    processing:
+        - none: 只取最新帧
+        - inline: 取最新帧并在本线程中处理（原update_data的做法）
+        - thread: 只从处理线程的最新值槽位取结果
+    ui_load_s: 每次更新后额外的纯Python负载（秒）
+    """
+    get_latest = interface.get_latest_data
+    while not stop_event.wait(interval):
+        tick_start = tick_timer.start() if tick_timer else 0
+        if processing == "thread":
+            processing_thread.take_latest()
+        else:
+            frame_data = get_latest()
+            if processing == "inline" and frame_data is not None:
+                pipeline.process(frame_data)
+        if tick_timer:
+            tick_timer.stop(tick_start)
+        if ui_load_s:
+            _busy_python(ui_load_s)
+
+
+def run_mode(mode, args, processing="none", ingest="thread"):
+    """运行一个模式的基准，返回结果字典"""
+    segments = MODE_SEGMENTS[mode]
+    interface, emulators, layout, device_frames_per_frame, disconnect = _open_interface(mode, args, ingest)
+    # 子进程接收时，模拟设备统计和子进程CPU时间需要先请求上报
+    refresh_worker_stats = getattr(interface, 'request_worker_stats', None)
+    probe = FrameLatencyProbe(_stamp_index(segments, layout))
+    interface.add_frame_listener(probe)
+
+    pipeline = _mode_pipeline(mode) if processing != "none" else None
+    processing_thread = None
+    if processing == "thread":
+        processing_thread = FrameProcessingThread(pipeline.processor, lambda: pipeline)
+        processing_thread.attach(interface)
+        processing_thread.start()
+    tick_timer = TickTimer(window=100000)
+
+    stop_event = threading.Event()
+    consumer = threading.Thread(target=_ui_consumer,
+                                args=(interface, stop_event, args.consumer_interval, processing,
+                                      pipeline, processing_thread, tick_timer, args.ui_load_ms / 1000.0),
+                                daemon=True)
+    consumer.start()
+
+    try:
+        time.sleep(args.warmup)
+        tick_timer.reset()
+        if processing_thread:
+            processing_thread.process_timer.reset()
+
+        # 测量窗口开始
+        synchronizer = interface.frame_synchronizer
+        if synchronizer:
+            synchronizer.reset_stats()
+            merger_cpu_start = interface.get_sync_stats()['consumer_cpu_ms']
+        queue_start = interface.get_queue_stats()
+        if refresh_worker_stats:
+            worker_cpu_start = refresh_worker_stats()['cpu_ms']
+        scheduled_start = _scheduled_frames(emulators, device_frames_per_frame)
+        bytes_start = sum(emulator.read_bytes for emulator in emulators)
+        cpu_start = time.process_time_ns()
+        wall_start = time.perf_counter_ns()
+        probe.active = True
+
+        time.sleep(args.duration)
+
+        probe.active = False
+        wall_ns = time.perf_counter_ns() - wall_start
+        cpu_ns = time.process_time_ns() - cpu_start
+        if refresh_worker_stats:
+            worker_cpu_ms = refresh_worker_stats()['cpu_ms'] - worker_cpu_start
+        read_bytes = sum(emulator.read_bytes for emulator in emulators) - bytes_start
+        scheduled = _scheduled_frames(emulators, device_frames_per_frame) - scheduled_start
+        queue_end = interface.get_queue_stats()
+        sync_stats = interface.get_sync_stats() if synchronizer else None
+        tick_stats = tick_timer.get_stats()
+        integrity = interface.get_integrity_summary()
+        thread_stats = processing_thread.get_stats() if processing_thread else None
+
+        # 参照：同一个同步器上运行旧的轮询循环（事件驱动的合并线程仍在等待，空闲时不会被唤醒）
+        polling = None
+        if args.polling_reference and synchronizer:
+            polling = _polling_reference(synchronizer, args.duration)
+    finally:
+        stop_event.set()
+        consumer.join(timeout=1.0)
+        if processing_thread:
+            processing_thread.stop()
+        disconnect()
+
+    seconds = wall_ns / 1e9
+    frames = len(probe.records)
+    latencies = probe.latencies_ms()
+    interface_name = args.interface if mode in ("dual_1024", "triple_1024") and ingest == "thread" else "serial"
+    result = {
+        'mode': mode,
+        'interface': interface_name,
+        'backend': args.backend,
+        # MultiPortInterface的子接口在内部创建，使用默认分帧模式
+        'parse_mode': "fixed" if interface_name == "multi" else args.parse_mode,
+        'processing': processing,
+        'ingest': ingest,
+        'ui_load_ms': args.ui_load_ms,
+        'duration_s': round(seconds, 3),
+        'frames': frames,
+        'fps': frames / seconds,
+        'bytes_per_s': read_bytes / seconds,
+        'cpu_ms_per_frame': cpu_ns / 1e6 / frames if frames else None,
+        'cpu_percent': cpu_ns / wall_ns * 100,
+        'expected_frames': scheduled,
+        'drop_rate': max(scheduled - frames, 0) / scheduled if scheduled else 0.0,
+        'display_dropped': queue_end['dropped'] - queue_start['dropped'],
+        'display_coalesced': queue_end['coalesced'] - queue_start['coalesced'],
+        'emulator': [emulator.get_stats() for emulator in emulators],
+        'integrity': integrity
+    }
+    if len(latencies):
+        result.update({
+            'latency_p50_ms': float(np.percentile(latencies, 50)),
+            'latency_p95_ms': float(np.percentile(latencies, 95)),
+            'latency_p99_ms': float(np.percentile(latencies, 99)),
+            'latency_max_ms': float(latencies.max())
+        })
+    if processing != "none":
+        result.update({
+            'tick_p50_ms': tick_stats['p50_ms'],
+            'tick_p95_ms': tick_stats['p95_ms'],
+            'tick_p99_ms': tick_stats['p99_ms'],
+            'tick_max_ms': tick_stats['max_ms']
+        })
+    if thread_stats:
+        result.update({
+            'thread_process_p50_ms': thread_stats['process_time']['p50_ms'],
+            'thread_process_p95_ms': thread_stats['process_time']['p95_ms'],
+            'thread_superseded': thread_stats['superseded']
+        })
+    if refresh_worker_stats:
+        result['worker_cpu_ms_per_frame'] = worker_cpu_ms / frames if frames else None
+        result['worker_cpu_percent'] = worker_cpu_ms * 1e6 / wall_ns * 100
+    if sync_stats:
+        result.update({
+            'merger_wakeups_per_s': sync_stats['wakeups'] / seconds,
+            'merger_cpu_ms_per_s': (sync_stats['consumer_cpu_ms'] - merger_cpu_start) / seconds,
+            'sync_matched': sync_stats['matched'],
+            'sync_unmatched': sync_stats['unmatched'],
+            'sync_mean_skew_ms': sync_stats['mean_skew_ms'],
+            'sync_max_skew_ms': sync_stats['max_skew_ms']
+        })
+    if polling:
+        result['polling_wakeups_per_s'], result['polling_cpu_ms_per_s'] = polling
+    return result
+
+
+def print_result(result):
+    """输出一个模式的结果"""
+    print(f"\n📊 {result['mode']} ({result['interface']}, {result['backend']}, {result['parse_mode']}, "
+          f"处理: {result['processing']}, 接收: {result['ingest']}, 界面负载: {result['ui_load_ms']} ms)")
+    print(f"   帧率: {result['fps']:.1f} FPS   字节率: {result['bytes_per_s'] / 1024:.1f} KB/s")
+    if result['cpu_ms_per_frame'] is not None:
+        print(f"   CPU: {result['cpu_ms_per_frame']:.3f} ms/帧 ({result['cpu_percent']:.1f}%)")
+    else:
+        print(f"   CPU: {result['cpu_percent']:.2f}% (无帧)")
+    if 'worker_cpu_percent' in result:
+        print(f"   接收子进程CPU: {result['worker_cpu_percent']:.1f}%")
+    if 'latency_p50_ms' in result:
+        print(f"   帧头→入队延迟: p50 {result['latency_p50_ms']:.2f} ms  p95 {result['latency_p95_ms']:.2f} ms  "
+              f"p99 {result['latency_p99_ms']:.2f} ms  max {result['latency_max_ms']:.2f} ms")
+    print(f"   丢帧率: {result['drop_rate'] * 100:.2f}% ({result['frames']}/{result['expected_frames']})   "
+          f"显示队列 覆盖 {result['display_dropped']} 合并 {result['display_coalesced']}")
+    print(f"   帧完整性: {format_integrity(result['integrity'])}")
+    if 'tick_p50_ms' in result:
+        print(f"   主线程每次更新: p50 {result['tick_p50_ms']:.3f} ms  p95 {result['tick_p95_ms']:.3f} ms  "
+              f"p99 {result['tick_p99_ms']:.3f} ms  max {result['tick_max_ms']:.3f} ms")
+    if 'thread_process_p50_ms' in result:
+        print(f"   处理线程每帧: p50 {result['thread_process_p50_ms']:.3f} ms  "
+              f"p95 {result['thread_process_p95_ms']:.3f} ms  未显示被覆盖 {result['thread_superseded']}")
+    if 'merger_wakeups_per_s' in result:
+        print(f"   合并线程: 唤醒 {result['merger_wakeups_per_s']:.1f} 次/秒  "
+              f"CPU {result['merger_cpu_ms_per_s']:.2f} ms/秒  "
+              f"匹配 {result['sync_matched']}  丢弃 {result['sync_unmatched']}  "
+              f"时间差 平均 {result['sync_mean_skew_ms']:.2f} ms / 最大 {result['sync_max_skew_ms']:.2f} ms")
+    if 'polling_wakeups_per_s' in result:
+        print(f"   轮询参照(sleep 1ms): 唤醒 {result['polling_wakeups_per_s']:.1f} 次/秒  "
+              f"CPU {result['polling_cpu_ms_per_s']:.2f} ms/秒")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="串口接收性能基准")
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES), help="设备模式")
+    parser.add_argument('--interface', choices=("serial", "multi"), default="serial",
+                        help="双/三设备使用SerialInterface多端口配置或MultiPortInterface")
+    parser.add_argument('--backend', choices=("emu", "pty"), default="emu",
+                        help="emu: 进程内虚拟设备；pty: 伪终端+pyserial")
+    parser.add_argument('--parse-mode', choices=("fixed", "delimited"), default="fixed", help="分帧模式")
+    parser.add_argument('--duration', type=float, default=5.0, help="每个模式的测量时长（秒）")
+    parser.add_argument('--warmup', type=float, default=1.0, help="测量前的预热时长（秒）")
+    parser.add_argument('--fps', type=float, default=100.0, help="每个设备的帧率")
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help="帧间隔抖动（毫秒）")
+    parser.add_argument('--corrupt', type=float, default=0.0, help="每帧被破坏的概率")
+    parser.add_argument('--drop', type=float, default=0.0, help="整帧丢失的概率")
+    parser.add_argument('--seed', type=int, default=0, help="随机种子")
+    parser.add_argument('--consumer-interval', type=float, default=0.022, help="模拟UI取帧间隔（秒）")
+    parser.add_argument('--processing', nargs='+', choices=PROCESSING_MODES, default=["none"],
+                        help="模拟UI的帧处理方式：none只取帧，inline主线程处理，thread处理线程")
+    parser.add_argument('--ingest', nargs='+', choices=INGEST_BACKENDS, default=["thread"],
+                        help="接收后端：thread=本进程线程，process=独立子进程（共享内存帧池）")
+    parser.add_argument('--ui-load-ms', type=float, default=0.0, help="模拟UI每次更新后的纯Python负载（毫秒）")
+    parser.add_argument('--idle', action='store_true', help="设备不发送数据，测量空转开销")
+    parser.add_argument('--polling-reference', action='store_true',
+                        help="与--idle同用：测量后在同一个帧同步器上运行旧的sleep(0.001)轮询循环作对比")
+    parser.add_argument('--json', help="结果保存为JSON文件")
+    args = parser.parse_args()
+    if args.polling_reference and not args.idle:
+        # 有数据时轮询循环会和合并线程争抢帧
+        parser.error("--polling-reference 需要与 --idle 一起使用")
+
+    results = []
+    for mode in args.modes:
+        for ingest in args.ingest:
+            for processing in args.processing:
+                print(f"\n⏱️ 运行 {mode} (处理: {processing}, 接收: {ingest}) ...")
+                result = run_mode(mode, args, processing, ingest)
+                print_result(result)
+                results.append(result)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'args': vars(args), 'results': results}, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 结果已保存: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,44 +9,63 @@ import serial.tools.list_ports
 import threading
 import queue
 import time
-from datetime import datetime
 import sys
 import os
 import numpy as np
 
 # 导入date.py的函数
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-from date import find_available_ports, test_port_connection, find_frame_start, extract_frame_content, auto_find_working_port
+from date import (find_available_ports, test_port_connection, auto_find_working_port, FRAME_PAYLOAD_SIZE,
+                  FRAME_TERMINATOR, capture_timestamp_ns)
 from data_processor import DataProcessor
+from byte_sources import open_byte_source, is_virtual_port
+from frame_buffer import FrameBuffer
+from frame_validator import FrameValidator, summarize_integrity
+from frame_pool import FramePool
+from frame_queue import LatestFrameQueue, RecordingLane
+from frame_synchronizer import FrameSynchronizer
 
 class SerialInterface:
     """串口接口类"""
     
-    def __init__(self, baudrate=1000000):
+    def __init__(self, baudrate=1000000, queue_maxsize=16):
         self.baudrate = baudrate
         self.serial_port = None
         self.is_running = False
-        self.data_queue = queue.Queue()
+        # 有界显示队列（满时覆盖最旧帧），记录使用独立的无损通道
+        self.data_queue = LatestFrameQueue(queue_maxsize)
+        self.recording_lane = RecordingLane()
+        self.frame_listeners = []  # 新帧回调（在接收线程中调用）
         self.frame_count = 0
         self.data_thread = None
         
         # 帧头定义
         self.FRAME_HEADER = [0xAA, 0x55, 0x03, 0x99]
         
-        # 多设备数据累积缓冲区
-        self.device_buffer = bytearray()
+        # 多设备数据累积（各段直接写入帧池槽位）
         self.device_frame_count = 0
+        self._pending_slot = None
         self.expected_device_frames = 1  # 默认1个1024字节帧
         self.is_multi_device_mode = False  # 是否为多设备模式
         self.device_type = "single"  # single, dual_1024, triple_1024, walkway
         
+        # 分帧模式：fixed=帧头+固定1024字节（收齐即交出），delimited=等待下一个帧头
+        self.parse_mode = "fixed"
+        
+        # 帧校验：设备是否在负载后发送终止符；各端口的完整性计数 {端口: FrameValidator}
+        self.frame_trailer = b''
+        self.frame_validators = {}
+        
+        # 预分配帧池，接收线程写入，队列中只传递帧引用
+        self.frame_pool = FramePool(32, 32)
+        
         # 多端口支持
         self.multi_port_config = None  # 多端口配置 [{'port': 'COM3', 'device_id': 0}, ...]
         self.serial_ports = {}  # 多个串口连接 {device_id: serial_port}
         self.multi_port_threads = {}  # 多个数据接收线程 {device_id: thread}
-        self.device_data_buffers = {}  # 各设备的数据缓冲区 {device_id: buffer}
         self.device_frame_counts = {}  # 各设备的帧计数 {device_id: count}
-        self.sync_lock = threading.Lock()  # 数据同步锁
+        self.frame_synchronizer = None  # 按采集时间戳对齐各端口帧
+        self.sync_tolerance_ms = 10.0  # 各端口帧的最大允许时间差（毫秒）
         
         # JQ转换处理器
         self.jq_processor = DataProcessor(32, 32)
@@ -56,7 +75,9 @@ class SerialInterface:
         return find_available_ports()
     
     def test_port(self, port_name):
-        """测试端口连接"""
+        """测试端口连接（虚拟端口无需测试）"""
+        if is_virtual_port(port_name):
+            return True
         return test_port_connection(port_name, self.baudrate)
     
     def auto_detect_port(self):
@@ -87,14 +108,63 @@ class SerialInterface:
         else:
             raise ValueError(f"不支持的设备类型: {device_type}")
             
-        # 清空缓冲区
-        self.device_buffer.clear()
+        # 清空累积状态
         self.device_frame_count = 0
         
+        # 按设备帧数重建帧池：每个槽位容纳一组完整的设备帧
+        self.frame_pool = FramePool(32, 32 * self.expected_device_frames)
+        
         # 向后兼容性设置
         self.is_walkway_mode = (device_type == "walkway")
         self.expected_walkway_frames = self.expected_device_frames
         
+    def set_parse_mode(self, parse_mode):
+        """设置分帧模式
+        
+        Args:
+            parse_mode (str): 分帧模式
+                - "fixed": 帧头 + 固定1024字节，收齐即交出，错位时重新同步
+                - "delimited": 帧内容为两个帧头之间的数据（旧模式，晚一帧交出）
+        
+        在连接前设置，接收线程启动时生效
+        """
+        if parse_mode not in ("fixed", "delimited"):
+            raise ValueError(f"不支持的分帧模式: {parse_mode}")
+        self.parse_mode = parse_mode
+    
+    def set_frame_terminator(self, enabled):
+        """设置设备是否在每帧负载后发送固定终止符（FRAME_TERMINATOR），在连接前设置"""
+        self.frame_trailer = bytes(FRAME_TERMINATOR) if enabled else b''
+    
+    def _create_frame_buffer(self, port_key):
+        """
+        按当前分帧模式创建一个端口的接收缓冲区和帧校验器
+        
+        Returns:
+            tuple: (FrameBuffer, FrameValidator)
+        """
+        if self.parse_mode == "fixed":
+            frame_buffer = FrameBuffer(frame_length=FRAME_PAYLOAD_SIZE + len(self.frame_trailer))
+        else:
+            frame_buffer = FrameBuffer()
+        validator = FrameValidator(frame_buffer, FRAME_PAYLOAD_SIZE, self.frame_trailer)
+        self.frame_validators[port_key] = validator
+        return frame_buffer, validator
+    
+    def get_integrity_stats(self):
+        """
+        各端口的帧完整性统计
+        
+        Returns:
+            dict: {端口: {valid_frames, short_frames, long_frames, trailer_errors,
+                   implausible_frames, resyncs, dropped_bytes, received_bytes}}
+        """
+        return {port: validator.get_stats() for port, validator in list(self.frame_validators.items())}
+    
+    def get_integrity_summary(self):
+        """所有端口完整性统计之和"""
+        return summarize_integrity(self.get_integrity_stats())
+    
     def set_multi_port_config(self, port_configs):
         """设置多端口配置
         
@@ -122,7 +192,8 @@ class SerialInterface:
                 if not self.test_port(port_name):
                     raise Exception(f"端口 {port_name} 测试失败")
                 
-                self.serial_port = serial.Serial(port_name, self.baudrate, timeout=1)
+                self.serial_port = open_byte_source(port_name, self.baudrate, timeout=1)
+                self.frame_validators = {}
                 self.is_running = True
                 
                 # 启动数据接收线程
@@ -149,9 +220,8 @@ class SerialInterface:
                     continue
                 
                 # 连接端口
-                serial_port = serial.Serial(port_name, self.baudrate, timeout=1)
+                serial_port = open_byte_source(port_name, self.baudrate, timeout=1)
                 self.serial_ports[device_id] = serial_port
-                self.device_data_buffers[device_id] = bytearray()
                 self.device_frame_counts[device_id] = 0
                 success_count += 1
                 print(f"✅ 设备{device_id} 连接成功: {port_name}")
@@ -161,6 +231,8 @@ class SerialInterface:
         
         if success_count == len(self.multi_port_config):
             print(f"🎉 所有 {len(self.multi_port_config)} 个端口连接成功")
+            self.frame_synchronizer = FrameSynchronizer(self.serial_ports.keys(), self.sync_tolerance_ms)
+            self.frame_validators = {}
             self.is_running = True
             self._start_multi_port_threads()
             return True
@@ -168,6 +240,18 @@ class SerialInterface:
             print(f"⚠️ 只有 {success_count}/{len(self.multi_port_config)} 个端口连接成功")
             return False
     
+    def set_sync_tolerance(self, tolerance_ms):
+        """设置多端口帧同步的最大允许时间差（毫秒）"""
+        self.sync_tolerance_ms = tolerance_ms
+        if self.frame_synchronizer:
+            self.frame_synchronizer.set_tolerance(tolerance_ms)
+    
+    def get_sync_stats(self):
+        """获取多端口帧同步统计（时间差、匹配/丢弃帧数），单端口模式返回None"""
+        if self.frame_synchronizer:
+            return self.frame_synchronizer.get_stats()
+        return None
+    
     def _start_multi_port_threads(self):
         """启动多端口数据接收线程"""
         # 为每个端口启动数据接收线程
@@ -185,6 +269,13 @@ class SerialInterface:
         self.data_merge_thread.start()
         print(f"🚀 多端口数据接收和合并线程已启动")
     
+    def _port_name(self, device_id):
+        """多端口模式下设备对应的端口名"""
+        for config in self.multi_port_config or []:
+            if config['device_id'] == device_id:
+                return config['port']
+        return f"设备{device_id}"
+    
     def get_current_port(self):
         """获取当前连接的端口名称"""
         if self.multi_port_config and len(self.multi_port_config) > 1:
@@ -198,6 +289,10 @@ class SerialInterface:
         """断开连接"""
         self.is_running = False
         
+        # 唤醒等待中的合并线程
+        if self.frame_synchronizer:
+            self.frame_synchronizer.wake()
+        
         # 关闭单端口连接
         if self.serial_port and self.serial_port.is_open:
             self.serial_port.close()
@@ -213,7 +308,6 @@ class SerialInterface:
         # 清理多端口资源
         self.serial_ports.clear()
         self.multi_port_threads.clear()
-        self.device_data_buffers.clear()
         self.device_frame_counts.clear()
     
     def get_data(self, timeout=0.1):
@@ -225,14 +319,50 @@ class SerialInterface:
     
     def get_multiple_data(self, max_count=5):
         """批量获取多个数据帧，减少调用开销"""
-        data_list = []
-        try:
-            for _ in range(max_count):
-                data = self.data_queue.get_nowait()
-                data_list.append(data)
-        except queue.Empty:
-            pass
-        return data_list
+        return self.data_queue.get_many(max_count)
+    
+    def get_latest_data(self):
+        """获取最新一帧，丢弃积压的旧帧（计入合并丢弃计数）"""
+        return self.data_queue.get_latest()
+    
+    def wait_latest_data(self, timeout=None):
+        """阻塞等待新帧并取出最新一帧（处理线程使用），超时返回None"""
+        return self.data_queue.wait_latest(timeout)
+    
+    def wake_data_waiters(self):
+        """唤醒阻塞在wait_latest_data上的线程"""
+        self.data_queue.wake()
+    
+    def get_queue_stats(self):
+        """获取队列统计：丢弃/合并/交付帧数及记录通道状态"""
+        stats = self.data_queue.get_stats()
+        stats['recording'] = self.recording_lane.active
+        stats['recorded'] = self.recording_lane.recorded_count
+        stats['recording_pending'] = self.recording_lane.pending()
+        return stats
+    
+    def start_recording(self):
+        """开启无损记录通道，之后的每一帧都会进入记录队列"""
+        self.recording_lane.start()
+    
+    def stop_recording(self):
+        """关闭无损记录通道"""
+        self.recording_lane.stop()
+    
+    def get_recording_data(self, max_count=None):
+        """取出记录通道中待写入的帧"""
+        return self.recording_lane.get_all(max_count)
+    
+    def add_frame_listener(self, callback):
+        """注册新帧回调 callback(frame_data)，在接收线程中同步调用，应尽量轻量"""
+        self.frame_listeners.append(callback)
+    
+    def _publish_frame(self, frame_data):
+        """发布一帧到显示队列、记录通道和新帧回调"""
+        self.data_queue.put(frame_data)
+        self.recording_lane.put(frame_data)
+        for listener in self.frame_listeners:
+            listener(frame_data)
     
     def get_frame_count(self):
         """获取帧计数"""
@@ -254,45 +384,27 @@ class SerialInterface:
     
     def _multi_port_data_receiver(self, device_id, serial_port):
         """多端口单个设备数据接收线程"""
-        data_buffer = bytearray()
+        port_key = self._port_name(device_id)
+        data_buffer, validator = self._create_frame_buffer(port_key)
         
         while self.is_running:
             try:
-                # 读取数据
-                incoming_data = serial_port.read(2000)
+                # 读取数据，直接写入预分配缓冲区
+                incoming_data = data_buffer.fill_from(serial_port)
                 
                 if incoming_data:
-                    data_buffer.extend(incoming_data)
-                    
-                    # 处理缓冲区中的完整帧
-                    while len(data_buffer) >= 4:
-                        frame_start = find_frame_start(data_buffer)
-                        
-                        if frame_start == -1:
-                            if len(data_buffer) > 3:
-                                data_buffer = data_buffer[-3:]
-                            break
-                            
-                        if frame_start > 0:
-                            data_buffer = data_buffer[frame_start:]
-                            frame_start = 0
-                            
-                        frame_content, next_frame_pos = extract_frame_content(data_buffer, frame_start)
-                        
-                        if next_frame_pos == -1:
-                            break
-                            
-                        # 处理完整的1024字节帧
-                        if len(frame_content) == 1024:
-                            with self.sync_lock:
-                                self.device_data_buffers[device_id] = frame_content
-                                self.device_frame_counts[device_id] += 1
-                        
-                        data_buffer = data_buffer[next_frame_pos:]
+                    # 在接收线程中记录采集时间戳（整数纳秒，输出时再格式化）
+                    capture_ns = capture_timestamp_ns()
                     
-                    # 限制缓冲区大小
-                    if len(data_buffer) > 5000:
-                        data_buffer = data_buffer[-500:]
+                    # 逐个取出完整帧（memoryview，不复制）
+                    frame_content = data_buffer.next_frame()
+                    while frame_content is not None:
+                        # 通过校验的1024字节帧保存时复制一次，长度/终止符错误的帧只计数
+                        payload = validator.validate(frame_content)
+                        if payload is not None:
+                            self.device_frame_counts[device_id] += 1
+                            self.frame_synchronizer.push(device_id, capture_ns, bytes(payload))
+                        frame_content = data_buffer.next_frame()
                         
                 # 减少延迟
                 if not incoming_data:
@@ -305,92 +417,34 @@ class SerialInterface:
     
     def _multi_port_data_merger(self):
         """多端口数据合并线程"""
-        device_ready_data = {}  # 各设备准备好的数据
-        
         while self.is_running:
             try:
-                # 检查所有设备是否都有新数据
-                all_devices_ready = True
+                # 等待一组时间对齐的各端口帧（所有端口都有新帧时才唤醒，不再轮询）
+                match = self.frame_synchronizer.wait_for_match(timeout=0.1)
                 
-                with self.sync_lock:
-                    for device_id in self.serial_ports.keys():
-                        if device_id in self.device_data_buffers and self.device_data_buffers[device_id]:
-                            device_ready_data[device_id] = self.device_data_buffers[device_id]
-                            self.device_data_buffers[device_id] = None  # 标记已使用
-                        else:
-                            all_devices_ready = False
-                            break
-                
-                # 如果所有设备都有数据，进行合并
-                if all_devices_ready and len(device_ready_data) == len(self.serial_ports):
-                    # 按设备ID顺序进行JQ转换，然后水平合并
-                    device_matrices = []
-                    jq_transform_results = []
-                    
-                    for device_id in sorted(device_ready_data.keys()):
-                        raw_data = device_ready_data[device_id]
-                        
-                        try:
-                            # 必须进行JQ转换（用户强调这是必须的）
-                            data_array = np.frombuffer(raw_data, dtype=np.uint8)
-                            transformed_data = self.jq_processor.jqbed_transform(data_array)
-                            # 将1024字节数据重塑为32x32矩阵
-                            matrix_32x32 = transformed_data.reshape(32, 32)
-                            device_matrices.append(matrix_32x32)
-                            jq_transform_results.append(f"设备{device_id}: JQ转化成功")
-                            
-                        except Exception as e:
-                            # JQ转换失败仍然使用原始数据，但记录错误
-                            data_array = np.frombuffer(raw_data, dtype=np.uint8)
-                            matrix_32x32 = data_array.reshape(32, 32)
-                            device_matrices.append(matrix_32x32)
-                            jq_transform_results.append(f"设备{device_id}: JQ转化失败({str(e)[:30]})")
+                # 各端口都有容差内的帧，进行合并
+                if match is not None:
+                    device_ready_data, device_ready_timestamps = match
                     
-                    # 水平合并矩阵（左右拼接）
-                    combined_matrix = np.hstack(device_matrices)  # 32x64 or 32x96
-                    combined_data = combined_matrix.ravel().astype(np.uint8).tobytes()
+                    # 按设备ID顺序，各端口数据一次取数完成JQ转换并直接写入帧池槽位的对应列
+                    device_ids = sorted(device_ready_data.keys())
+                    slot = self.frame_pool.acquire()
+                    self.jq_processor.jq_stitch_segments(
+                        [device_ready_data[device_id] for device_id in device_ids],
+                        out=self.frame_pool.frame(slot))  # 32x64 or 32x96
                     
-                    # 生成合并帧数据
+                    # 发布合并帧
                     self.frame_count += 1
-                    timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-                    
-                    frame_data = {
-                        'data': bytes(combined_data),
-                        'timestamp': timestamp,
-                        'frame_number': self.frame_count,
-                        'data_length': len(combined_data),
-                        'device_frames': len(device_ready_data),
-                        'device_type': self.device_type,
-                        'jq_transform_results': jq_transform_results
-                    }
+                    frame_data = self.frame_pool.publish(slot, len(device_ids) * 1024, self.frame_count,
+                                                         max(device_ready_timestamps.values()))  # 使用最新采集时间戳
+                    frame_data['device_frames'] = len(device_ready_data)
+                    frame_data['device_type'] = self.device_type
                     
                     # 向后兼容性字段
                     if self.device_type == "walkway":
                         frame_data['walkway_frames'] = len(device_ready_data)
                     
-                    self.data_queue.put(frame_data)
-                    
-                    # 清空已处理的数据
-                    device_ready_data.clear()
-                    
-                    # 调试输出 - 增强版
-                    if self.frame_count % 100 == 0:
-                        jq_success_count = len([r for r in jq_transform_results if "JQ转化成功" in r])
-                        # print(f"📊 多端口数据水平合并 [帧#{self.frame_count}]:")
-                        # print(f"   合并设备数: {len(self.serial_ports)}")
-                        # print(f"   合并矩阵大小: {combined_matrix.shape} (水平拼接)")
-                        # print(f"   合并数据长度: {len(combined_data)}字节")
-                        # print(f"   JQ转化状态: {jq_success_count}/{len(self.serial_ports)} 成功")
-                        # print(f"   JQ转化详情: {jq_transform_results}")
-                        
-                        # 显示每个设备的数据概览
-                        for device_id in sorted(device_ready_data.keys()):
-                            raw_data = device_ready_data[device_id]
-                            data_sum = sum(raw_data) if raw_data else 0
-                            print(f"     设备{device_id}: {len(raw_data)}字节, 数据和={data_sum}")
-                
-                # 短暂休眠
-                time.sleep(0.001)
+                    self._publish_frame(frame_data)
                 
             except Exception as e:
                 if self.is_running:
@@ -399,88 +453,24 @@ class SerialInterface:
     
     def _data_receiver_thread(self):
         """数据接收线程"""
-        data_buffer = bytearray()
+        data_buffer, validator = self._create_frame_buffer(getattr(self.serial_port, 'name', None) or "port")
         
         while self.is_running:
             try:
-                # 读取数据 - 增加读取量减少延迟
-                incoming_data = self.serial_port.read(2000)
+                # 读取数据，直接写入预分配缓冲区
+                incoming_data = data_buffer.fill_from(self.serial_port)
                 
                 if incoming_data:
-                    data_buffer.extend(incoming_data)
-                    
-                    # 处理缓冲区中的完整帧
-                    while len(data_buffer) >= 4:
-                        frame_start = find_frame_start(data_buffer)
-                        
-                        if frame_start == -1:
-                            if len(data_buffer) > 3:
-                                data_buffer = data_buffer[-3:]
-                            break
-                            
-                        if frame_start > 0:
-                            data_buffer = data_buffer[frame_start:]
-                            frame_start = 0
-                            
-                        frame_content, next_frame_pos = extract_frame_content(data_buffer, frame_start)
-                        
-                        if next_frame_pos == -1:
-                            break
-                            
-                        # 处理完整帧
-                        if len(frame_content) > 0:
-                            self.frame_count += 1
-                            timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-                            
-                            # 多设备模式：累积多个1024字节帧
-                            if self.is_multi_device_mode and len(frame_content) == 1024:
-                                self.device_buffer.extend(frame_content)
-                                self.device_frame_count += 1
-                                
-                                # 调试信息
-                                device_name = {
-                                    "dual_1024": "双设备",
-                                    "triple_1024": "三设备", 
-                                    "walkway": "步道"
-                                }.get(self.device_type, "多设备")
-                                
-                                # 检查是否收集够指定数量的帧
-                                if self.device_frame_count >= self.expected_device_frames:
-                                    # 将合并的数据放入队列
-                                    combined_data = bytes(self.device_buffer)
-                                    frame_data = {
-                                        'data': combined_data,
-                                        'timestamp': timestamp,
-                                        'frame_number': self.frame_count,
-                                        'data_length': len(combined_data),
-                                        'device_frames': self.device_frame_count,
-                                        'device_type': self.device_type
-                                    }
-                                    
-                                    # 向后兼容性字段
-                                    if self.device_type == "walkway":
-                                        frame_data['walkway_frames'] = self.device_frame_count
-                                    
-                                    self.data_queue.put(frame_data)
-                                    
-                                    # 清空缓冲区准备下一组
-                                    self.device_buffer.clear()
-                                    self.device_frame_count = 0
-                            else:
-                                # 普通模式或非1024字节帧，直接处理
-                                frame_data = {
-                                    'data': frame_content,
-                                    'timestamp': timestamp,
-                                    'frame_number': self.frame_count,
-                                    'data_length': len(frame_content)
-                                }
-                                self.data_queue.put(frame_data)
-                            
-                        data_buffer = data_buffer[next_frame_pos:]
+                    # 在接收线程中记录采集时间戳（整数纳秒，输出时再格式化）
+                    capture_ns = capture_timestamp_ns()
                     
-                    # 限制缓冲区大小
-                    if len(data_buffer) > 5000:  # 减少缓冲区大小，降低延迟
-                        data_buffer = data_buffer[-500:]
+                    # 逐个取出完整帧（memoryview，不复制）
+                    frame_content = data_buffer.next_frame()
+                    while frame_content is not None:
+                        payload = validator.validate(frame_content)
+                        if payload is not None:
+                            self._handle_received_frame(payload, capture_ns)
+                        frame_content = data_buffer.next_frame()
                         
                 # 减少延迟，只在没有数据时稍微休眠
                 if not incoming_data:
@@ -491,13 +481,57 @@ class SerialInterface:
                     print(f"数据接收错误: {e}")
                 break 
     
+    def _handle_received_frame(self, frame_content, capture_ns):
+        """处理单端口接收到的一个完整帧
+        
+        frame_content为接收缓冲区的memoryview，只在写入帧池时复制一次；
+        capture_ns为接收该数据时的采集时间戳
+        """
+        frame_length = len(frame_content)
+        if frame_length == 0:
+            return
+        
+        self.frame_count += 1
+        frame_pool = self.frame_pool
+        
+        # 多设备模式：累积多个1024字节帧，各段直接写入同一个帧池槽位
+        if self.is_multi_device_mode and frame_length == 1024:
+            if self.device_frame_count == 0:
+                self._pending_slot = frame_pool.acquire()
+            frame_pool.write_segment(self._pending_slot, self.device_frame_count * 1024, frame_content)
+            self.device_frame_count += 1
+            
+            # 检查是否收集够指定数量的帧
+            if self.device_frame_count >= self.expected_device_frames:
+                frame_data = frame_pool.publish(self._pending_slot, self.device_frame_count * 1024,
+                                                self.frame_count, capture_ns)
+                frame_data['device_frames'] = self.device_frame_count
+                frame_data['device_type'] = self.device_type
+                
+                # 向后兼容性字段
+                if self.device_type == "walkway":
+                    frame_data['walkway_frames'] = self.device_frame_count
+                
+                self._publish_frame(frame_data)
+                
+                # 准备下一组
+                self.device_frame_count = 0
+        elif frame_length <= frame_pool.frame_size:
+            # 普通模式，直接写入帧池
+            self._publish_frame(frame_pool.write(frame_content, self.frame_count, capture_ns))
+        else:
+            # 超长帧（仅定界模式可能出现），保持原有字典格式
+            self._publish_frame({
+                'data': bytes(frame_content),
+                'timestamp': capture_ns,
+                'frame_number': self.frame_count,
+                'data_length': frame_length
+            })
+    
     # 向后兼容性方法
     def set_walkway_mode(self, is_walkway):
         """设置步道模式（向后兼容）"""
         if is_walkway:
             self.set_device_mode("walkway")
         else:
-            self.set_device_mode("single")
-            # 清空缓冲区
-            self.device_buffer.clear()
-            self.device_frame_count = 0
\ No newline at end of file
+            self.set_device_mode("single")
\ No newline at end of file
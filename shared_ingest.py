@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+独立进程接收模块 - 在子进程中运行SerialInterface的接收/合并线程
+
+子进程把帧写入multiprocessing.shared_memory中的帧池槽位，通过管道只传递
+槽位号和发布序号；主进程（UI、记录）映射同一块共享内存，按FrameRef读取。
+接收、分帧和多端口合并不再与Tk主循环争用同一个GIL。
+"""
+
+import multiprocessing
+import threading
+import time
+import weakref
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from frame_pool import FramePool, FrameRef
+from serial_interface import SerialInterface
+
+# 共享帧池槽位数（主进程的读取线程只需在槽位被覆盖前把帧放入队列/记录通道）
+SHARED_POOL_CAPACITY = 128
+
+# 子进程启动并完成连接的最长等待时间（秒），spawn需要重新导入numpy/pyserial
+WORKER_START_TIMEOUT = 15.0
+
+# 子进程主动上报统计的间隔（秒）
+WORKER_STATS_INTERVAL = 0.5
+
+
+def _align(offset, alignment=8):
+    return (offset + alignment - 1) // alignment * alignment
+
+
+def _release_shared_memory(shm, unlink):
+    """释放共享内存：创建方负责删除名字，仍有numpy视图引用时保留映射直到视图释放"""
+    if unlink:
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+    try:
+        shm.close()
+    except BufferError:
+        pass
+
+
+class SharedFramePool(FramePool):
+    """共享内存帧池
+
+    与FramePool的槽位布局和接口相同，frames/lengths/timestamps/frame_numbers/sequences
+    都位于同一块共享内存中。主进程创建（name=None），子进程按名字映射同一块内存。
+    发布序号计数器（sequence）只在写入方（子进程）使用。
+    """
+
+    def __init__(self, rows=32, cols=32, capacity=SHARED_POOL_CAPACITY, name=None):
+        """
+        Args:
+            rows (int): 每帧行数
+            cols (int): 每帧列数
+            capacity (int): 槽位数量
+            name (str): 已有共享内存的名字，None表示新建
+        """
+        self.rows = rows
+        self.cols = cols
+        self.frame_size = rows * cols
+        self.capacity = capacity
+
+        frames_bytes = capacity * self.frame_size
+        lengths_offset = _align(frames_bytes)
+        timestamps_offset = _align(lengths_offset + capacity * 4)
+        frame_numbers_offset = timestamps_offset + capacity * 8
+        sequences_offset = frame_numbers_offset + capacity * 8
+        total_size = sequences_offset + capacity * 8
+
+        create = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=total_size if create else 0)
+        self.owner = create
+        buffer = self.shm.buf
+
+        self.frames = np.ndarray((capacity, rows, cols), dtype=np.uint8, buffer=buffer)
+        self._flat_frames = self.frames.reshape(capacity, self.frame_size)
+        self.lengths = np.ndarray(capacity, dtype=np.int32, buffer=buffer, offset=lengths_offset)
+        self.timestamps = np.ndarray(capacity, dtype=np.int64, buffer=buffer, offset=timestamps_offset)
+        self.frame_numbers = np.ndarray(capacity, dtype=np.int64, buffer=buffer, offset=frame_numbers_offset)
+        self.sequences = np.ndarray(capacity, dtype=np.int64, buffer=buffer, offset=sequences_offset)
+
+        if create:
+            self.frames.fill(0)
+            self.lengths.fill(0)
+            self.timestamps.fill(0)
+            self.frame_numbers.fill(0)
+            self.sequences.fill(-1)
+
+        self.sequence = 0
+        self._finalizer = weakref.finalize(self, _release_shared_memory, self.shm, create)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def describe(self):
+        """子进程映射同一块内存所需的参数"""
+        return {'name': self.name, 'rows': self.rows, 'cols': self.cols, 'capacity': self.capacity}
+
+    @classmethod
+    def attach(cls, description):
+        """按describe()的结果映射已有的共享帧池"""
+        return cls(description['rows'], description['cols'], description['capacity'], name=description['name'])
+
+    def release(self):
+        """释放共享内存（创建方同时删除名字）"""
+        self._finalizer()
+
+
+def _source_stats(interface):
+    """虚拟端口（模拟设备）的统计，真实串口为None"""
+    if interface.multi_port_config and len(interface.multi_port_config) > 1:
+        ports = [port for _, port in sorted(interface.serial_ports.items())]
+    else:
+        ports = [interface.serial_port]
+
+    stats = []
+    for port in ports:
+        source = getattr(port, 'source', port)
+        get_stats = getattr(source, 'get_stats', None)
+        stats.append(get_stats() if get_stats else None)
+    return stats
+
+
+def _worker_stats(interface):
+    return {
+        'frame_count': interface.frame_count,
+        'integrity': interface.get_integrity_stats(),
+        'sync': interface.get_sync_stats(),
+        'sources': _source_stats(interface),
+        'cpu_ms': time.process_time_ns() / 1e6
+    }
+
+
+def ingest_worker(config, conn, stop_event):
+    """
+    子进程入口：创建SerialInterface并把发布的帧写入共享帧池
+
+    必须为模块级函数（Windows使用spawn启动子进程）。
+
+    Args:
+        config (dict): 接口配置（端口、设备模式、分帧模式、多端口配置、共享帧池参数）
+        conn (Connection): 与主进程通信的管道
+        stop_event (Event): 主进程请求停止
+    """
+    send_lock = threading.Lock()
+
+    def send(message):
+        with send_lock:
+            conn.send(message)
+
+    interface = SerialInterface(baudrate=config['baudrate'])
+    pool = None
+    try:
+        interface.set_parse_mode(config['parse_mode'])
+        interface.frame_trailer = config['frame_trailer']
+        if config['multi_port_config']:
+            interface.set_multi_port_config(config['multi_port_config'])
+        interface.set_device_mode(config['device_type'])
+        interface.set_sync_tolerance(config['sync_tolerance_ms'])
+
+        # set_device_mode会重建帧池，之后再替换为共享帧池
+        pool = SharedFramePool.attach(config['pool'])
+        interface.frame_pool = pool
+
+        def on_frame(frame_data):
+            if isinstance(frame_data, FrameRef):
+                send(('frame', frame_data.slot, frame_data.sequence, frame_data.extra or None))
+            else:
+                # 超长帧（仅定界模式可能出现）不在帧池中，直接传递
+                send(('dict', frame_data))
+
+        interface.add_frame_listener(on_frame)
+
+        connected = interface.connect(config['port'])
+        send(('status', bool(connected), None if connected else "端口连接失败"))
+        if not connected:
+            return
+
+        last_stats = time.monotonic()
+        while not stop_event.is_set():
+            if conn.poll(0.05):
+                command = conn.recv()
+                if command == 'stop':
+                    break
+                if command == 'stats':
+                    send(('stats', _worker_stats(interface)))
+                    last_stats = time.monotonic()
+
+            if not interface.is_connected():
+                send(('status', False, "接收线程已停止"))
+                break
+
+            if time.monotonic() - last_stats >= WORKER_STATS_INTERVAL:
+                send(('stats', _worker_stats(interface)))
+                last_stats = time.monotonic()
+    except (EOFError, BrokenPipeError):
+        pass
+    except Exception as e:
+        try:
+            send(('status', False, str(e)))
+        except Exception:
+            pass
+    finally:
+        interface.disconnect()
+        if pool is not None:
+            pool.release()
+
+
+class ProcessIngestInterface(SerialInterface):
+    """独立进程接收接口
+
+    与SerialInterface接口兼容（显示队列、记录通道、新帧回调、多端口配置），
+    串口读取、分帧、多端口时间对齐和JQ拼接都在子进程中完成。主进程只运行一个
+    读取线程：从管道取出槽位号和序号，构造指向共享帧池的FrameRef并发布。
+    记录通道在发布时复制帧，不受槽位覆盖影响。
+    """
+
+    def __init__(self, baudrate=1000000, queue_maxsize=16):
+        super().__init__(baudrate=baudrate, queue_maxsize=queue_maxsize)
+        self.process = None
+        self.conn = None
+        self.stop_event = None
+        self.reader_thread = None
+        self.port_name = None
+        self.shared_pool = None
+        self.last_error = None
+        self.worker_stats = {}
+        self._stats_event = threading.Event()
+        self._mp = multiprocessing.get_context('spawn')
+
+    def set_device_mode(self, device_type):
+        """设置设备模式，连接中修改时重启子进程"""
+        changed = device_type != self.device_type
+        super().set_device_mode(device_type)
+        if changed and self.is_running and self.port_name is not None:
+            print(f"🔄 设备模式变为 {device_type}，重启接收进程")
+            port_name = self.port_name
+            self.disconnect()
+            self.connect(port_name)
+
+    def _ensure_shared_pool(self):
+        """按设备帧数准备共享帧池，尺寸不变时复用"""
+        rows, cols = 32, 32 * self.expected_device_frames
+        pool = self.shared_pool
+        if pool is None or (pool.rows, pool.cols) != (rows, cols):
+            if pool is not None:
+                pool.release()
+            pool = SharedFramePool(rows, cols, SHARED_POOL_CAPACITY)
+            self.shared_pool = pool
+        self.frame_pool = pool
+        return pool
+
+    def connect(self, port_name):
+        """启动接收子进程并等待其完成端口连接"""
+        if self.is_running:
+            self.disconnect()
+
+        pool = self._ensure_shared_pool()
+        config = {
+            'port': port_name,
+            'baudrate': self.baudrate,
+            'parse_mode': self.parse_mode,
+            'frame_trailer': self.frame_trailer,
+            'device_type': self.device_type,
+            'multi_port_config': self.multi_port_config,
+            'sync_tolerance_ms': self.sync_tolerance_ms,
+            'pool': pool.describe()
+        }
+
+        parent_conn, child_conn = self._mp.Pipe()
+        self.stop_event = self._mp.Event()
+        self.process = self._mp.Process(target=ingest_worker, args=(config, child_conn, self.stop_event),
+                                        name="SerialIngest", daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+        self.port_name = port_name
+
+        try:
+            status = self._wait_status(WORKER_START_TIMEOUT)
+        except Exception as e:
+            self._stop_process()
+            raise Exception(f"连接失败: {e}")
+
+        if not status:
+            self._stop_process()
+            if self.multi_port_config and len(self.multi_port_config) > 1:
+                print(f"⚠️ 接收进程多端口连接失败: {self.last_error}")
+                return False
+            raise Exception(f"连接失败: {self.last_error}")
+
+        self.is_running = True
+        self.reader_thread = threading.Thread(target=self._reader_thread, name="IngestReader", daemon=True)
+        self.reader_thread.start()
+        print(f"✅ 接收进程已启动 (PID {self.process.pid}, 共享帧池 {pool.rows}x{pool.cols}x{pool.capacity})")
+        return True
+
+    def _wait_status(self, timeout):
+        """等待子进程上报连接结果"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if not self.conn.poll(0.1):
+                if not self.process.is_alive():
+                    raise Exception(f"接收进程已退出 (exitcode={self.process.exitcode})")
+                continue
+            message = self.conn.recv()
+            if message[0] == 'status':
+                self.last_error = message[2]
+                return message[1]
+        raise Exception("接收进程启动超时")
+
+    def _reader_thread(self):
+        """把子进程发来的槽位号转换为FrameRef并发布"""
+        conn = self.conn
+        pool = self.shared_pool
+        while self.is_running:
+            try:
+                if not conn.poll(0.1):
+                    continue
+                message = conn.recv()
+            except (EOFError, OSError):
+                if self.is_running:
+                    print("❌ 接收进程连接中断")
+                    self.last_error = "接收进程连接中断"
+                    self.is_running = False
+                break
+
+            kind = message[0]
+            if kind == 'frame':
+                _, slot, sequence, extra = message
+                self.frame_count = int(pool.frame_numbers[slot])
+                self._publish_frame(FrameRef(pool, slot, sequence, extra))
+            elif kind == 'dict':
+                frame_data = message[1]
+                self.frame_count = frame_data.get('frame_number', self.frame_count)
+                self._publish_frame(frame_data)
+            elif kind == 'stats':
+                self.worker_stats = message[1]
+                self._stats_event.set()
+            elif kind == 'status' and not message[1]:
+                print(f"❌ 接收进程停止: {message[2]}")
+                self.last_error = message[2]
+                self.is_running = False
+                break
+
+    def _stop_process(self, timeout=2.0):
+        if self.stop_event is not None:
+            self.stop_event.set()
+        if self.process is not None:
+            self.process.join(timeout=timeout)
+            if self.process.is_alive():
+                print("⚠️ 接收进程未能及时退出，强制结束")
+                self.process.terminate()
+                self.process.join(timeout=timeout)
+        if self.conn is not None:
+            self.conn.close()
+        self.process = None
+        self.conn = None
+        self.stop_event = None
+
+    def disconnect(self):
+        """停止读取线程和接收子进程（共享帧池保留，已发布的FrameRef仍可读取）"""
+        self.is_running = False
+        self.data_queue.wake()
+        if self.reader_thread is not None and self.reader_thread is not threading.current_thread():
+            self.reader_thread.join(timeout=1.0)
+        self.reader_thread = None
+        self._stop_process()
+
+    def close(self):
+        """断开并释放共享内存（退出程序时调用）"""
+        self.disconnect()
+        if self.shared_pool is not None:
+            self.shared_pool.release()
+            self.shared_pool = None
+
+    def is_connected(self):
+        return bool(self.is_running and self.process is not None and self.process.is_alive())
+
+    def get_current_port(self):
+        if self.multi_port_config and len(self.multi_port_config) > 1:
+            return self.multi_port_config[0]['port']
+        if self.is_connected():
+            return self.port_name
+        return None
+
+    def request_worker_stats(self, timeout=1.0):
+        """请求子进程立即上报统计并等待结果，超时返回最近一次的统计"""
+        if not self.is_connected():
+            return self.worker_stats
+        self._stats_event.clear()
+        try:
+            self.conn.send('stats')
+        except (OSError, ValueError):
+            return self.worker_stats
+        self._stats_event.wait(timeout)
+        return self.worker_stats
+
+    def get_sync_stats(self):
+        """子进程中的多端口帧同步统计（最近一次上报），单端口模式返回None"""
+        return self.worker_stats.get('sync')
+
+    def get_integrity_stats(self):
+        """子进程中各端口的帧完整性统计（最近一次上报）"""
+        return self.worker_stats.get('integrity', {})
+
+    def get_worker_stats(self):
+        """子进程统计（最近一次上报）：帧计数、完整性统计、同步统计、虚拟端口统计、子进程CPU时间"""
+        return self.worker_stats
+
+
+def create_serial_interface(backend="thread", baudrate=1000000):
+    """
+    按接收后端创建串口接口
+
+    Args:
+        backend (str): "thread"=在本进程的线程中接收（SerialInterface），
+                       "process"=在独立子进程中接收（ProcessIngestInterface）
+    """
+    if backend == "process":
+        return ProcessIngestInterface(baudrate=baudrate)
+    return SerialInterface(baudrate=baudrate)
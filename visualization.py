@@ -4,14 +4,24 @@
 可视化模块 - 负责压力传感器数据的图形显示
 """
 
+import time
+import tkinter as tk
+from collections import deque
+
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
 import matplotlib.colors as colors
 import matplotlib.font_manager as fm
+import matplotlib.transforms as mtransforms
 from scipy import ndimage
 
+from calibration import PressureCalibration
+from frame_processing import TickTimer
+from frame_smoothing import GaussianSmoother
+
 # 解决中文字体警告问题
 plt.rcParams['font.sans-serif'] = ['SimHei', 'DejaVu Sans', 'Arial Unicode MS', 'Microsoft YaHei']
 plt.rcParams['axes.unicode_minus'] = False  # 解决保存图像是负号'-'显示为方块的问题
@@ -24,9 +34,10 @@ class HeatmapVisualizer:
         self.array_rows = array_rows
         self.array_cols = array_cols
         
-        # 平滑处理参数 - 默认关闭以提升性能
-        self.enable_smoothing = False  # 关闭平滑处理提升性能
-        self.smooth_sigma = 0.5        # 减小sigma值降低计算量
+        # 平滑处理参数 - uint8帧使用缓存核的整数高斯平滑（处理线程已平滑时由界面关闭）
+        self.enable_smoothing = True
+        self.smooth_sigma = 0.8
+        self.smoother = GaussianSmoother(self.smooth_sigma)
         
         # 性能优化参数
         self.frame_skip_counter = 0
@@ -34,6 +45,21 @@ class HeatmapVisualizer:
         self.last_render_time = 0
         self.min_render_interval = 0.033  # 最小渲染间隔33ms (30fps)
         
+        # 局部重绘（blit）：坐标轴、颜色条、刻度作为静态背景缓存，每帧只重绘热力图和标题统计文字
+        self.use_blit = True
+        self._blit_regions = None  # [(bbox, 背景像素)]，整图重绘后重新缓存
+        self.stats_text = None     # 标题位置的统计文字（替代ax.set_title，可单独重绘）
+        
+        # 叠加层：CoP点、CoP轨迹、左右接触区域外接框（数据由PressureOverlayTracker给出）
+        self.show_overlay = True
+        self._overlay = None
+        
+        # 渲染统计：每帧渲染耗时和最近的渲染时刻（计算FPS）
+        self.render_timer = TickTimer(window=300)
+        self._render_times = deque(maxlen=60)
+        self.rendered_frames = 0
+        self.skipped_frames = 0
+        
         # 创建强对比度颜色映射
         self.setup_colormap()
         
@@ -62,8 +88,41 @@ class HeatmapVisualizer:
         # 使用简单线性归一化，取消Gamma校正以提升性能
         self.norm = colors.Normalize(vmin=0, vmax=255)
         
-        # 压力单位转换：0-255 对应 0-60mmHg
+        # 叠加层颜色：与白-蓝-紫-红色阶区分明显
+        self.cop_color = '#FFD600'
+        self.contact_colors = ('#00C853', '#FF6D00')  # 左、右
+        
+        # 压力单位转换：默认0-255线性对应0-60mmHg，设备有标定时由set_calibration替换
+        self.calibration = PressureCalibration.linear()
         self.pressure_scale = 60.0 / 255.0  # mmHg per unit
+        
+    def _colorbar_ticks(self):
+        """颜色条刻度：位置为原始值，标签为标定后的物理压力"""
+        tick_positions = [0, 42, 85, 128, 170, 213, 255]
+        unit = self.calibration.unit
+        tick_labels = [f'{int(value)} {unit}' for value in self.calibration.lut[tick_positions]]
+        return tick_positions, tick_labels
+        
+    def _apply_colorbar_labels(self):
+        """按当前标定设置颜色条单位和刻度标签"""
+        self.colorbar.set_label(f'Pressure ({self.calibration.unit})', rotation=270, labelpad=25, fontsize=14, fontweight='bold')
+        tick_positions, tick_labels = self._colorbar_ticks()
+        self.colorbar.set_ticks(tick_positions)
+        self.colorbar.set_ticklabels(tick_labels)
+        
+    def set_calibration(self, calibration):
+        """设置压力标定（颜色条刻度和标题统计使用物理单位）"""
+        self.calibration = calibration or PressureCalibration.linear()
+        if getattr(self, 'colorbar', None) is not None:
+            self._apply_colorbar_labels()
+            self.canvas.draw_idle()
+    
+    def set_smoothing(self, enabled, sigma=None):
+        """开启/关闭显示平滑，sigma为None时保持当前值"""
+        self.enable_smoothing = enabled
+        if sigma is not None and sigma != self.smooth_sigma:
+            self.smooth_sigma = sigma
+            self.smoother.set_sigma(sigma)
     
     def smooth_data(self, data_matrix):
         """对数据进行高斯平滑处理，进一步消除边界感"""
@@ -71,31 +130,34 @@ class HeatmapVisualizer:
             return data_matrix
         
         try:
-            # 使用高斯滤波进行平滑处理
+            if data_matrix.dtype == np.uint8:
+                return self.smoother(data_matrix)
+            # 非uint8数据使用scipy高斯滤波
             smoothed = ndimage.gaussian_filter(data_matrix, sigma=self.smooth_sigma, mode='nearest')
             return smoothed
         except:
             # 如果scipy不可用，返回原数据
             return data_matrix
         
-    def setup_figure(self):
-        """设置matplotlib图形"""
-        # 根据数组尺寸调整图形大小
+    def _figure_size(self):
+        """根据数组尺寸计算图形大小（英寸）"""
         aspect_ratio = self.array_cols / self.array_rows
         
         # 基于数据真实比例计算最佳显示尺寸，同时最大化利用显示空间
         if aspect_ratio > 1.5:  # 宽矩形（如32x64=2.0, 32x96=3.0）
             # 让宽矩形尽可能占满水平空间
             base_width = 16  # 更大的宽度
-            figsize = (base_width, base_width / aspect_ratio)
+            return (base_width, base_width / aspect_ratio)
         elif aspect_ratio < 0.7:  # 高矩形（如64x32, 96x32）
             # 让高矩形尽可能占满垂直空间
             base_height = 12
-            figsize = (base_height * aspect_ratio, base_height)
-        else:  # 接近正方形
-            figsize = (12, 12)
+            return (base_height * aspect_ratio, base_height)
+        # 接近正方形
+        return (12, 12)
         
-        self.fig = Figure(figsize=figsize, dpi=100, facecolor='white')
+    def setup_figure(self):
+        """设置matplotlib图形"""
+        self.fig = Figure(figsize=self._figure_size(), dpi=100, facecolor='white')
         self.ax = self.fig.add_subplot(111)
         
         # 初始化数据
@@ -114,7 +176,9 @@ class HeatmapVisualizer:
         )
         
         # 设置标题和标签 - 移除轴标签，只保留刻度
+        self._create_stats_text()
         self.update_title()
+        self._create_overlay_artists()
         # 移除X/Y轴标签以简化界面
         
         # 为提升性能，完全移除网格线
@@ -126,13 +190,9 @@ class HeatmapVisualizer:
         
         # 添加颜色条
         self.colorbar = self.fig.colorbar(self.im, ax=self.ax, fraction=0.046, pad=0.04)
-        self.colorbar.set_label('Pressure (mmHg)', rotation=270, labelpad=25, fontsize=14, fontweight='bold')
         
-        # 设置颜色条标签 - 显示mmHg单位，0-255对应0-60mmHg
-        tick_positions = [0, 42, 85, 128, 170, 213, 255]  # 更多刻度点
-        tick_labels = [f'{int(pos * self.pressure_scale)} mmHg' for pos in tick_positions]
-        self.colorbar.set_ticks(tick_positions)
-        self.colorbar.set_ticklabels(tick_labels)
+        # 设置颜色条标签 - 显示物理单位（默认0-255对应0-60mmHg）
+        self._apply_colorbar_labels()
         
         # 设置坐标轴范围，确保热力图填满整个显示区域
         self.ax.set_xlim(-0.5, self.array_cols - 0.5)
@@ -141,65 +201,204 @@ class HeatmapVisualizer:
         # 调整布局，为颜色条预留空间，让热力图尽可能大
         self.fig.subplots_adjust(left=0.05, right=0.8, top=0.95, bottom=0.05)
         
-        # 嵌入到tkinter
+        # 嵌入到tkinter；每次整图重绘（首次显示、缩放、换标定）后重新缓存blit背景
         self.canvas = FigureCanvasTkAgg(self.fig, master=self.parent_frame)
+        self.canvas.mpl_connect('draw_event', self._on_draw)
         self.canvas.draw()
         self.canvas.get_tk_widget().pack(fill='both', expand=True)
         
+    def _create_stats_text(self):
+        """在标题位置（坐标轴上方20pt）创建统计文字，blit模式下作为动画元素单独重绘"""
+        offset = mtransforms.ScaledTranslation(0, 20 / 72, self.fig.dpi_scale_trans)
+        self.stats_text = self.ax.text(
+            0.5, 1.0, '',
+            transform=self.ax.transAxes + offset,
+            ha='center', va='baseline',
+            fontsize=16, fontweight='bold',
+            animated=self.use_blit
+        )
+        
     def update_title(self):
         """更新标题"""
         title = f'Pressure Sensor ({self.array_rows}x{self.array_cols}) - Smooth Gradient'
-        self.ax.set_title(title, fontsize=16, fontweight='bold', pad=20)
+        self.stats_text.set_text(title)
+        
+    def _create_overlay_artists(self):
+        """叠加层元素（CoP轨迹、CoP点、左右接触框），与热力图一起作为动画元素重绘"""
+        animated = self.use_blit
+        self.cop_trail_line, = self.ax.plot([], [], '-', color=self.cop_color, linewidth=2,
+                                            alpha=0.8, animated=animated)
+        self.cop_marker, = self.ax.plot([], [], 'o', markersize=10, markerfacecolor=self.cop_color,
+                                        markeredgecolor='black', animated=animated)
+        self.contact_lines = [self.ax.plot([], [], '--', color=color, linewidth=1.5, animated=animated)[0]
+                              for color in self.contact_colors]
+        self._overlay_artists = [self.cop_trail_line, *self.contact_lines, self.cop_marker]
+        self._apply_overlay(self._overlay)
+        
+    @staticmethod
+    def _box_outline(box):
+        """接触框 (row0, row1, col0, col1) 的闭合折线（数据坐标，格边界）"""
+        row0, row1, col0, col1 = box
+        xs = [col0 - 0.5, col1 + 0.5, col1 + 0.5, col0 - 0.5, col0 - 0.5]
+        ys = [row0 - 0.5, row0 - 0.5, row1 + 0.5, row1 + 0.5, row0 - 0.5]
+        return xs, ys
+        
+    def _apply_overlay(self, overlay):
+        """把叠加层数据设置到matplotlib元素，overlay为None或关闭显示时清空"""
+        if not self.show_overlay:
+            overlay = None
+        trail = overlay['trail'] if overlay else None
+        if trail is not None and len(trail) >= 2:
+            self.cop_trail_line.set_data(trail[:, 0], trail[:, 1])
+        else:
+            self.cop_trail_line.set_data([], [])
+        cop = overlay['cop'] if overlay else None
+        if cop:
+            self.cop_marker.set_data([cop[0]], [cop[1]])
+        else:
+            self.cop_marker.set_data([], [])
+        contacts = overlay['contacts'] if overlay else ()
+        for index, line in enumerate(self.contact_lines):
+            box = contacts[index] if index < len(contacts) else None
+            if box is None:
+                line.set_data([], [])
+            else:
+                line.set_data(*self._box_outline(box))
+        
+    def set_overlay_enabled(self, enabled):
+        """开启/关闭叠加层显示"""
+        self.show_overlay = enabled
+        self._apply_overlay(self._overlay)
+        
+    def _animated_artists(self):
+        """每帧重绘的元素"""
+        return [self.im, *self._overlay_artists, self.stats_text]
+        
+    def _on_draw(self, event):
+        """整图重绘后缓存静态背景，并画上动画元素（整图重绘不包含animated元素）"""
+        if not self.use_blit:
+            return
+        canvas = self.canvas
+        if canvas.is_saving():
+            # 保存快照时按保存dpi重绘，不能作为屏幕背景
+            return
+        if not getattr(canvas, 'supports_blit', False):
+            self._blit_regions = None
+            return
+        
+        ax_bbox = self.ax.bbox.frozen()
+        fig_bbox = self.fig.bbox
+        # 热力图区域 + 坐标轴上方的标题条（颜色条不在其中，不会被重绘）
+        title_bbox = mtransforms.Bbox.from_extents(fig_bbox.x0, ax_bbox.y1, fig_bbox.x1, fig_bbox.y1)
+        self._blit_regions = [(bbox, canvas.copy_from_bbox(bbox)) for bbox in (ax_bbox, title_bbox)]
+        
+        for artist in self._animated_artists():
+            self.ax.draw_artist(artist)
+        
+    def _render(self):
+        """重绘热力图：有缓存背景时局部重绘，否则整图重绘"""
+        if self.use_blit and self._blit_regions is not None:
+            canvas = self.canvas
+            for _, background in self._blit_regions:
+                canvas.restore_region(background)
+            for artist in self._animated_artists():
+                self.ax.draw_artist(artist)
+            for bbox, _ in self._blit_regions:
+                canvas.blit(bbox)
+        else:
+            self.canvas.draw_idle()  # 使用idle绘制，减少频繁重绘
+        
+    def get_render_stats(self):
+        """
+        渲染统计
+        
+        Returns:
+            dict: fps（最近60帧）、每帧渲染耗时分位数、已渲染/跳过帧数、是否使用blit
+        """
+        fps = 0.0
+        if len(self._render_times) >= 2:
+            span = self._render_times[-1] - self._render_times[0]
+            if span > 0:
+                fps = (len(self._render_times) - 1) / span
+        render_time = self.render_timer.get_stats()
+        return {
+            'fps': fps,
+            'render_p50_ms': render_time['p50_ms'],
+            'render_p95_ms': render_time['p95_ms'],
+            'render_max_ms': render_time['max_ms'],
+            'rendered': self.rendered_frames,
+            'skipped': self.skipped_frames,
+            'blit': self.use_blit and self._blit_regions is not None
+        }
+        
+    def _should_render(self, current_time):
+        """帧跳跃优化：距离上次渲染太近的帧跳过（每frame_skip_threshold帧至少渲染一帧）"""
+        if current_time - self.last_render_time < self.min_render_interval:
+            self.frame_skip_counter += 1
+            if self.frame_skip_counter < self.frame_skip_threshold:
+                self.skipped_frames += 1
+                return False
         
-    def update_data(self, matrix_2d, statistics=None):
-        """更新显示数据 - 带帧跳跃优化"""
+        # 重置计数器并记录渲染时间
+        self.frame_skip_counter = 0
+        self.last_render_time = current_time
+        return True
+        
+    def _record_render(self, render_start, current_time):
+        """记录一帧的渲染耗时和渲染时刻"""
+        self.render_timer.stop(render_start)
+        self.rendered_frames += 1
+        self._render_times.append(current_time)
+        
+    def _format_title(self, statistics):
+        """标题统计文字（物理单位）"""
+        if 'max_pressure' in statistics:
+            # 数据处理器已按设备标定换算
+            max_pressure = statistics["max_pressure"]
+            min_pressure = statistics["min_pressure"]
+            avg_pressure = statistics["mean_pressure"]
+            unit = statistics.get("pressure_unit", self.calibration.unit)
+        else:
+            max_pressure = statistics["max_value"] * self.pressure_scale
+            min_pressure = statistics["min_value"] * self.pressure_scale
+            avg_pressure = statistics["mean_value"] * self.pressure_scale
+            unit = 'mmHg'
+        title = f'Pressure ({self.array_rows}x{self.array_cols}) - '
+        title += f'Max:{max_pressure:.1f} Min:{min_pressure:.1f} Avg:{avg_pressure:.1f}{unit}'
+        return title
+        
+    def update_data(self, matrix_2d, statistics=None, overlay=None):
+        """更新显示数据 - 带帧跳跃优化（overlay为PressureOverlayTracker.update的结果）"""
         try:
             # 检查数据有效性
             if matrix_2d is None or matrix_2d.size == 0:
                 return
             
             # 帧跳跃优化：控制渲染频率
-            import time
             current_time = time.time()
+            if not self._should_render(current_time):
+                return
+            render_start = self.render_timer.start()
             
-            # 如果距离上次渲染时间太短，跳过此帧
-            if current_time - self.last_render_time < self.min_render_interval:
-                self.frame_skip_counter += 1
-                if self.frame_skip_counter < self.frame_skip_threshold:
-                    return
-            
-            # 重置计数器并记录渲染时间
-            self.frame_skip_counter = 0
-            self.last_render_time = current_time
+            # 检查数组大小是否改变，如果改变需要重新配置
+            if matrix_2d.shape != (self.array_rows, self.array_cols):
+                self.set_array_size(*matrix_2d.shape)
             
             # 应用平滑处理
             smoothed_matrix = self.smooth_data(matrix_2d)
             
-            # 检查数组大小是否改变，如果改变需要重新配置
-            if matrix_2d.shape != (self.array_rows, self.array_cols):
-                self.array_rows, self.array_cols = matrix_2d.shape
-                # 需要重新设置图像大小
-                self.set_array_size(self.array_rows, self.array_cols)
-                # 重新设置后，继续用新数据更新（不要return）
-                smoothed_matrix = self.smooth_data(matrix_2d)  # 重新计算平滑数据
-            
-            # 更新热力图数据
+            # 更新热力图数据（颜色映射范围由固定的norm决定）
             self.im.set_array(smoothed_matrix)
-            
-            # 确保颜色映射范围正确
-            self.im.set_clim(0, 255)
+            self._overlay = overlay
+            self._apply_overlay(overlay)
             
             # 更新标题包含统计信息
             if statistics:
-                max_mmhg = statistics["max_value"] * self.pressure_scale
-                min_mmhg = statistics["min_value"] * self.pressure_scale
-                avg_mmhg = statistics["mean_value"] * self.pressure_scale
-                title = f'Pressure ({self.array_rows}x{self.array_cols}) - '
-                title += f'Max:{max_mmhg:.1f} Min:{min_mmhg:.1f} Avg:{avg_mmhg:.1f}mmHg'
-                self.ax.set_title(title, fontsize=16, fontweight='bold', pad=20)
+                self.stats_text.set_text(self._format_title(statistics))
             
-            # 使用快速重绘，只更新数据区域
-            self.canvas.draw_idle()  # 使用idle绘制，减少频繁重绘
+            # 只重绘数据区域和标题统计
+            self._render()
+            self._record_render(render_start, current_time)
             
         except Exception as e:
             pass
@@ -207,24 +406,12 @@ class HeatmapVisualizer:
     def set_array_size(self, rows, cols):
         """设置新的阵列大小"""
         if rows != self.array_rows or cols != self.array_cols:
+            self._blit_regions = None
             self.array_rows = rows
             self.array_cols = cols
             
             # 根据新的数组尺寸调整图形大小
-            aspect_ratio = self.array_cols / self.array_rows
-            
-            # 基于数据真实比例计算最佳显示尺寸，同时最大化利用显示空间
-            if aspect_ratio > 1.5:  # 宽矩形（如32x64=2.0, 32x96=3.0）
-                # 让宽矩形尽可能占满水平空间
-                base_width = 16  # 更大的宽度
-                figsize = (base_width, base_width / aspect_ratio)
-            elif aspect_ratio < 0.7:  # 高矩形（如64x32, 96x32）
-                # 让高矩形尽可能占满垂直空间
-                base_height = 12
-                figsize = (base_height * aspect_ratio, base_height)
-            else:  # 接近正方形
-                figsize = (12, 12)
-                
+            figsize = self._figure_size()
             self.fig.set_figwidth(figsize[0])
             self.fig.set_figheight(figsize[1])
             
@@ -246,8 +433,11 @@ class HeatmapVisualizer:
                 rasterized=True
             )
             
-            # 更新标题
+            # 更新标题（ax.clear()已移除旧的统计文字和叠加层元素，旧阵列的叠加层数据不再适用）
+            self._create_stats_text()
             self.update_title()
+            self._overlay = None
+            self._create_overlay_artists()
             
             # 设置坐标轴
             self.ax.set_xticks(range(0, self.array_cols, max(1, self.array_cols//8)))
@@ -256,13 +446,9 @@ class HeatmapVisualizer:
             # 重新添加颜色条（如果不存在）
             if not hasattr(self, 'colorbar') or self.colorbar is None:
                 self.colorbar = self.fig.colorbar(self.im, ax=self.ax, fraction=0.046, pad=0.04)
-                self.colorbar.set_label('Pressure (mmHg)', rotation=270, labelpad=25, fontsize=14, fontweight='bold')
                 
                 # 设置颜色条标签
-                tick_positions = [0, 42, 85, 128, 170, 213, 255]
-                tick_labels = [f'{int(pos * self.pressure_scale)} mmHg' for pos in tick_positions]
-                self.colorbar.set_ticks(tick_positions)
-                self.colorbar.set_ticklabels(tick_labels)
+                self._apply_colorbar_labels()
             
             # 设置坐标轴范围，确保热力图填满整个显示区域
             self.ax.set_xlim(-0.5, self.array_cols - 0.5)
@@ -313,7 +499,362 @@ class HeatmapVisualizer:
         """保存热力图快照"""
         try:
             self.fig.savefig(filename, dpi=300, bbox_inches='tight')
+            # 按保存dpi重绘过，整图重绘后重新缓存屏幕背景
+            self._blit_regions = None
+            self.canvas.draw_idle()
             return True
         except Exception as e:
             print(f"保存快照失败: {e}")
-            return False 
\ No newline at end of file
+            return False 
+
+
+class HeatmapUpscaler:
+    """把 (rows, cols) 的uint8矩阵按整数倍放大，缓冲区复用
+
+    bilinear为定点（1/256）双线性插值，按行、列两次一维插值完成；
+    nearest为逐点复制（np.take按预计算的索引取数）。
+    """
+
+    def __init__(self, rows, cols, scale, interpolation='bilinear'):
+        self.rows = rows
+        self.cols = cols
+        self.scale = scale
+        self.interpolation = interpolation
+        self.height = rows * scale
+        self.width = cols * scale
+
+        self.row_index0, self.row_index1, row_weight = self._axis_weights(rows, scale)
+        self.col_index0, self.col_index1, col_weight = self._axis_weights(cols, scale)
+        self.row_weight = row_weight[:, None]
+        self.row_weight_inv = (256 - row_weight)[:, None]
+        self.col_weight = col_weight
+        self.col_weight_inv = 256 - col_weight
+        self.nearest_rows = np.arange(self.height) // scale
+        self.nearest_cols = np.arange(self.width) // scale
+
+        self._source = np.empty((rows, cols), dtype=np.uint16)
+        self._rows_a = np.empty((self.height, cols), dtype=np.uint16)
+        self._rows_b = np.empty((self.height, cols), dtype=np.uint16)
+        self._out_a = np.empty((self.height, self.width), dtype=np.uint16)
+        self._out_b = np.empty((self.height, self.width), dtype=np.uint16)
+
+    @staticmethod
+    def _axis_weights(size, scale):
+        """一个方向上每个目标像素的两个源索引和权重（像素中心对齐，边缘复制）"""
+        centers = (np.arange(size * scale) + 0.5) / scale - 0.5
+        centers = np.clip(centers, 0, size - 1)
+        index0 = np.floor(centers).astype(np.intp)
+        index1 = np.minimum(index0 + 1, size - 1)
+        weight = np.round((centers - index0) * 256).astype(np.uint16)
+        return index0, index1, weight
+
+    def __call__(self, matrix):
+        """
+        Returns:
+            np.ndarray: (height, width) uint16 数值0-255（下一次调用时被覆盖）
+        """
+        source = self._source
+        source[...] = matrix
+        rows_a, rows_b = self._rows_a, self._rows_b
+        out_a, out_b = self._out_a, self._out_b
+
+        if self.interpolation != 'bilinear':
+            np.take(source, self.nearest_rows, axis=0, out=rows_a)
+            np.take(rows_a, self.nearest_cols, axis=1, out=out_a)
+            return out_a
+
+        # 行方向: (H, cols)
+        np.take(source, self.row_index0, axis=0, out=rows_a)
+        np.take(source, self.row_index1, axis=0, out=rows_b)
+        rows_a *= self.row_weight_inv
+        rows_b *= self.row_weight
+        rows_a += rows_b
+        rows_a >>= 8
+        # 列方向: (H, W)
+        np.take(rows_a, self.col_index0, axis=1, out=out_a)
+        np.take(rows_a, self.col_index1, axis=1, out=out_b)
+        out_a *= self.col_weight_inv
+        out_b *= self.col_weight
+        out_a += out_b
+        out_a >>= 8
+        return out_a
+
+
+class PhotoImageHeatmapVisualizer(HeatmapVisualizer):
+    """Tk PhotoImage热力图（实时显示用，不经过matplotlib）
+
+    帧数据按整数倍放大（双线性或最近邻），经256项RGB查找表（与custom_cmap相同）
+    映射为像素后以PPM字节写入tk.PhotoImage。颜色条和刻度只在缩放/换标定时重画，
+    每帧只更新图像和标题文字。公开接口与HeatmapVisualizer相同；快照仍用matplotlib
+    离屏绘制完整的带颜色条图像。
+    """
+
+    TITLE_HEIGHT = 44      # 标题区域高度（像素）
+    COLORBAR_SPACE = 150   # 右侧颜色条及刻度标签占用的宽度
+    COLORBAR_WIDTH = 24
+    PADDING = 10
+
+    def __init__(self, parent_frame, array_rows=32, array_cols=32, interpolation='bilinear'):
+        self.interpolation = interpolation
+        self.upscaler = None
+        self._ppm = None
+        self._ppm_header_size = 0
+        self._rgb = None
+        self._image_origin = (0, 0)
+        self._last_matrix = None
+        super().__init__(parent_frame, array_rows, array_cols)
+        self.use_blit = False
+
+    def setup_figure(self):
+        """创建Tk画布：热力图图像、标题文字、颜色条"""
+        # 查找表：原始值 -> RGB，与matplotlib按custom_cmap/norm映射的颜色一致
+        self.lut_rgb = (self.custom_cmap(self.norm(np.arange(256)))[:, :3] * 255 + 0.5).astype(np.uint8)
+
+        self.widget = tk.Canvas(self.parent_frame, bg='white', highlightthickness=0)
+        self.widget.pack(fill='both', expand=True)
+
+        self.photo = tk.PhotoImage(master=self.widget, width=1, height=1)
+        self.image_item = self.widget.create_image(0, 0, anchor='nw', image=self.photo)
+        self.colorbar_photo = tk.PhotoImage(master=self.widget, width=1, height=1)
+        self.colorbar_item = self.widget.create_image(0, 0, anchor='nw', image=self.colorbar_photo)
+        self.stats_text = self.widget.create_text(0, 0, anchor='s', text='', font=('Arial', 16, 'bold'))
+        self.update_title()
+
+        # 叠加层画布元素（在图像之上），每帧只移动坐标
+        self.cop_trail_item = self.widget.create_line(0, 0, 0, 0, fill=self.cop_color, width=2, state='hidden')
+        self.contact_items = [self.widget.create_rectangle(0, 0, 0, 0, outline=color, width=2, dash=(6, 4),
+                                                           state='hidden')
+                              for color in self.contact_colors]
+        self.cop_marker_item = self.widget.create_oval(0, 0, 0, 0, fill=self.cop_color, outline='black',
+                                                       state='hidden')
+
+        self.widget.bind('<Configure>', self._on_resize)
+
+    def update_title(self):
+        """更新标题"""
+        title = f'Pressure Sensor ({self.array_rows}x{self.array_cols}) - Smooth Gradient'
+        self.widget.itemconfigure(self.stats_text, text=title)
+
+    def _on_resize(self, event):
+        self._layout(event.width, event.height)
+
+    def _layout(self, width=None, height=None):
+        """按画布大小计算放大倍数和位置，重画颜色条，用最后一帧重绘图像"""
+        if width is None:
+            width, height = self.widget.winfo_width(), self.widget.winfo_height()
+        available_width = width - self.COLORBAR_SPACE - 2 * self.PADDING
+        available_height = height - self.TITLE_HEIGHT - 2 * self.PADDING
+        if available_width < self.array_cols or available_height < self.array_rows:
+            return
+
+        scale = max(1, min(available_width // self.array_cols, available_height // self.array_rows))
+        if (self.upscaler is None or self.upscaler.scale != scale
+                or (self.upscaler.rows, self.upscaler.cols) != (self.array_rows, self.array_cols)):
+            self.upscaler = HeatmapUpscaler(self.array_rows, self.array_cols, scale, self.interpolation)
+            # PPM缓冲区：头部 + RGB像素，查找表直接写入像素部分
+            header = f'P6 {self.upscaler.width} {self.upscaler.height} 255 '.encode('ascii')
+            self._ppm = bytearray(len(header) + self.upscaler.height * self.upscaler.width * 3)
+            self._ppm[:len(header)] = header
+            self._ppm_header_size = len(header)
+            self._rgb = np.frombuffer(self._ppm, dtype=np.uint8, offset=len(header)).reshape(
+                self.upscaler.height, self.upscaler.width, 3)
+
+        image_width, image_height = self.upscaler.width, self.upscaler.height
+        x0 = self.PADDING + (available_width - image_width) // 2
+        y0 = self.TITLE_HEIGHT + self.PADDING + (available_height - image_height) // 2
+        self._image_origin = (x0, y0)
+
+        self.widget.coords(self.image_item, x0, y0)
+        self.widget.coords(self.stats_text, x0 + image_width / 2, y0 - 8)
+        self._draw_colorbar(x0 + image_width + 20, y0, image_height)
+
+        if self._last_matrix is not None:
+            self._draw_frame(self._last_matrix)
+        else:
+            self._draw_frame(np.zeros((self.array_rows, self.array_cols), dtype=np.uint8))
+        self._apply_overlay(self._overlay)
+
+    def _draw_colorbar(self, x0, y0, height):
+        """颜色条图像和刻度（原始值位置，物理压力标签）"""
+        widget = self.widget
+        widget.delete('colorbar_tick')
+
+        values = np.linspace(255, 0, height).round().astype(np.uint8)
+        column = self.lut_rgb[values]  # (height, 3)
+        pixels = np.repeat(column[:, None, :], self.COLORBAR_WIDTH, axis=1)
+        header = f'P6 {self.COLORBAR_WIDTH} {height} 255 '.encode('ascii')
+        self.colorbar_photo.configure(data=header + pixels.tobytes(), format='PPM')
+        widget.coords(self.colorbar_item, x0, y0)
+
+        tick_positions, tick_labels = self._colorbar_ticks()
+        x1 = x0 + self.COLORBAR_WIDTH
+        for position, label in zip(tick_positions, tick_labels):
+            y = y0 + (1 - position / 255.0) * (height - 1)
+            widget.create_line(x1, y, x1 + 4, y, tags='colorbar_tick')
+            widget.create_text(x1 + 7, y, anchor='w', text=label, font=('Arial', 10), tags='colorbar_tick')
+        widget.create_text(x1 + 110, y0 + height / 2, text=f'Pressure ({self.calibration.unit})',
+                           angle=270, font=('Arial', 14, 'bold'), tags='colorbar_tick')
+
+    def _apply_overlay(self, overlay):
+        """按当前放大倍数和图像位置移动叠加层画布元素"""
+        widget = self.widget
+        if not self.show_overlay or self.upscaler is None:
+            overlay = None
+        x0, y0 = self._image_origin
+        scale = self.upscaler.scale if self.upscaler is not None else 1
+
+        trail = overlay['trail'] if overlay else None
+        if trail is not None and len(trail) >= 2:
+            points = (trail + 0.5) * scale + (x0, y0)
+            widget.coords(self.cop_trail_item, *points.ravel().tolist())
+            widget.itemconfigure(self.cop_trail_item, state='normal')
+        else:
+            widget.itemconfigure(self.cop_trail_item, state='hidden')
+
+        contacts = overlay['contacts'] if overlay else ()
+        for index, item in enumerate(self.contact_items):
+            box = contacts[index] if index < len(contacts) else None
+            if box is None:
+                widget.itemconfigure(item, state='hidden')
+                continue
+            row0, row1, col0, col1 = box
+            widget.coords(item, x0 + col0 * scale, y0 + row0 * scale,
+                          x0 + (col1 + 1) * scale, y0 + (row1 + 1) * scale)
+            widget.itemconfigure(item, state='normal')
+
+        cop = overlay['cop'] if overlay else None
+        if cop:
+            x = x0 + (cop[0] + 0.5) * scale
+            y = y0 + (cop[1] + 0.5) * scale
+            widget.coords(self.cop_marker_item, x - 6, y - 6, x + 6, y + 6)
+            widget.itemconfigure(self.cop_marker_item, state='normal')
+        else:
+            widget.itemconfigure(self.cop_marker_item, state='hidden')
+
+    def _draw_frame(self, matrix_2d):
+        """放大、查表着色并写入PhotoImage"""
+        if self.upscaler is None:
+            return
+        values = self.upscaler(matrix_2d)
+        np.take(self.lut_rgb, values, axis=0, out=self._rgb)
+        self.photo.configure(data=bytes(self._ppm), format='PPM')
+
+    def set_calibration(self, calibration):
+        """设置压力标定（颜色条刻度和标题统计使用物理单位）"""
+        self.calibration = calibration or PressureCalibration.linear()
+        if self.upscaler is not None:
+            self._layout()
+
+    def update_data(self, matrix_2d, statistics=None, overlay=None):
+        """更新显示数据 - 带帧跳跃优化（overlay为PressureOverlayTracker.update的结果）"""
+        try:
+            # 检查数据有效性
+            if matrix_2d is None or matrix_2d.size == 0:
+                return
+
+            current_time = time.time()
+            if not self._should_render(current_time):
+                return
+            render_start = self.render_timer.start()
+
+            if matrix_2d.shape != (self.array_rows, self.array_cols):
+                self.set_array_size(*matrix_2d.shape)
+
+            smoothed_matrix = self.smooth_data(matrix_2d)
+            if smoothed_matrix.dtype != np.uint8:
+                smoothed_matrix = np.clip(smoothed_matrix, 0, 255).astype(np.uint8)
+            self._last_matrix = smoothed_matrix
+            self._draw_frame(smoothed_matrix)
+            self._overlay = overlay
+            self._apply_overlay(overlay)
+
+            if statistics:
+                self.widget.itemconfigure(self.stats_text, text=self._format_title(statistics))
+
+            self._record_render(render_start, current_time)
+
+        except Exception as e:
+            pass
+
+    def set_array_size(self, rows, cols):
+        """设置新的阵列大小"""
+        if rows != self.array_rows or cols != self.array_cols:
+            self.array_rows = rows
+            self.array_cols = cols
+            self._last_matrix = None
+            self._overlay = None
+            self.upscaler = None
+            self.update_title()
+            self.widget.update_idletasks()
+            self._layout()
+
+    def _draw_snapshot_overlay(self, ax):
+        """快照中画出当前叠加层（与matplotlib显示相同的样式）"""
+        overlay = self._overlay if self.show_overlay else None
+        if not overlay:
+            return
+        trail = overlay['trail']
+        if len(trail) >= 2:
+            ax.plot(trail[:, 0], trail[:, 1], '-', color=self.cop_color, linewidth=2, alpha=0.8)
+        for box, color in zip(overlay['contacts'], self.contact_colors):
+            if box is not None:
+                ax.plot(*self._box_outline(box), '--', color=color, linewidth=1.5)
+        if overlay['cop']:
+            ax.plot([overlay['cop'][0]], [overlay['cop'][1]], 'o', markersize=10,
+                    markerfacecolor=self.cop_color, markeredgecolor='black')
+
+    def get_figure(self):
+        """PhotoImage显示不使用matplotlib图形"""
+        return None
+
+    def get_render_stats(self):
+        stats = super().get_render_stats()
+        stats['blit'] = False
+        stats['backend'] = 'photoimage'
+        return stats
+
+    def save_snapshot(self, filename):
+        """保存热力图快照（离屏matplotlib绘制，与matplotlib显示的快照一致）"""
+        try:
+            matrix = self._last_matrix
+            if matrix is None:
+                matrix = np.zeros((self.array_rows, self.array_cols), dtype=np.uint8)
+            title = self.widget.itemcget(self.stats_text, 'text')
+
+            fig = Figure(figsize=self._figure_size(), dpi=100, facecolor='white')
+            FigureCanvasAgg(fig)
+            ax = fig.add_subplot(111)
+            im = ax.imshow(matrix, cmap=self.custom_cmap, norm=self.norm, interpolation='bilinear', aspect='equal')
+            ax.set_title(title, fontsize=16, fontweight='bold', pad=20)
+            self._draw_snapshot_overlay(ax)
+            ax.set_xlim(-0.5, self.array_cols - 0.5)
+            ax.set_ylim(self.array_rows - 0.5, -0.5)
+            ax.set_xticks(range(0, self.array_cols, max(1, self.array_cols//8)))
+            ax.set_yticks(range(0, self.array_rows, max(1, self.array_rows//8)))
+            colorbar = fig.colorbar(im, ax=ax, fraction=0.046, pad=0.04)
+            colorbar.set_label(f'Pressure ({self.calibration.unit})', rotation=270, labelpad=25, fontsize=14, fontweight='bold')
+            tick_positions, tick_labels = self._colorbar_ticks()
+            colorbar.set_ticks(tick_positions)
+            colorbar.set_ticklabels(tick_labels)
+            fig.subplots_adjust(left=0.05, right=0.8, top=0.95, bottom=0.05)
+            fig.savefig(filename, dpi=300, bbox_inches='tight')
+            return True
+        except Exception as e:
+            print(f"保存快照失败: {e}")
+            return False
+
+
+# 实时热力图后端: matplotlib=完整matplotlib图形（局部重绘），photoimage=NumPy查表直接写入Tk PhotoImage
+HEATMAP_BACKENDS = {
+    'matplotlib': HeatmapVisualizer,
+    'photoimage': PhotoImageHeatmapVisualizer
+}
+
+
+def create_heatmap_visualizer(parent_frame, array_rows=32, array_cols=32, backend='matplotlib'):
+    """按后端名称创建热力图可视化器，未知名称使用matplotlib"""
+    visualizer_class = HEATMAP_BACKENDS.get(backend)
+    if visualizer_class is None:
+        print(f"⚠️ 未知的热力图后端 {backend}，使用matplotlib")
+        visualizer_class = HeatmapVisualizer
+    return visualizer_class(parent_frame, array_rows=array_rows, array_cols=array_cols)